@@ -4,8 +4,18 @@ Analyzes resumes against job descriptions using OpenAI/Azure OpenAI models
 """
 import os
 import json
+import asyncio
+import random
+import hashlib
 from typing import Optional
-from openai import AsyncOpenAI, AsyncAzureOpenAI
+from preprocess import fit_to_budget
+from metrics import (
+    llm_request_seconds, llm_requests_total, llm_retries_total, llm_in_flight, record_llm_usage
+)
+from openai import (
+    AsyncOpenAI, AsyncAzureOpenAI,
+    RateLimitError, APIConnectionError, InternalServerError
+)
 
 
 class ResumeScreeningAgent:
@@ -30,20 +40,32 @@ class ResumeScreeningAgent:
             self.client = AsyncAzureOpenAI(
                 api_key=api_key,
                 api_version=api_version,
-                azure_endpoint=azure_endpoint
+                azure_endpoint=azure_endpoint,
+                max_retries=0  # Retries are handled by create_completion()
             )
             # For Azure, model is the deployment name
             self.model = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o")
             self.using_azure = True
+            # Older Azure API versions reject stream_options
+            self.stream_usage = api_version >= "2024-09-01"
         else:
             # Standard OpenAI configuration
             api_key = os.getenv("OPENAI_API_KEY")
             if not api_key:
                 raise ValueError("OPENAI_API_KEY environment variable is required")
             
-            self.client = AsyncOpenAI(api_key=api_key)
+            self.client = AsyncOpenAI(api_key=api_key, max_retries=0)
             self.model = os.getenv("OPENAI_MODEL", "gpt-4o")
             self.using_azure = False
+            self.stream_usage = True
+        
+        # Retry policy for rate limits (HTTP 429) and transient API errors
+        self.max_retries = int(os.getenv("LLM_MAX_RETRIES", "5"))
+        self.retry_base_delay = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+        self.retry_max_delay = float(os.getenv("LLM_RETRY_MAX_DELAY", "60.0"))
+        
+        # Resumes longer than this many tokens are cut down by section priority
+        self.resume_token_budget = int(os.getenv("RESUME_TOKEN_BUDGET", "3000"))
         
         self.system_prompt = """You are an expert HR recruiter and resume screening specialist.
 Your task is to analyze resumes against job descriptions and provide detailed, actionable insights.
@@ -55,6 +77,12 @@ Provide your analysis in the following JSON format:
 {
     "candidate_name": "Extract candidate name if available, otherwise null",
     "overall_match_score": 0-100 numeric score,
+    "scores": {
+        "technical_skills": 0-100 numeric score for technical qualifications,
+        "experience_level": 0-100 numeric score for relevant work experience,
+        "education_fit": 0-100 numeric score for educational background,
+        "communication": 0-100 numeric score for communication and soft skills
+    },
     "fit_summary": "2-3 sentence summary of overall fit",
     "strengths": ["List of 3-5 key strengths aligned with the job"],
     "gaps": ["List of 2-4 areas where candidate may fall short"],
@@ -64,8 +92,23 @@ Provide your analysis in the following JSON format:
         "experience": "Evaluation of relevant work experience",
         "education": "Educational background assessment",
         "soft_skills": "Communication, leadership, teamwork indicators"
+    },
+    "profile": {
+        "skills": ["Technologies, languages and tools the candidate lists"],
+        "years_experience": total years of professional experience as a number, or null,
+        "titles": ["Job titles held, most recent first"],
+        "education": [{"degree": "Degree name", "field": "Field of study or null", "institution": "School or null"}]
     }
 }"""
+        
+        # Last analysis prefix built (see analysis_prefix), reused while the JD is unchanged
+        self._prefix_jd = None
+        self._prefix = []
+    
+    @property
+    def prompt_version(self) -> str:
+        """Short hash of the system prompt, used to key cached analyses"""
+        return hashlib.sha256(self.system_prompt.encode("utf-8")).hexdigest()[:16]
     
     def is_ready(self) -> bool:
         """Check if agent is properly configured"""
@@ -73,63 +116,322 @@ Provide your analysis in the following JSON format:
             return bool(os.getenv("AZURE_OPENAI_API_KEY") and os.getenv("AZURE_OPENAI_ENDPOINT"))
         return bool(os.getenv("OPENAI_API_KEY"))
     
-    async def analyze_resume(self, resume_text: str, job_description: str) -> dict:
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Seconds to wait before retrying a failed call"""
+        # Prefer the server's hint (Azure sends retry-after-ms, OpenAI retry-after)
+        response = getattr(error, "response", None)
+        headers = response.headers if response is not None else {}
+        try:
+            if headers.get("retry-after-ms"):
+                return min(float(headers["retry-after-ms"]) / 1000, self.retry_max_delay)
+            if headers.get("retry-after"):
+                return min(float(headers["retry-after"]), self.retry_max_delay)
+        except ValueError:
+            pass
+        
+        # Otherwise exponential backoff with jitter
+        delay = self.retry_base_delay * (2 ** attempt)
+        return min(delay, self.retry_max_delay) * random.uniform(0.5, 1.0)
+    
+    async def create_completion(self, operation: str = "chat", **kwargs):
         """
-        Analyze a resume against a job description
+        Call chat.completions.create, backing off and retrying on HTTP 429,
+        connection errors and 5xx responses
+        
+        The call's latency, outcome and (for non-streaming calls) token usage
+        are recorded in the metrics under `operation`. A streaming call returns
+        once the first chunk arrives, so its latency is recorded under
+        `<operation>_ttfb` (time to first byte) instead; its usage arrives in
+        the last chunk and is recorded with record_stream_usage().
         
         Args:
-            resume_text: Extracted text content from resume PDF
-            job_description: The job posting/description to match against
+            operation: Metrics label for the call ("analyze", "chat", "summarize", ...)
+            **kwargs: Arguments forwarded to chat.completions.create
             
         Returns:
-            Structured analysis with scores and recommendations
+            The chat completion response
+        """
+        attempt = 0
+        outcome = "error"
+        timer_label = f"{operation}_ttfb" if kwargs.get("stream") else operation
+        llm_in_flight.inc(operation=operation)
+        try:
+            with llm_request_seconds.time(operation=timer_label):
+                while True:
+                    try:
+                        response = await self.client.chat.completions.create(**kwargs)
+                        break
+                    except (RateLimitError, APIConnectionError, InternalServerError) as e:
+                        if attempt >= self.max_retries:
+                            raise
+                        llm_retries_total.inc(operation=operation)
+                        await asyncio.sleep(self._retry_delay(e, attempt))
+                        attempt += 1
+            outcome = "ok"
+        finally:
+            llm_in_flight.dec(operation=operation)
+            llm_requests_total.inc(operation=operation, outcome=outcome)
+        
+        if not kwargs.get("stream"):
+            record_llm_usage(operation, self._usage(getattr(response, "usage", None)))
+        return response
+    
+    async def summarize_conversation(self, existing_summary: str, messages: list[dict]) -> str:
+        """
+        Fold chat messages into a rolling conversation summary
+        
+        Args:
+            existing_summary: Summary of everything before `messages` ("" if none)
+            messages: Chat messages ({"role", "content"}) to add to the summary
+        
+        Returns:
+            The updated summary
+        """
+        summary_prompt = ""
+        if existing_summary:
+            # Build on the previous summary so it stays cumulative
+            summary_prompt += f"Previous conversation summary: {existing_summary}\n\nContinuing from that summary, also summarize these additional messages:\n\n"
+        else:
+            summary_prompt += "Summarize the following conversation concisely, focusing on key points, decisions, and candidate preferences discussed:\n\n"
+        
+        for msg in messages:
+            summary_prompt += f"{msg['role'].upper()}: {msg['content']}\n"
+        
+        response = await self.create_completion(
+            operation="summarize",
+            model=self.model,
+            messages=[
+                {"role": "system", "content": "You are a helpful assistant that summarizes conversations concisely. When given a previous summary, integrate it with new messages to create a comprehensive but concise summary."},
+                {"role": "user", "content": summary_prompt}
+            ],
+            temperature=0.3,
+            max_tokens=300
+        )
+        return response.choices[0].message.content
+    
+    def analysis_prefix(self, job_description: str) -> list[dict]:
+        """
+        The messages shared by every analysis against one job description
+        
+        The system prompt and JD come first and are byte-identical across calls,
+        so the provider's prompt cache can reuse them; only the resume that
+        follows differs per call.
         """
+        if self._prefix_jd != job_description:
+            self._prefix = [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "system", "content": f"JOB DESCRIPTION:\n{job_description.strip()}"}
+            ]
+            self._prefix_jd = job_description
+        return self._prefix
+    
+    def _build_analysis_messages(self, resume_text: str, job_description: str) -> list[dict]:
+        """Build the chat messages for one resume analysis (shared prefix + resume)"""
         user_message = f"""
-JOB DESCRIPTION:
-{job_description}
-
----
-
 CANDIDATE RESUME:
-{resume_text}
+{fit_to_budget(resume_text, self.resume_token_budget)}
 
 ---
 
 Please analyze this resume against the job description and provide your assessment in the specified JSON format.
 """
+        return self.analysis_prefix(job_description) + [
+            {"role": "user", "content": user_message}
+        ]
+    
+    def record_stream_usage(self, operation: str, usage) -> dict:
+        """
+        Record the usage block of a stream's last chunk (None when the stream
+        did not report one) in the metrics under `operation`
+        
+        Returns:
+            The token counts, as {"prompt_tokens", "completion_tokens", "cached_tokens"}
+        """
+        usage = self._usage(usage)
+        record_llm_usage(operation, usage)
+        return usage
+    
+    @staticmethod
+    def _usage(usage) -> dict:
+        """Token counts from a response's usage block (cached_tokens is the prompt-cache hit)"""
+        if usage is None:
+            return {"prompt_tokens": None, "completion_tokens": None, "cached_tokens": None}
+        details = getattr(usage, "prompt_tokens_details", None)
+        return {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "cached_tokens": (getattr(details, "cached_tokens", None) or 0) if details else 0
+        }
+    
+    def _parse_analysis(self, analysis_json: str) -> dict:
+        """Parse and validate the model's JSON analysis"""
+        analysis = json.loads(analysis_json)
+        
+        # Validate and ensure all required fields exist
+        required_fields = [
+            "overall_match_score", "fit_summary", "strengths", 
+            "gaps", "recommendations", "detailed_analysis"
+        ]
+        
+        for field in required_fields:
+            if field not in analysis:
+                raise ValueError(f"Missing required field: {field}")
         
+        # Ensure match score is within range
+        analysis["overall_match_score"] = max(0, min(100, 
+            float(analysis["overall_match_score"])))
+        
+        # Sub-scores are optional; keep only numeric ones, clamped to 0-100
+        scores = analysis.get("scores")
+        analysis["scores"] = {
+            dimension: max(0.0, min(100.0, float(value)))
+            for dimension, value in (scores.items() if isinstance(scores, dict) else [])
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        }
+        
+        return analysis
+    
+    async def analyze_resume(self, resume_text: str, job_description: str) -> dict:
+        """
+        Analyze a resume against a job description
+        
+        Args:
+            resume_text: Extracted text content from resume PDF
+            job_description: The job posting/description to match against
+            
+        Returns:
+            Structured analysis with scores and recommendations
+        """
+        analysis, _ = await self.analyze_resume_with_usage(resume_text, job_description)
+        return analysis
+    
+    async def analyze_resume_with_usage(self, resume_text: str, job_description: str) -> tuple[dict, dict]:
+        """
+        Analyze a resume and report the call's token usage
+        
+        Returns:
+            (analysis, usage) where usage has prompt_tokens, completion_tokens
+            and cached_tokens
+        """
         try:
-            response = await self.client.chat.completions.create(
+            response = await self.create_completion(
+                operation="analyze",
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
+                messages=self._build_analysis_messages(resume_text, job_description),
                 response_format={"type": "json_object"},
                 temperature=0.3,  # Lower temperature for more consistent analysis
             )
             
             # Parse the JSON response
-            analysis_json = response.choices[0].message.content
-            analysis = json.loads(analysis_json)
-            
-            # Validate and ensure all required fields exist
-            required_fields = [
-                "overall_match_score", "fit_summary", "strengths", 
-                "gaps", "recommendations", "detailed_analysis"
-            ]
-            
-            for field in required_fields:
-                if field not in analysis:
-                    raise ValueError(f"Missing required field: {field}")
-            
-            # Ensure match score is within range
-            analysis["overall_match_score"] = max(0, min(100, 
-                float(analysis["overall_match_score"])))
-            
-            return analysis
+            analysis = self._parse_analysis(response.choices[0].message.content)
+            return analysis, self._usage(response.usage)
             
         except json.JSONDecodeError as e:
             raise ValueError(f"Failed to parse agent response as JSON: {e}")
         except Exception as e:
             raise RuntimeError(f"Error during resume analysis: {e}")
+    
+    async def analyze_resume_stream(self, resume_text: str, job_description: str):
+        """
+        Analyze a resume, streaming top-level analysis fields as the model produces them
+        
+        Args:
+            resume_text: Extracted text content from resume PDF
+            job_description: The job posting/description to match against
+            
+        Yields:
+            ("field", (name, value)) for each completed top-level field, then
+            ("usage", dict) with the call's token counts, then ("analysis", dict)
+            with the full validated analysis
+        """
+        options = {"stream_options": {"include_usage": True}} if self.stream_usage else {}
+        try:
+            stream = await self.create_completion(
+                operation="analyze",
+                model=self.model,
+                messages=self._build_analysis_messages(resume_text, job_description),
+                response_format={"type": "json_object"},
+                temperature=0.3,
+                stream=True,
+                **options
+            )
+        except Exception as e:
+            raise RuntimeError(f"Error during resume analysis: {e}")
+        
+        parser = StreamingFieldParser()
+        usage = None
+        try:
+            async for chunk in stream:
+                # With include_usage the last chunk carries the usage and no choices
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    for field in parser.feed(delta):
+                        yield "field", field
+        except Exception as e:
+            raise RuntimeError(f"Error during resume analysis: {e}")
+        finally:
+            await stream.close()
+        
+        try:
+            analysis = self._parse_analysis(parser.buffer)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Failed to parse agent response as JSON: {e}")
+        usage = self.record_stream_usage("analyze", usage)
+        yield "usage", usage
+        yield "analysis", analysis
+
+
+class StreamingFieldParser:
+    """
+    Incrementally parses a streamed JSON object, returning each top-level
+    key/value pair as soon as its value is complete
+    """
+    
+    def __init__(self):
+        self.buffer = ""
+        self._decoder = json.JSONDecoder()
+        self._pos = None  # Index just past the last consumed field
+    
+    def _skip_whitespace(self, index: int) -> int:
+        while index < len(self.buffer) and self.buffer[index].isspace():
+            index += 1
+        return index
+    
+    def feed(self, text: str) -> list[tuple[str, object]]:
+        """Add streamed text; returns the (key, value) pairs completed by it"""
+        self.buffer += text
+        fields = []
+        
+        if self._pos is None:
+            start = self.buffer.find("{")
+            if start < 0:
+                return fields
+            self._pos = start + 1
+        
+        while True:
+            index = self._skip_whitespace(self._pos)
+            if index >= len(self.buffer) or self.buffer[index] == "}":
+                break
+            
+            try:
+                key, index = self._decoder.raw_decode(self.buffer, index)
+                index = self._skip_whitespace(index)
+                if index >= len(self.buffer) or self.buffer[index] != ":":
+                    break
+                value, index = self._decoder.raw_decode(self.buffer, self._skip_whitespace(index + 1))
+            except json.JSONDecodeError:
+                break  # Incomplete key or value; wait for more text
+            
+            # A value only counts once its terminator arrived (e.g. "8" may become "85")
+            index = self._skip_whitespace(index)
+            if index >= len(self.buffer) or self.buffer[index] not in ",}":
+                break
+            
+            fields.append((key, value))
+            self._pos = index + 1 if self.buffer[index] == "," else index
+        
+        return fields
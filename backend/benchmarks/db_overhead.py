@@ -0,0 +1,87 @@
+"""
+Micro-benchmark: per-query overhead of the Database connection layer
+
+Compares the old pattern (open a fresh sqlite3 connection per query, then
+close it) against the pooled thread-local connections used by Database.
+
+Usage (from the backend directory):
+    python benchmarks/db_overhead.py [--candidates 1000] [--queries 5000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import Database
+
+
+SAMPLE_ANALYSIS = {
+    "candidate_name": "Sample Candidate",
+    "overall_match_score": 72,
+    "fit_summary": "Solid match.",
+    "strengths": ["Python", "SQL"],
+    "gaps": ["Kubernetes"],
+    "recommendations": "Interview",
+    "detailed_analysis": {}
+}
+
+
+def fresh_connection_query(db_path: str, candidate_id: int):
+    """The pre-pool access pattern: connect, query, close"""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT id, name, upload_date, resume_text, analysis_json,
+               technical_skills, experience_level, education_fit, communication, overall_fit
+        FROM candidates
+        WHERE id = ?
+    """, (candidate_id,))
+    cursor.fetchone()
+    conn.close()
+
+
+def time_per_query(func, queries: int, candidates: int) -> float:
+    """Run func(candidate_id) `queries` times and return microseconds per call"""
+    start = time.perf_counter()
+    for i in range(queries):
+        func(i % candidates + 1)
+    return (time.perf_counter() - start) / queries * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=5000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        db = Database(db_path)
+        for i in range(args.candidates):
+            db.add_candidate(f"Resume text for candidate {i}. " * 50, SAMPLE_ANALYSIS)
+        
+        results = {
+            "fresh connection per query": time_per_query(
+                lambda cid: fresh_connection_query(db_path, cid), args.queries, args.candidates
+            ),
+            "pooled connection (get_candidate_by_id)": time_per_query(
+                db.get_candidate_by_id, args.queries, args.candidates
+            ),
+            "pooled connection (candidate_exists)": time_per_query(
+                db.candidate_exists, args.queries, args.candidates
+            ),
+        }
+        db.close()
+    
+    print(f"{args.queries} point lookups over {args.candidates} candidates")
+    for name, micros in results.items():
+        print(f"  {name:<42} {micros:8.1f} us/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Local stand-in for the OpenAI / Azure OpenAI chat completions API
+
+Answers chat.completions.create requests after a configurable latency,
+rejects a configurable fraction with HTTP 429 (with retry-after headers,
+as the real APIs do) and supports streaming, including the final usage
+chunk requested by stream_options.include_usage. JSON-mode requests get a
+well-formed resume analysis; anything else gets a short text answer.
+
+Point the backend at it through the client's base URL:
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=fake uvicorn main:app
+or for Azure:
+    AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8900 AZURE_OPENAI_API_KEY=fake uvicorn main:app
+
+Usage (from the backend directory):
+    python benchmarks/fake_openai.py [--port 8900] [--latency 0.5] [--rate-limit 0.05]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def fake_analysis(resume_text: str) -> str:
+    """A valid analysis JSON whose score and name are derived from the resume"""
+    lines = [line.strip() for line in resume_text.split("CANDIDATE RESUME:")[-1].splitlines() if line.strip()]
+    seed = int(hashlib.sha256(resume_text.encode("utf-8")).hexdigest()[:8], 16)
+    return json.dumps({
+        "candidate_name": lines[0][:60] if lines else None,
+        "overall_match_score": 40 + seed % 60,
+        "scores": {
+            "technical_skills": 30 + seed % 70,
+            "experience_level": 30 + (seed >> 8) % 70,
+            "education_fit": 30 + (seed >> 16) % 70,
+            "communication": 30 + (seed >> 24) % 70
+        },
+        "fit_summary": "Synthetic analysis from the benchmark server. The candidate matches several requirements.",
+        "strengths": ["Relevant backend experience", "Python and SQL", "Delivered production systems"],
+        "gaps": ["No Kubernetes experience listed", "Limited leadership evidence"],
+        "recommendations": "Proceed to a technical phone screen.",
+        "detailed_analysis": {
+            "technical_skills": "Solid core stack for the role.",
+            "experience": "Several years in comparable positions.",
+            "education": "Relevant degree.",
+            "soft_skills": "Clear written communication."
+        }
+    })
+
+
+def create_app(
+    latency: float = 0.5,
+    jitter: float = 0.2,
+    rate_limit: float = 0.0,
+    retry_after: float = 0.1,
+    token_interval: float = 0.005,
+    chunk_chars: int = 16
+) -> FastAPI:
+    """
+    Build the fake API
+    
+    Args:
+        latency: Mean seconds before the response (or the first streamed chunk)
+        jitter: Latency varies uniformly by +/- this fraction of itself
+        rate_limit: Fraction of requests rejected with HTTP 429
+        retry_after: Seconds suggested in the 429 retry-after headers
+        token_interval: Seconds between streamed chunks
+        chunk_chars: Characters of content per streamed chunk
+    """
+    app = FastAPI(title="Fake OpenAI API")
+    app.state.requests = 0
+    app.state.rate_limited = 0
+    
+    async def complete(body: dict, model: str):
+        app.state.requests += 1
+        if random.random() < rate_limit:
+            app.state.rate_limited += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached (fake server)", "type": "requests", "code": "rate_limit_exceeded"}},
+                status_code=429,
+                headers={"retry-after-ms": str(int(retry_after * 1000)), "retry-after": f"{retry_after:g}"}
+            )
+        
+        messages = body.get("messages", [])
+        prompt = "\n".join(str(message.get("content", "")) for message in messages)
+        json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+        content = fake_analysis(prompt) if json_mode else "Based on the resumes provided, the strongest candidates are listed above. (fake server answer)"
+        usage = {
+            "prompt_tokens": estimate_tokens(prompt),
+            "completion_tokens": estimate_tokens(content),
+            "total_tokens": estimate_tokens(prompt) + estimate_tokens(content),
+            "prompt_tokens_details": {"cached_tokens": 0}
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        
+        await asyncio.sleep(max(0.0, latency * random.uniform(1 - jitter, 1 + jitter)))
+        
+        if not body.get("stream"):
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage
+            })
+        
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+        
+        def chunk(choices: list, chunk_usage=None) -> str:
+            return "data: " + json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": choices,
+                "usage": chunk_usage
+            }) + "\n\n"
+        
+        async def events():
+            yield chunk([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+            for start in range(0, len(content), chunk_chars):
+                await asyncio.sleep(token_interval)
+                piece = content[start:start + chunk_chars]
+                yield chunk([{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+            yield chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            if include_usage:
+                yield chunk([], usage)
+            yield "data: [DONE]\n\n"
+        
+        return StreamingResponse(events(), media_type="text/event-stream")
+    
+    @app.post("/v1/chat/completions")
+    async def openai_chat_completions(request: Request):
+        body = await request.json()
+        return await complete(body, body.get("model", "gpt-4o"))
+    
+    @app.post("/openai/deployments/{deployment}/chat/completions")
+    async def azure_chat_completions(deployment: str, request: Request):
+        return await complete(await request.json(), deployment)
+    
+    @app.get("/stats")
+    async def stats():
+        return {"requests": app.state.requests, "rate_limited": app.state.rate_limited}
+    
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.5, help="mean seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.2, help="latency varies by +/- this fraction")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=0.1, help="seconds suggested by 429 responses")
+    parser.add_argument("--token-interval", type=float, default=0.005, help="seconds between streamed chunks")
+    args = parser.parse_args()
+    
+    app = create_app(
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=args.rate_limit,
+        retry_after=args.retry_after,
+        token_interval=args.token_interval
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
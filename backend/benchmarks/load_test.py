@@ -0,0 +1,287 @@
+"""
+Offline load test: the backend against a local fake OpenAI server
+
+Starts benchmarks/fake_openai.py and the backend (uvicorn, in a temporary
+data directory) as subprocesses, sets a job description, then drives each
+scenario at each concurrency level with a closed loop of clients:
+
+    analyze     POST /api/analyze-resume with synthetic PDFs of varying page counts
+    candidates  GET /api/candidates?limit=50
+    chat        POST /api/chat
+
+and reports throughput, client-side latency percentiles, errors and the
+backend's memory (RSS of the server and its PDF worker processes, Linux
+only), followed by the server-side p50/p95 per stage from /api/health.
+No API key or network access is needed.
+
+Usage (from the backend directory):
+    python benchmarks/load_test.py [--concurrency 1,4,16] [--requests 40]
+        [--latency 0.5] [--rate-limit 0.05] [--pages 1,3,10] [--json results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from metrics import percentile
+from synthetic_pdfs import make_resume_pdf
+
+JOB_DESCRIPTION = """Senior Backend Engineer
+We are looking for a backend engineer with 5+ years of Python experience,
+strong SQL (PostgreSQL or SQLite), REST API design with FastAPI or Django,
+and experience running services on Docker and Kubernetes in AWS or Azure."""
+
+CHAT_QUESTIONS = [
+    "Who are the strongest Python candidates?",
+    "Which candidates have Kubernetes experience?",
+    "Compare the top two candidates for this role.",
+    "Who has the most experience with SQL databases?"
+]
+
+
+def process_memory_mb(pid: int) -> Optional[Dict[str, float]]:
+    """
+    Resident memory of a process and its direct children (e.g. the PDF
+    extraction pool), from /proc; None where /proc is unavailable
+    """
+    def status_kb(process_id: int, field: str) -> int:
+        with open(f"/proc/{process_id}/status") as status:
+            for line in status:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+        return 0
+    
+    try:
+        rss = status_kb(pid, "VmRSS")
+        peak = status_kb(pid, "VmHWM")
+    except OSError:
+        return None
+    
+    children_rss = 0
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # The parent PID is the second field after the parenthesised command name
+                parent = int(stat.read().rsplit(")", 1)[1].split()[1])
+            if parent == pid:
+                children_rss += status_kb(int(entry), "VmRSS")
+        except (OSError, ValueError, IndexError):
+            continue
+    
+    return {"rss_mb": rss / 1024, "peak_rss_mb": peak / 1024, "workers_rss_mb": children_rss / 1024}
+
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30.0):
+    """Poll url until it answers, failing early if the process exits"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{process.args[1]} exited with code {process.returncode}")
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:g}s")
+
+
+class Scenario:
+    """Builds and sends one kind of request"""
+    
+    def __init__(self, name: str, page_counts: List[int]):
+        self.name = name
+        self.page_counts = page_counts
+        self._next_seed = 0
+    
+    async def send(self, client: httpx.AsyncClient) -> httpx.Response:
+        if self.name == "analyze":
+            # A new seed per request, so the analysis cache and duplicate check never hit
+            seed = self._next_seed
+            self._next_seed += 1
+            pages = self.page_counts[seed % len(self.page_counts)]
+            pdf = make_resume_pdf(seed, pages)
+            return await client.post(
+                "/api/analyze-resume",
+                files={"file": (f"resume_{seed}.pdf", pdf, "application/pdf")}
+            )
+        if self.name == "candidates":
+            return await client.get("/api/candidates", params={"limit": 50})
+        if self.name == "chat":
+            question = CHAT_QUESTIONS[self._next_seed % len(CHAT_QUESTIONS)]
+            self._next_seed += 1
+            return await client.post("/api/chat", json={"message": question})
+        raise ValueError(f"Unknown scenario: {self.name}")
+
+
+async def run_level(client: httpx.AsyncClient, scenario: Scenario, concurrency: int, requests: int) -> Dict:
+    """Send `requests` requests from `concurrency` concurrent clients and summarize"""
+    latencies = []
+    errors = {}
+    remaining = requests
+    
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await scenario.send(client)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    
+    return {
+        "scenario": scenario.name,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1)
+    }
+
+
+async def run_benchmark(args, api_url: str, backend_pid: int) -> Dict:
+    """Run every scenario at every concurrency level against a running backend"""
+    page_counts = [int(pages) for pages in args.pages.split(",")]
+    concurrency_levels = [int(level) for level in args.concurrency.split(",")]
+    results = []
+    
+    async with httpx.AsyncClient(base_url=api_url, timeout=args.timeout) as client:
+        response = await client.post("/api/job-description", json={"job_description": JOB_DESCRIPTION})
+        response.raise_for_status()
+        
+        for name in args.scenarios.split(","):
+            scenario = Scenario(name, page_counts)
+            for concurrency in concurrency_levels:
+                result = await run_level(client, scenario, concurrency, args.requests)
+                result["memory"] = process_memory_mb(backend_pid)
+                results.append(result)
+                print_result(result)
+        
+        health = (await client.get("/api/health")).json()
+    
+    return {"results": results, "server_latency_seconds": health.get("latency_seconds", {})}
+
+
+def print_result(result: Dict):
+    memory = result["memory"]
+    memory_text = (
+        f"rss {memory['rss_mb']:7.1f} MB (peak {memory['peak_rss_mb']:.1f}, workers {memory['workers_rss_mb']:.1f})"
+        if memory else "rss n/a"
+    )
+    errors = ",".join(f"{status}x{count}" for status, count in result["errors"].items()) or "-"
+    print(
+        f"  {result['scenario']:<10} c={result['concurrency']:<3} {result['throughput_rps']:8.2f} req/s  "
+        f"p50 {result['p50_ms']:8.1f} ms  p95 {result['p95_ms']:8.1f} ms  p99 {result['p99_ms']:8.1f} ms  "
+        f"errors {errors:<8} {memory_text}"
+    )
+
+
+def print_server_latencies(stages: Dict[str, Dict]):
+    print("Server-side latency by stage (recent p50 / p95):")
+    for stage in ("pdf_extraction", "llm", "database", "http"):
+        for label, stats in sorted(stages.get(stage, {}).items(), key=lambda item: -item[1]["count"])[:8]:
+            print(f"  {stage:<15} {label:<45} n={stats['count']:<5} {stats['p50'] * 1000:8.1f} / {stats['p95'] * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default="analyze,candidates,chat")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=40, help="requests per scenario and concurrency level")
+    parser.add_argument("--pages", default="1,3,10", help="page counts of the synthetic PDFs")
+    parser.add_argument("--latency", type=float, default=0.5, help="fake LLM seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fraction of LLM calls answered with 429")
+    parser.add_argument("--api-port", type=int, default=8901)
+    parser.add_argument("--fake-port", type=int, default=8900)
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request client timeout in seconds")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+    
+    fake_url = f"http://127.0.0.1:{args.fake_port}"
+    api_url = f"http://127.0.0.1:{args.api_port}"
+    processes = []
+    
+    with tempfile.TemporaryDirectory() as data_root:
+        try:
+            fake = subprocess.Popen([
+                sys.executable, str(BACKEND_DIR / "benchmarks" / "fake_openai.py"),
+                "--port", str(args.fake_port),
+                "--latency", str(args.latency),
+                "--jitter", str(args.jitter),
+                "--rate-limit", str(args.rate_limit)
+            ])
+            processes.append(fake)
+            wait_until_up(f"{fake_url}/stats", fake)
+            
+            env = dict(
+                os.environ,
+                OPENAI_API_KEY="fake",
+                OPENAI_BASE_URL=f"{fake_url}/v1",
+                # Set (empty) so a real endpoint in backend/.env is not loaded
+                AZURE_OPENAI_ENDPOINT="",
+                RESCORE_ON_JD_CHANGE="false"
+            )
+            # The backend keeps its database and blobs under ./data, so run it in a scratch directory
+            backend = subprocess.Popen(
+                [
+                    sys.executable, "-m", "uvicorn", "main:app",
+                    "--app-dir", str(BACKEND_DIR),
+                    "--port", str(args.api_port),
+                    "--log-level", "warning"
+                ],
+                cwd=data_root,
+                env=env
+            )
+            processes.append(backend)
+            wait_until_up(f"{api_url}/api/health", backend)
+            
+            print(
+                f"Fake LLM: {args.latency:g}s +/- {args.jitter:.0%}, 429 rate {args.rate_limit:.0%}; "
+                f"{args.requests} requests per level"
+            )
+            report = asyncio.run(run_benchmark(args, api_url, backend.pid))
+            report["fake_server"] = httpx.get(f"{fake_url}/stats").json()
+            print_server_latencies(report["server_latency_seconds"])
+            print(f"Fake server: {report['fake_server']['requests']} completions, {report['fake_server']['rate_limited']} rate-limited")
+        finally:
+            for process in reversed(processes):
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+    
+    if args.json:
+        report["settings"] = vars(args)
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark: PDF text extraction backends
+
+Times every installed backend (pdfium, pymupdf, pypdf2) on a corpus of
+resumes: per-document latency, pages per second with and without layout
+hints, and how closely each backend's text agrees with PyPDF2's (word-set
+overlap). Then, for the long documents, compares extracting each one in a
+single executor task with the page-range parallel path used by the backend.
+
+Usage (from the backend directory):
+    python benchmarks/pdf_extractors.py [--corpus DIR] [--count 30] [--pages 1,2,3,5,10,40]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import pdf_parser
+from synthetic_pdfs import make_resume_pdf
+
+
+def load_corpus(args) -> list:
+    """(name, PDF bytes) for each PDF in --corpus, or synthetic resumes"""
+    if args.corpus:
+        return [(path.name, path.read_bytes()) for path in sorted(Path(args.corpus).glob("*.pdf"))]
+    page_counts = [int(pages) for pages in args.pages.split(",")]
+    return [
+        (f"synthetic_{index}", make_resume_pdf(index, page_counts[index % len(page_counts)]))
+        for index in range(args.count)
+    ]
+
+
+def word_overlap(a: str, b: str) -> float:
+    """Jaccard similarity of the two texts' lower-case word sets"""
+    words_a, words_b = set(a.lower().split()), set(b.lower().split())
+    if not words_a and not words_b:
+        return 1.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+def time_backend(name: str, corpus: list, layout: bool, repeat: int) -> dict:
+    """Serial extraction of the whole corpus with one backend"""
+    pages = 0
+    texts = {}
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for doc_name, data in corpus:
+            extracted, _ = pdf_parser.extract_pages(data, layout=layout, extractor=name)
+            pages += len(extracted)
+            texts[doc_name] = pdf_parser.join_pages(extracted)
+    elapsed = time.perf_counter() - start
+    return {
+        "ms_per_doc": elapsed / (len(corpus) * repeat) * 1000,
+        "pages_per_s": pages / elapsed,
+        "texts": texts
+    }
+
+
+async def time_parallel(name: str, paths: list, pages_per_task: int) -> float:
+    """Seconds to extract the files one after another through the extraction executor"""
+    pdf_parser.PDF_PAGES_PER_TASK = pages_per_task
+    start = time.perf_counter()
+    for path in paths:
+        await pdf_parser.extract_document_from_file_async(path)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="directory of PDFs (default: synthetic resumes)")
+    parser.add_argument("--count", type=int, default=30, help="synthetic resumes to generate")
+    parser.add_argument("--pages", default="1,2,3,5,10,40", help="page counts of the synthetic resumes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--long-pages", type=int, default=20, help="documents with at least this many pages count as long")
+    args = parser.parse_args()
+    
+    corpus = load_corpus(args)
+    if not corpus:
+        sys.exit("No PDFs found")
+    total_pages = sum(pdf_parser.extract_pages(data, extractor="pypdf2")[1] for _, data in corpus)
+    backends = pdf_parser.available_extractors()
+    print(f"{len(corpus)} documents, {total_pages} pages; backends installed: {', '.join(backends)}")
+    
+    baseline = time_backend("pypdf2", corpus, layout=False, repeat=1)["texts"]
+    print(f"  {'backend':<10} {'ms/doc':>9} {'pages/s':>9} {'layout ms/doc':>14} {'agreement':>10}")
+    for name in backends:
+        plain = time_backend(name, corpus, layout=False, repeat=args.repeat)
+        with_layout = time_backend(name, corpus, layout=True, repeat=1)
+        agreement = sum(word_overlap(plain["texts"][doc], baseline[doc]) for doc in baseline) / len(baseline)
+        print(
+            f"  {name:<10} {plain['ms_per_doc']:9.2f} {plain['pages_per_s']:9.0f} "
+            f"{with_layout['ms_per_doc']:14.2f} {agreement:10.3f}"
+        )
+    
+    long_docs = [data for _, data in corpus if pdf_parser.extract_pages(data, extractor="pypdf2")[1] >= args.long_pages]
+    if not long_docs:
+        return
+    workers = pdf_parser.PDF_EXTRACTION_WORKERS
+    print(
+        f"Long documents ({len(long_docs)} with >= {args.long_pages} pages, "
+        f"{workers} {pdf_parser.PDF_EXTRACTION_EXECUTOR} workers): one task vs page ranges"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for index, data in enumerate(long_docs):
+            paths.append(Path(tmp) / f"long_{index}.pdf")
+            paths[-1].write_bytes(data)
+        for name in backends:
+            # Workers pick the backend up from the module state (fork) or the environment (spawn)
+            os.environ["PDF_EXTRACTOR"] = pdf_parser.PDF_EXTRACTOR = name
+            pdf_parser.shutdown_extraction_executor()
+            single = asyncio.run(time_parallel(name, paths, 0))
+            split = asyncio.run(time_parallel(name, paths, 8))
+            print(
+                f"  {name:<10} one task {single / len(paths) * 1000:8.1f} ms/doc   "
+                f"8-page ranges {split / len(paths) * 1000:8.1f} ms/doc   ({single / split:.1f}x)"
+            )
+        pdf_parser.shutdown_extraction_executor()
+
+
+if __name__ == "__main__":
+    main()
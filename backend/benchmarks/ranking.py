@@ -0,0 +1,74 @@
+"""
+Benchmark: weighted ranking of a large candidate pool
+
+Fills a scratch database with synthetic candidates (random per-dimension
+scores, no resumes), then times loading the pool's score matrix once and
+re-ranking it with fresh random weights, as /api/rankings does.
+
+Usage (from the backend directory):
+    python benchmarks/ranking.py [--candidates 100000] [--repeat 50] [--top-k 50]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import Database, SCORE_COLUMNS
+from metrics import percentile
+from ranking import RANKING_COLUMNS, RankingService
+
+
+def fill(database: Database, count: int, seed: int = 0):
+    """Insert `count` candidates with random scores (directly, skipping analysis and indexing)"""
+    rng = random.Random(seed)
+    now = datetime.now().isoformat()
+    rows = []
+    for index in range(count):
+        scores = [round(rng.uniform(0, 100), 1) for _ in SCORE_COLUMNS]
+        rows.append((f"Candidate {index}", now, *scores, round(sum(scores) / len(scores), 1)))
+    with database.connection() as conn:
+        conn.executemany(f"""
+            INSERT INTO candidates (name, upload_date, resume_text, analysis_json, {", ".join(SCORE_COLUMNS)}, overall_score)
+            VALUES (?, ?, '', '', {", ".join("?" * len(SCORE_COLUMNS))}, ?)
+        """, rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50, help="rankings with new weights")
+    parser.add_argument("--top-k", type=int, default=50)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(str(Path(tmp) / "ranking.db"))
+        fill(database, args.candidates)
+        service = RankingService(database)
+        rng = random.Random(1)
+        
+        start = time.perf_counter()
+        service.pool()
+        load = time.perf_counter() - start
+        
+        timings = []
+        for _ in range(args.repeat):
+            weights = {column: rng.uniform(0, 3) for column in RANKING_COLUMNS}
+            start = time.perf_counter()
+            service.rank(weights, args.top_k)
+            timings.append(time.perf_counter() - start)
+        database.close()
+    
+    print(f"{args.candidates} candidates: score matrix loaded in {load * 1000:.1f} ms")
+    print(
+        f"  re-rank with new weights (top {args.top_k}): "
+        f"p50 {percentile(timings, 0.50) * 1000:.2f} ms, p95 {percentile(timings, 0.95) * 1000:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Synthetic resume PDFs for benchmarks
+
+Builds plain single-font PDFs directly (no PDF library needed) with
+resume-like text: a name, contact line, skills and as many experience
+entries as it takes to fill the requested page count. Each seed gives a
+different resume, so the backend's analysis cache and duplicate detection
+do not short-circuit the work being measured.
+
+Usage (from the backend directory):
+    python benchmarks/synthetic_pdfs.py OUTPUT_DIR [--count 20] [--pages 1,2,5]
+"""
+import argparse
+import random
+from pathlib import Path
+from typing import List
+
+FIRST_NAMES = ["Ada", "Grace", "Alan", "Linus", "Margaret", "Dennis", "Barbara", "Ken", "Frances", "Edsger", "Radia", "Donald"]
+LAST_NAMES = ["Lovelace", "Hopper", "Turing", "Torvalds", "Hamilton", "Ritchie", "Liskov", "Thompson", "Allen", "Dijkstra", "Perlman", "Knuth"]
+SKILLS = [
+    "Python", "FastAPI", "Django", "SQL", "PostgreSQL", "SQLite", "Redis", "Kafka", "Docker", "Kubernetes",
+    "AWS", "Azure", "Terraform", "React", "TypeScript", "Go", "Rust", "Java", "Spark", "Airflow"
+]
+TITLES = ["Software Engineer", "Senior Backend Engineer", "Data Engineer", "Platform Engineer", "Tech Lead", "Site Reliability Engineer"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Hooli", "Stark Industries", "Wayne Enterprises", "Tyrell Systems"]
+VERBS = ["Built", "Designed", "Migrated", "Scaled", "Led", "Automated", "Optimized", "Maintained"]
+# Bullets are random runs of these words, so each resume's word shingles are
+# mostly its own (otherwise near-duplicate detection would merge them)
+WORDS = (
+    "api service pipeline cluster queue cache schema index query migration rollout release latency "
+    "throughput incident alert dashboard budget contract vendor customer partner team mentor hiring "
+    "roadmap design review test coverage deploy build artifact container image node region failover "
+    "backup restore audit compliance security token auth login billing invoice search ranking model "
+    "feature flag experiment metric report warehouse stream batch job scheduler worker retry timeout "
+    "storage bucket replica shard partition consumer producer event webhook gateway proxy load balancer "
+    "config secret vault network firewall certificate domain mobile web frontend backend tooling docs"
+).split()
+
+LINES_PER_PAGE = 48
+
+
+def resume_pages(seed: int, pages: int) -> List[List[str]]:
+    """Resume text for one synthetic candidate, as lines per page"""
+    rng = random.Random(seed)
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [
+        name,
+        f"{name.lower().replace(' ', '.')}{seed}@example.com | +1 555 {seed % 10000:04d}",
+        "",
+        "SUMMARY",
+        f"{rng.choice(TITLES)} with {rng.randint(2, 15)} years of experience.",
+        "",
+        "SKILLS",
+        ", ".join(rng.sample(SKILLS, 8)),
+        "",
+        "EXPERIENCE"
+    ]
+    while len(lines) < pages * LINES_PER_PAGE - 6:
+        start = rng.randint(2005, 2022)
+        lines.append(f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)} ({start}-{start + rng.randint(1, 4)})")
+        for _ in range(rng.randint(3, 6)):
+            phrase = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 10)))
+            lines.append(f"- {rng.choice(VERBS)} {phrase} with {rng.choice(SKILLS)}")
+        lines.append("")
+    lines += ["EDUCATION", f"BSc Computer Science, University {seed % 97}"]
+    return [lines[page * LINES_PER_PAGE:(page + 1) * LINES_PER_PAGE] for page in range(pages)]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(pages: List[List[str]]) -> bytes:
+    """A minimal PDF with one Helvetica text block per page"""
+    page_count = len(pages)
+    font_ref = 3 + 2 * page_count
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{3 + 2 * index} 0 R" for index in range(page_count)), page_count
+        )
+    ]
+    for index, lines in enumerate(pages):
+        content = "BT /F1 10 Tf 50 760 Td 14 TL " + " ".join(f"({_escape(line)}) Tj T*" for line in lines) + " ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_ref} 0 R >> >> /Contents {4 + 2 * index} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(content.encode('latin-1'))} >>\nstream\n{content}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += b"".join(f"{offset:010d} 00000 n \n".encode("latin-1") for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
+
+
+def make_resume_pdf(seed: int, pages: int = 1) -> bytes:
+    """A synthetic resume PDF with the given number of pages"""
+    return build_pdf(resume_pages(seed, pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output_dir")
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--pages", default="1,2,5", help="comma-separated page counts to cycle through")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    page_counts = [int(pages) for pages in args.pages.split(",")]
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for index in range(args.count):
+        pages = page_counts[index % len(page_counts)]
+        path = output_dir / f"resume_{args.seed + index:04d}_{pages}p.pdf"
+        path.write_bytes(make_resume_pdf(args.seed + index, pages))
+    print(f"Wrote {args.count} PDFs to {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Content-addressed storage for uploaded resume files
+Each file is stored once under the SHA-256 of its bytes, in sharded
+directories (ab/cd/abcd...), written chunk by chunk so uploads are never
+held whole in memory
+
+Blobs are shared by content, so a blob is only removed when nothing refers
+to it: callers pin the blobs they are still working with (save_stream(pin=True)
+... release), and removal re-checks the pins and the caller's references
+under the same per-digest lock that saving takes. sweep() catches what no
+request removed (jobs that failed for good, crashed processes).
+"""
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import BinaryIO, Callable, Tuple
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobStore:
+    """Sharded, content-addressed file store on local disk"""
+    
+    def __init__(self, root: str = "data/blobs", chunk_size: int = 1024 * 1024):
+        self.root = Path(root)
+        self.chunk_size = chunk_size
+        self._tmp_dir = self.root / "tmp"
+        self._tmp_dir.mkdir(parents=True, exist_ok=True)
+        # Striped locks: saving a digest and removing it never interleave
+        self._locks = [threading.Lock() for _ in range(64)]
+        # Digest -> number of in-flight users (uploads not yet recorded anywhere)
+        self._pins = Counter()
+    
+    def _lock(self, digest: str) -> threading.Lock:
+        return self._locks[int(digest[:2], 16) % len(self._locks)]
+    
+    def path(self, digest: str) -> Path:
+        """
+        Location of the blob with this digest (whether or not it exists)
+        
+        Raises:
+            ValueError: If digest is not a SHA-256 hex digest
+        """
+        if not _DIGEST_RE.match(digest):
+            raise ValueError(f"Invalid blob digest: {digest!r}")
+        return self.root / digest[:2] / digest[2:4] / digest
+    
+    def exists(self, digest: str) -> bool:
+        return self.path(digest).is_file()
+    
+    def save_stream(self, stream: BinaryIO, pin: bool = False) -> Tuple[str, int]:
+        """
+        Copy a binary stream into the store, hashing it on the way
+        
+        The data goes to a temporary file first and is renamed into place, so
+        a blob is never visible half-written; content already stored is
+        deduplicated.
+        
+        Args:
+            stream: Binary stream to store
+            pin: Keep the blob from being removed until release() is called,
+                e.g. while the upload is analyzed and before a candidate refers to it
+        
+        Returns:
+            (SHA-256 hex digest, size in bytes)
+        """
+        sha256 = hashlib.sha256()
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self._tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    sha256.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            
+            digest = sha256.hexdigest()
+            target = self.path(digest)
+            with self._lock(digest):
+                if target.exists():
+                    os.unlink(tmp_name)
+                    # Fresh again: the sweep's grace period starts over
+                    os.utime(target)
+                else:
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(tmp_name, target)
+                if pin:
+                    self._pins[digest] += 1
+            return digest, size
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+    
+    async def save_stream_async(self, stream: BinaryIO, pin: bool = False) -> Tuple[str, int]:
+        """save_stream on a worker thread, e.g. for an UploadFile's spooled .file"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.save_stream, stream, pin)
+    
+    def delete(self, digest: str) -> bool:
+        """Remove a blob unconditionally; returns False if it did not exist"""
+        with self._lock(digest):
+            try:
+                self.path(digest).unlink()
+                return True
+            except FileNotFoundError:
+                return False
+    
+    def delete_if_unreferenced(self, digest: str, is_referenced: Callable[[str], bool]) -> bool:
+        """
+        Remove a blob unless it is pinned or is_referenced(digest) says it is in use
+        
+        The check and the removal hold the digest's lock, so an upload of the
+        same content either pins it first (and it is kept) or stores it again
+        after it is gone.
+        
+        Returns:
+            True if the blob was removed
+        """
+        with self._lock(digest):
+            if self._pins[digest] or is_referenced(digest):
+                return False
+            try:
+                self.path(digest).unlink()
+                return True
+            except FileNotFoundError:
+                return False
+    
+    def release(self, digest: str, is_referenced: Callable[[str], bool]) -> bool:
+        """
+        Drop a pin taken by save_stream(pin=True), removing the blob if nothing
+        else uses it (e.g. its analysis failed before a candidate referred to it)
+        
+        Returns:
+            True if the blob was removed
+        """
+        with self._lock(digest):
+            self._pins[digest] -= 1
+            if self._pins[digest] <= 0:
+                del self._pins[digest]
+        return self.delete_if_unreferenced(digest, is_referenced)
+    
+    def sweep(self, is_referenced: Callable[[str], bool], min_age: float) -> int:
+        """
+        Remove every unpinned, unreferenced blob not written (or re-uploaded)
+        in the last min_age seconds, and temporary files left by interrupted writes
+        
+        min_age should comfortably exceed the time an upload takes to be
+        analyzed, since uploads in flight in other processes are not pinned here.
+        
+        Returns:
+            Number of blobs removed
+        """
+        cutoff = time.time() - min_age
+        removed = 0
+        for path in self.root.glob("??/??/*"):
+            digest = path.name
+            if not _DIGEST_RE.match(digest):
+                continue
+            with self._lock(digest):
+                try:
+                    if path.stat().st_mtime > cutoff or self._pins[digest] or is_referenced(digest):
+                        continue
+                    path.unlink()
+                    removed += 1
+                except FileNotFoundError:
+                    continue
+        for path in self._tmp_dir.iterdir():
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except FileNotFoundError:
+                continue
+        return removed
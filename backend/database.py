@@ -4,185 +4,2099 @@ Uses SQLite for local persistence
 """
 import sqlite3
 import json
-from datetime import datetime
+import time
+import asyncio
+import uuid
+import hashlib
+import functools
+import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
 from pathlib import Path
 from typing import Optional, List, Dict
 
+from retrieval import chunk_text
+from dedup import SIMHASH_BANDS, simhash, band_keys, hamming_distance
+from metrics import db_call_seconds, db_calls_pending
+from profiles import DEGREE_LEVELS, DEGREE_RANK, build_profile, normalize_skill
+
+
+# Sort keys accepted by Database.get_candidates_page -> indexed column
+CANDIDATE_SORT_COLUMNS = {
+    "date": "upload_date",
+    "score": "overall_score",
+    "overall_fit": "overall_fit",
+}
+
+
+# Per-dimension analysis scores (the analysis's "scores" object). Each has a
+# 0-100 "<dimension>_score" column and, on candidates, a 1-5 rating column
+SCORE_DIMENSIONS = ("technical_skills", "experience_level", "education_fit", "communication")
+SCORE_COLUMNS = tuple(f"{dimension}_score" for dimension in SCORE_DIMENSIONS)
+
+# Fields returned by the candidate list (the default set); "id" is always included
+CANDIDATE_LIST_FIELDS = (
+    "id", "name", "upload_date", "technical_skills", "experience_level",
+    "education_fit", "communication", "overall_fit", "overall_score"
+) + SCORE_COLUMNS
+
+# Candidate detail adds token usage and the large documents, which are only
+# read from candidate_documents when requested
+CANDIDATE_DETAIL_FIELDS = CANDIDATE_LIST_FIELDS + (
+    "prompt_tokens", "completion_tokens", "cached_tokens", "pdf_digest", "version_of",
+    "resume_text", "analysis", "profile"
+)
+_DOCUMENT_COLUMNS = {"resume_text": "d.resume_text", "analysis": "d.analysis_json"}
+_PROFILE_COLUMNS = {"profile": "p.profile_json"}
+
+
+def _select_fields(fields: Optional[List[str]], allowed: tuple) -> List[str]:
+    """Validate requested fields against allowed; None means all of them. Always includes "id"."""
+    if fields is None:
+        return list(allowed)
+    unknown = set(fields) - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [field for field in allowed if field == "id" or field in fields]
+
+
+def _add_column_if_missing(cursor: sqlite3.Cursor, table: str, column: str, definition: str) -> bool:
+    """Add a column to an existing table; returns True if it was added"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    if any(row[1] == column for row in cursor.fetchall()):
+        return False
+    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return True
+
+
+# Columns of resume_signatures holding the SimHash bands
+_BAND_COLUMNS = [f"band{band}" for band in range(SIMHASH_BANDS)]
+
+
+def _score_to_rating(score: float) -> int:
+    """Convert a 0-100 match score to the 1-5 scale used for the metric columns"""
+    if score >= 90: return 5
+    if score >= 75: return 4
+    if score >= 60: return 3
+    if score >= 40: return 2
+    return 1
+
+
+def _dimension_scores(analysis: dict) -> List[float]:
+    """
+    The analysis's 0-100 score for each of SCORE_DIMENSIONS; dimensions it
+    does not score (e.g. analyses made before sub-scores existed) fall back
+    to the overall match score
+    """
+    overall = analysis.get("overall_match_score", 0)
+    scores = analysis.get("scores") if isinstance(analysis.get("scores"), dict) else {}
+    values = []
+    for dimension in SCORE_DIMENSIONS:
+        value = scores.get(dimension)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            value = overall
+        values.append(max(0.0, min(100.0, float(value))))
+    return values
+
+
+def _escape_like(text: str) -> str:
+    """Escape LIKE wildcards (used with ESCAPE '\\')"""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _encode_cursor(sort_value, candidate_id: int) -> str:
+    """Opaque keyset pagination cursor for the last row of a page"""
+    raw = json.dumps([sort_value, candidate_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    """Inverse of _encode_cursor; raises ValueError on malformed cursors"""
+    try:
+        sort_value, candidate_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return sort_value, int(candidate_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
 
 class Database:
     """SQLite database manager for candidates and job descriptions"""
     
-    def __init__(self, db_path: str = "data/resume_screening.db"):
+    def __init__(self, db_path: str = "data/resume_screening.db", busy_timeout: float = 5.0):
         """Initialize database connection and create tables"""
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.busy_timeout = busy_timeout
+        
+        # One persistent connection per thread, reused across queries
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        
+        # Bumped after every committed change to candidate scores, so score
+        # snapshots (see ranking.py) know when to reload
+        self.scores_version = 0
+        self._scores_version_lock = threading.Lock()
+        
         self.init_db()
     
-    def get_connection(self):
-        """Get database connection"""
-        return sqlite3.connect(str(self.db_path), check_same_thread=False)
+    def _connect(self) -> sqlite3.Connection:
+        """Open and configure a new SQLite connection"""
+        conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+            cached_statements=256  # Prepared statements are reused per connection
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+    
+    def get_connection(self) -> sqlite3.Connection:
+        """Get this thread's persistent database connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    @contextmanager
+    def connection(self):
+        """
+        Use this thread's connection for one unit of work
+        Commits when the block exits normally and rolls back if it raises
+        """
+        conn = self.get_connection()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    
+    def close(self):
+        """Close every pooled connection (called on application shutdown)"""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+    
+    def _scores_changed(self):
+        with self._scores_version_lock:
+            self.scores_version += 1
     
     def init_db(self):
         """Create database tables if they don't exist"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Candidates table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS candidates (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT,
-                upload_date TEXT NOT NULL,
-                resume_text TEXT NOT NULL,
-                analysis_json TEXT NOT NULL,
-                technical_skills INTEGER,
-                experience_level INTEGER,
-                education_fit INTEGER,
-                communication INTEGER,
-                overall_fit INTEGER
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            # Candidates table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS candidates (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT,
+                    upload_date TEXT NOT NULL,
+                    resume_text TEXT NOT NULL,
+                    analysis_json TEXT NOT NULL,
+                    technical_skills INTEGER,
+                    experience_level INTEGER,
+                    education_fit INTEGER,
+                    communication INTEGER,
+                    overall_fit INTEGER
+                )
+            """)
+            
+            # Analysis cache (see AnalysisCache)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS analysis_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    analysis_json TEXT NOT NULL,
+                    candidate_id INTEGER,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL,
+                    hit_count INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_analysis_cache_last_accessed
+                ON analysis_cache (last_accessed)
+            """)
+            
+            # Migration: raw 0-100 match score as its own sortable column
+            if _add_column_if_missing(cursor, "candidates", "overall_score", "REAL"):
+                cursor.execute("""
+                    UPDATE candidates
+                    SET overall_score = COALESCE(json_extract(analysis_json, '$.overall_match_score'), 0)
+                """)
+            
+            # Migration: LLM token usage of the analysis call (NULL for older rows and cache reuse)
+            for column in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+                _add_column_if_missing(cursor, "candidates", column, "INTEGER")
+            
+            # Large per-candidate text lives outside the candidates row, so list
+            # queries and sorts never read it; it is only loaded when asked for
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS candidate_documents (
+                    candidate_id INTEGER PRIMARY KEY REFERENCES candidates(id) ON DELETE CASCADE,
+                    resume_text TEXT NOT NULL,
+                    analysis_json TEXT NOT NULL
+                )
+            """)
+            # Migration: the first search index read candidates.resume_text, with its
+            # triggers on candidates. Detected from the schema (not from whether any
+            # rows exist), dropped here and recreated over candidate_documents below.
+            cursor.execute("""
+                SELECT 1 FROM sqlite_master
+                WHERE (type = 'trigger' AND name IN ('candidates_fts_ai', 'candidates_fts_ad') AND tbl_name = 'candidates')
+                   OR (type = 'table' AND name = 'candidates_fts' AND sql LIKE '%content=''candidates''%')
+                LIMIT 1
+            """)
+            if cursor.fetchone():
+                for trigger in ("candidates_fts_ai", "candidates_fts_ad", "candidates_fts_au"):
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                cursor.execute("DROP TABLE IF EXISTS candidates_fts")
+            
+            # Migration: move resume text and analysis out of the candidates rows
+            # (the old columns are left empty)
+            cursor.execute("SELECT 1 FROM candidates WHERE resume_text != '' LIMIT 1")
+            if cursor.fetchone():
+                cursor.execute("""
+                    INSERT OR IGNORE INTO candidate_documents (candidate_id, resume_text, analysis_json)
+                    SELECT id, resume_text, analysis_json FROM candidates WHERE resume_text != ''
+                """)
+                cursor.execute("UPDATE candidates SET resume_text = '', analysis_json = '' WHERE resume_text != ''")
+            
+            # Migration: hash of the normalized resume text, so a resume is stored once
+            # and re-analyses against other job descriptions reuse it
+            _add_column_if_missing(cursor, "candidates", "resume_hash", "TEXT")
+            cursor.execute("""
+                SELECT c.id, d.resume_text FROM candidates c
+                JOIN candidate_documents d ON d.candidate_id = c.id
+                WHERE c.resume_hash IS NULL
+            """)
+            cursor.executemany(
+                "UPDATE candidates SET resume_hash = ? WHERE id = ?",
+                [(_normalized_hash(resume_text), candidate_id) for candidate_id, resume_text in cursor.fetchall()]
             )
-        """)
-        
-        conn.commit()
-        conn.close()
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_candidates_resume_hash ON candidates (resume_hash)")
+            
+            # SimHash signature of each resume, with one indexed column per band,
+            # for near-duplicate lookup at ingest
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS resume_signatures (
+                    candidate_id INTEGER PRIMARY KEY REFERENCES candidates(id) ON DELETE CASCADE,
+                    simhash INTEGER NOT NULL,
+                    {", ".join(f"{column} INTEGER NOT NULL" for column in _BAND_COLUMNS)}
+                )
+            """)
+            for column in _BAND_COLUMNS:
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_resume_signatures_{column} ON resume_signatures ({column})")
+            cursor.execute("""
+                SELECT d.candidate_id, d.resume_text FROM candidate_documents d
+                LEFT JOIN resume_signatures s ON s.candidate_id = d.candidate_id
+                WHERE s.candidate_id IS NULL
+            """)
+            for candidate_id, resume_text in cursor.fetchall():
+                self._insert_signature(cursor, candidate_id, resume_text)
+            
+            # Structured profile (skills, years of experience, titles, education) parsed
+            # from each resume, so those filters are indexed lookups instead of LLM calls
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS candidate_profiles (
+                    candidate_id INTEGER PRIMARY KEY REFERENCES candidates(id) ON DELETE CASCADE,
+                    years_experience REAL,
+                    highest_degree TEXT,
+                    degree_rank INTEGER NOT NULL DEFAULT 0,
+                    profile_json TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_candidate_profiles_years ON candidate_profiles (years_experience)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_candidate_profiles_degree ON candidate_profiles (degree_rank)")
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS candidate_skills (
+                    skill TEXT NOT NULL,
+                    candidate_id INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+                    PRIMARY KEY (skill, candidate_id)
+                ) WITHOUT ROWID
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_candidate_skills_candidate ON candidate_skills (candidate_id)")
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS candidate_titles (
+                    candidate_id INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+                    title TEXT NOT NULL,
+                    title_norm TEXT NOT NULL
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_candidate_titles_candidate ON candidate_titles (candidate_id)")
+            # Migration: parse profiles of candidates stored before profiles existed
+            cursor.execute("""
+                SELECT d.candidate_id, d.resume_text, d.analysis_json FROM candidate_documents d
+                LEFT JOIN candidate_profiles p ON p.candidate_id = d.candidate_id
+                WHERE p.candidate_id IS NULL
+            """)
+            for candidate_id, resume_text, analysis_json in cursor.fetchall():
+                self._upsert_profile(cursor, candidate_id, resume_text, json.loads(analysis_json or "{}"))
+            
+            # Migration: blob store digest of the uploaded PDF (NULL for candidates
+            # stored before PDFs were kept)
+            _add_column_if_missing(cursor, "candidates", "pdf_digest", "TEXT")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_candidates_pdf_digest ON candidates (pdf_digest)")
+            
+            # Migration: earlier candidate this resume is a near-duplicate (e.g. an
+            # updated version) of; NULL for originals
+            _add_column_if_missing(cursor, "candidates", "version_of", "INTEGER")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_candidates_version_of ON candidates (version_of)")
+            
+            # Indexes backing keyset pagination, sorting and filtering of the candidate list
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_candidates_upload_date ON candidates (upload_date, id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_candidates_overall_score ON candidates (overall_score, id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_candidates_overall_fit ON candidates (overall_fit, id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_candidates_name ON candidates (name COLLATE NOCASE)")
+            
+            # Full-text index over candidate names and whole resumes for search.
+            # External content: the text is read from the candidate_search view;
+            # triggers keep the index in sync with inserts, deletes and re-analysed names
+            cursor.execute("""
+                CREATE VIEW IF NOT EXISTS candidate_search AS
+                SELECT c.id, c.name, d.resume_text
+                FROM candidates c JOIN candidate_documents d ON d.candidate_id = c.id
+            """)
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'candidates_fts'")
+            needs_backfill = cursor.fetchone() is None
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts USING fts5(
+                    name,
+                    resume_text,
+                    content='candidate_search',
+                    content_rowid='id',
+                    tokenize='porter unicode61'
+                )
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS candidates_fts_ai AFTER INSERT ON candidate_documents BEGIN
+                    INSERT INTO candidates_fts (rowid, name, resume_text)
+                    SELECT id, name, new.resume_text FROM candidates WHERE id = new.candidate_id;
+                END
+            """)
+            # BEFORE: the document row is still there (it is removed by the cascade)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS candidates_fts_bd BEFORE DELETE ON candidates BEGIN
+                    INSERT INTO candidates_fts (candidates_fts, rowid, name, resume_text)
+                    SELECT 'delete', old.id, old.name, resume_text FROM candidate_documents WHERE candidate_id = old.id;
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS candidates_fts_au AFTER UPDATE OF name ON candidates BEGIN
+                    INSERT INTO candidates_fts (candidates_fts, rowid, name, resume_text)
+                    SELECT 'delete', old.id, old.name, resume_text FROM candidate_documents WHERE candidate_id = old.id;
+                    INSERT INTO candidates_fts (rowid, name, resume_text)
+                    SELECT new.id, new.name, resume_text FROM candidate_documents WHERE candidate_id = new.id;
+                END
+            """)
+            # Rank name matches above resume-text matches
+            cursor.execute("INSERT INTO candidates_fts (candidates_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')")
+            # Migration: index candidates stored before search existed
+            if needs_backfill:
+                cursor.execute("INSERT INTO candidates_fts (candidates_fts) VALUES ('rebuild')")
+            
+            # Resume chunks for chat retrieval, BM25-indexed with FTS5
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS resume_chunks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    candidate_id INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+                    chunk_index INTEGER NOT NULL,
+                    content TEXT NOT NULL
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_resume_chunks_candidate ON resume_chunks (candidate_id, chunk_index)")
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS resume_chunks_fts USING fts5(
+                    content,
+                    content='resume_chunks',
+                    content_rowid='id',
+                    tokenize='porter unicode61'
+                )
+            """)
+            # Keep the FTS index in sync with resume_chunks
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS resume_chunks_ai AFTER INSERT ON resume_chunks BEGIN
+                    INSERT INTO resume_chunks_fts (rowid, content) VALUES (new.id, new.content);
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS resume_chunks_ad AFTER DELETE ON resume_chunks BEGIN
+                    INSERT INTO resume_chunks_fts (resume_chunks_fts, rowid, content)
+                    VALUES ('delete', old.id, old.content);
+                END
+            """)
+            
+            # Migration: chunk candidates stored before retrieval existed
+            cursor.execute("""
+                SELECT candidate_id, resume_text FROM candidate_documents
+                WHERE candidate_id NOT IN (SELECT DISTINCT candidate_id FROM resume_chunks)
+            """)
+            for candidate_id, resume_text in cursor.fetchall():
+                self._insert_chunks(cursor, candidate_id, resume_text)
+            
+            # Background jobs (pending/running/succeeded/failed), see jobs.JobQueue
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    payload_json TEXT NOT NULL,
+                    payload_blob BLOB,
+                    result_json TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL DEFAULT 3,
+                    run_after REAL NOT NULL,
+                    lease_expires_at REAL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_run_after ON jobs (status, run_after)")
+            
+            # Re-scoring runs: a batch of score_candidate jobs for one job description,
+            # tracked for progress and cancellation (jobs.run_id points here)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS rescore_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    jd_id INTEGER NOT NULL,
+                    trigger TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    total INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            _add_column_if_missing(cursor, "jobs", "run_id", "INTEGER")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_run_status ON jobs (run_id, status)")
+            
+            # Server-side chat sessions: rolling summary + unsummarized recent messages
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS chat_sessions (
+                    id TEXT PRIMARY KEY,
+                    summary TEXT NOT NULL DEFAULT '',
+                    summarized_through INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_chat_sessions_updated_at ON chat_sessions (updated_at)")
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS chat_messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL REFERENCES chat_sessions(id) ON DELETE CASCADE,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_chat_messages_session ON chat_messages (session_id, id)")
+            
+            # Job descriptions (one is active: the default for uploads) and the
+            # candidate x job description analysis matrix
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS job_descriptions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT,
+                    content TEXT NOT NULL,
+                    content_hash TEXT NOT NULL UNIQUE,
+                    is_active INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS candidate_analyses (
+                    candidate_id INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+                    jd_id INTEGER NOT NULL REFERENCES job_descriptions(id) ON DELETE CASCADE,
+                    analysis_json TEXT NOT NULL,
+                    overall_score REAL NOT NULL,
+                    prompt_tokens INTEGER,
+                    completion_tokens INTEGER,
+                    cached_tokens INTEGER,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (candidate_id, jd_id)
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_candidate_analyses_jd_score ON candidate_analyses (jd_id, overall_score)")
+            
+            # Migration: per-dimension 0-100 scores. Existing rows are filled from their
+            # stored analysis (the overall score where it has no sub-scores), and the
+            # candidates' 1-5 ratings are re-derived from them
+            for table in ("candidates", "candidate_analyses"):
+                for column in SCORE_COLUMNS:
+                    _add_column_if_missing(cursor, table, column, "REAL")
+            cursor.execute(f"""
+                SELECT c.id, d.analysis_json FROM candidates c
+                JOIN candidate_documents d ON d.candidate_id = c.id
+                WHERE c.{SCORE_COLUMNS[0]} IS NULL
+            """)
+            updates = []
+            for candidate_id, analysis_json in cursor.fetchall():
+                scores = _dimension_scores(json.loads(analysis_json or "{}"))
+                updates.append((*scores, *(_score_to_rating(score) for score in scores), candidate_id))
+            cursor.executemany(f"""
+                UPDATE candidates SET {", ".join(f"{column} = ?" for column in SCORE_COLUMNS + SCORE_DIMENSIONS)}
+                WHERE id = ?
+            """, updates)
+            cursor.execute(f"SELECT candidate_id, jd_id, analysis_json FROM candidate_analyses WHERE {SCORE_COLUMNS[0]} IS NULL")
+            cursor.executemany(
+                f"UPDATE candidate_analyses SET {', '.join(f'{column} = ?' for column in SCORE_COLUMNS)} "
+                "WHERE candidate_id = ? AND jd_id = ?",
+                [
+                    (*_dimension_scores(json.loads(analysis_json)), candidate_id, jd_id)
+                    for candidate_id, jd_id, analysis_json in cursor.fetchall()
+                ]
+            )
+    
+    def _insert_chunks(self, cursor: sqlite3.Cursor, candidate_id: int, resume_text: str):
+        """Split a resume into retrieval chunks and index them"""
+        cursor.executemany(
+            "INSERT INTO resume_chunks (candidate_id, chunk_index, content) VALUES (?, ?, ?)",
+            [(candidate_id, index, chunk) for index, chunk in enumerate(chunk_text(resume_text))]
+        )
+    
+    def _insert_signature(self, cursor: sqlite3.Cursor, candidate_id: int, resume_text: str):
+        """Index a resume's SimHash signature for near-duplicate lookup"""
+        signature = simhash(resume_text)
+        cursor.execute(
+            f"INSERT OR REPLACE INTO resume_signatures (candidate_id, simhash, {', '.join(_BAND_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * (SIMHASH_BANDS + 2))})",
+            (candidate_id, signature, *band_keys(signature))
+        )
+    
+    def _upsert_profile(self, cursor: sqlite3.Cursor, candidate_id: int, resume_text: str, analysis: dict):
+        """Parse a resume's structured profile and (re)index its skills and titles"""
+        profile = build_profile(resume_text, analysis.get("profile"))
+        cursor.execute("""
+            INSERT OR REPLACE INTO candidate_profiles
+            (candidate_id, years_experience, highest_degree, degree_rank, profile_json, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (
+            candidate_id,
+            profile["years_experience"],
+            profile["highest_degree"],
+            DEGREE_RANK.get(profile["highest_degree"], 0),
+            json.dumps(profile),
+            datetime.now().isoformat()
+        ))
+        cursor.execute("DELETE FROM candidate_skills WHERE candidate_id = ?", (candidate_id,))
+        cursor.executemany(
+            "INSERT OR IGNORE INTO candidate_skills (skill, candidate_id) VALUES (?, ?)",
+            [(skill, candidate_id) for skill in profile["skills"]]
+        )
+        cursor.execute("DELETE FROM candidate_titles WHERE candidate_id = ?", (candidate_id,))
+        cursor.executemany(
+            "INSERT INTO candidate_titles (candidate_id, title, title_norm) VALUES (?, ?, ?)",
+            [(candidate_id, title, title.lower()) for title in profile["titles"]]
+        )
     
-    def add_candidate(self, resume_text: str, analysis: dict) -> int:
+    def add_candidate(
+        self,
+        resume_text: str,
+        analysis: dict,
+        usage: Optional[Dict] = None,
+        jd_id: Optional[int] = None,
+        version_of: Optional[int] = None
+    ) -> int:
         """
         Add a new candidate to the database
         
         Args:
             resume_text: Raw text from resume
             analysis: Analysis result from AI agent
+            usage: Token counts of the analysis call (prompt_tokens,
+                completion_tokens, cached_tokens), if one was made
+            jd_id: Job description the analysis was made against, recorded
+                in the candidate x job description matrix
+            version_of: Stored candidate this resume is a near-duplicate of
             
         Returns:
             ID of the inserted candidate
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            # Per-dimension 0-100 scores, and the 1-5 ratings derived from them
+            overall_score = analysis.get("overall_match_score", 0)
+            scores = _dimension_scores(analysis)
+            
+            # resume_text / analysis_json stay empty here: see candidate_documents
+            cursor.execute(f"""
+                INSERT INTO candidates 
+                (name, upload_date, resume_text, analysis_json, 
+                 technical_skills, experience_level, education_fit, communication, overall_fit,
+                 {", ".join(SCORE_COLUMNS)},
+                 overall_score, prompt_tokens, completion_tokens, cached_tokens, resume_hash, version_of)
+                VALUES (?, ?, '', '', ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                analysis.get("candidate_name"),
+                datetime.now().isoformat(),
+                *(_score_to_rating(score) for score in scores),
+                _score_to_rating(overall_score),  # Overall fit
+                *scores,
+                overall_score,
+                usage.get("prompt_tokens") if usage else None,
+                usage.get("completion_tokens") if usage else None,
+                usage.get("cached_tokens") if usage else None,
+                _normalized_hash(resume_text),
+                version_of
+            ))
+            
+            candidate_id = cursor.lastrowid
+            cursor.execute(
+                "INSERT INTO candidate_documents (candidate_id, resume_text, analysis_json) VALUES (?, ?, ?)",
+                (candidate_id, resume_text, json.dumps(analysis))
+            )
+            self._insert_chunks(cursor, candidate_id, resume_text)
+            self._insert_signature(cursor, candidate_id, resume_text)
+            self._upsert_profile(cursor, candidate_id, resume_text, analysis)
+            if jd_id is not None:
+                self._upsert_analysis(cursor, candidate_id, jd_id, analysis, usage)
         
-        # Extract metrics scores (1-5 scale based on analysis)
-        overall_score = analysis.get("overall_match_score", 0)
+        self._scores_changed()
+        return candidate_id
+    
+    def _upsert_analysis(self, cursor: sqlite3.Cursor, candidate_id: int, jd_id: int, analysis: dict, usage: Optional[Dict]):
+        """Record (or replace) a candidate's analysis against one job description"""
+        cursor.execute(f"""
+            INSERT INTO candidate_analyses
+            (candidate_id, jd_id, analysis_json, overall_score, {", ".join(SCORE_COLUMNS)},
+             prompt_tokens, completion_tokens, cached_tokens, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (candidate_id, jd_id) DO UPDATE SET
+                analysis_json = excluded.analysis_json,
+                overall_score = excluded.overall_score,
+                {"".join(f"{column} = excluded.{column}, " for column in SCORE_COLUMNS)}
+                prompt_tokens = excluded.prompt_tokens,
+                completion_tokens = excluded.completion_tokens,
+                cached_tokens = excluded.cached_tokens,
+                created_at = excluded.created_at
+        """, (
+            candidate_id,
+            jd_id,
+            json.dumps(analysis),
+            analysis.get("overall_match_score", 0),
+            *_dimension_scores(analysis),
+            usage.get("prompt_tokens") if usage else None,
+            usage.get("completion_tokens") if usage else None,
+            usage.get("cached_tokens") if usage else None,
+            datetime.now().isoformat()
+        ))
+    
+    def save_candidate_analysis(
+        self,
+        candidate_id: int,
+        jd_id: int,
+        analysis: dict,
+        usage: Optional[Dict] = None,
+        primary: bool = False
+    ) -> bool:
+        """
+        Record a candidate's analysis against a job description
         
-        # Convert 0-100 score to 1-5 scale for metrics
-        def score_to_rating(score: float) -> int:
-            if score >= 90: return 5
-            if score >= 75: return 4
-            if score >= 60: return 3
-            if score >= 40: return 2
-            return 1
+        Args:
+            candidate_id: Existing candidate
+            jd_id: Job description the analysis was made against
+            analysis: Analysis result from AI agent
+            usage: Token counts of the analysis call, if one was made
+            primary: Also make this the analysis shown on the candidate itself
+                (name, scores and metrics in the candidate list)
+            
+        Returns:
+            False if the candidate or job description no longer exists
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            try:
+                self._upsert_analysis(cursor, candidate_id, jd_id, analysis, usage)
+            except sqlite3.IntegrityError:
+                return False
+            
+            if primary:
+                self._set_primary_analysis(cursor, candidate_id, analysis, usage)
         
-        cursor.execute("""
-            INSERT INTO candidates 
-            (name, upload_date, resume_text, analysis_json, 
-             technical_skills, experience_level, education_fit, communication, overall_fit)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        self._scores_changed()
+        return True
+    
+    def _set_primary_analysis(self, cursor: sqlite3.Cursor, candidate_id: int, analysis: dict, usage: Optional[Dict]):
+        """Show an analysis on the candidate itself: name, scores, metrics and profile"""
+        overall_score = analysis.get("overall_match_score", 0)
+        scores = _dimension_scores(analysis)
+        cursor.execute(f"""
+            UPDATE candidates
+            SET name = COALESCE(?, name),
+                technical_skills = ?, experience_level = ?, education_fit = ?,
+                communication = ?, overall_fit = ?,
+                {"".join(f"{column} = ?, " for column in SCORE_COLUMNS)}overall_score = ?,
+                prompt_tokens = ?, completion_tokens = ?, cached_tokens = ?
+            WHERE id = ?
         """, (
             analysis.get("candidate_name"),
-            datetime.now().isoformat(),
-            resume_text,
-            json.dumps(analysis),
-            score_to_rating(overall_score),  # Technical skills rating
-            score_to_rating(overall_score),  # Experience level
-            score_to_rating(overall_score),  # Education fit
-            score_to_rating(overall_score),  # Communication
-            score_to_rating(overall_score)   # Overall fit
+            *(_score_to_rating(score) for score in scores),
+            _score_to_rating(overall_score),
+            *scores,
+            overall_score,
+            usage.get("prompt_tokens") if usage else None,
+            usage.get("completion_tokens") if usage else None,
+            usage.get("cached_tokens") if usage else None,
+            candidate_id
         ))
+        cursor.execute(
+            "UPDATE candidate_documents SET analysis_json = ? WHERE candidate_id = ?",
+            (json.dumps(analysis), candidate_id)
+        )
+        # The new analysis may carry a better LLM profile
+        cursor.execute("SELECT resume_text FROM candidate_documents WHERE candidate_id = ?", (candidate_id,))
+        row = cursor.fetchone()
+        if row:
+            self._upsert_profile(cursor, candidate_id, row[0], analysis)
+    
+    def promote_stored_analyses(self, jd_id: int, candidate_ids: Optional[List[int]] = None) -> int:
+        """
+        Make candidates' stored analyses against jd_id their primary analysis
         
-        candidate_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        Used when a job description becomes active again: candidates already
+        scored against it show that analysis without another LLM call.
         
-        return candidate_id
+        Args:
+            jd_id: Job description whose analyses to show
+            candidate_ids: Only these candidates (default: all scored against jd_id)
+            
+        Returns:
+            Number of candidates whose primary analysis changed
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = """
+                SELECT ca.candidate_id, ca.analysis_json, ca.prompt_tokens, ca.completion_tokens, ca.cached_tokens
+                FROM candidate_analyses ca
+                JOIN candidate_documents d ON d.candidate_id = ca.candidate_id
+                WHERE ca.jd_id = ? AND d.analysis_json != ca.analysis_json
+            """
+            params = [jd_id]
+            if candidate_ids is not None:
+                query += f" AND ca.candidate_id IN ({','.join('?' * len(candidate_ids))})"
+                params.extend(candidate_ids)
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            
+            for candidate_id, analysis_json, prompt_tokens, completion_tokens, cached_tokens in rows:
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "cached_tokens": cached_tokens}
+                self._set_primary_analysis(cursor, candidate_id, json.loads(analysis_json), usage)
+        
+        if rows:
+            self._scores_changed()
+        return len(rows)
+    
+    def find_duplicate_candidate(self, resume_text: str, max_distance: int = 5) -> Optional[Dict]:
+        """
+        Find the candidate already stored with this resume or a near-duplicate of it
+        
+        An exact match (whitespace-insensitive) wins; otherwise candidates
+        sharing a SimHash band are compared and the closest one within
+        max_distance bits is returned. Distances below SIMHASH_BANDS are
+        always found; the band indexes keep the lookup from scanning every
+        stored resume.
+        
+        Args:
+            resume_text: Extracted text of the new resume
+            max_distance: Max SimHash bit distance of a near-duplicate
+                (negative: exact duplicates only)
+            
+        Returns:
+            {"candidate_id", "distance", "exact"} or None
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                "SELECT id FROM candidates WHERE resume_hash = ? ORDER BY id LIMIT 1",
+                (_normalized_hash(resume_text),)
+            )
+            row = cursor.fetchone()
+            if row:
+                return {"candidate_id": row[0], "distance": 0, "exact": True}
+            if max_distance < 0:
+                return None
+            
+            signature = simhash(resume_text)
+            cursor.execute(
+                f"SELECT candidate_id, simhash FROM resume_signatures WHERE "
+                f"{' OR '.join(f'{column} = ?' for column in _BAND_COLUMNS)}",
+                band_keys(signature)
+            )
+            matches = sorted(
+                (hamming_distance(signature, other), candidate_id)
+                for candidate_id, other in cursor.fetchall()
+            )
+        
+        if not matches or matches[0][0] > max_distance:
+            return None
+        distance, candidate_id = matches[0]
+        return {"candidate_id": candidate_id, "distance": distance, "exact": False}
+    
+    def set_candidate_pdf(self, candidate_id: int, pdf_digest: str):
+        """Record the stored PDF of a candidate; the first PDF kept for a candidate is not replaced"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                "UPDATE candidates SET pdf_digest = COALESCE(pdf_digest, ?) WHERE id = ?",
+                (pdf_digest, candidate_id)
+            )
+    
+    def pdf_in_use(self, pdf_digest: str) -> bool:
+        """Whether any candidate, or any pending or running job, still references this stored PDF"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT 1 FROM candidates WHERE pdf_digest = ? LIMIT 1", (pdf_digest,))
+            if cursor.fetchone():
+                return True
+            # The digest is a unique 64-character hex string, so a substring match on the payload is exact enough
+            cursor.execute(
+                "SELECT 1 FROM jobs WHERE status IN ('pending', 'running') AND instr(payload_json, ?) > 0 LIMIT 1",
+                (pdf_digest,)
+            )
+            return cursor.fetchone() is not None
     
     def get_all_candidates(self) -> List[Dict]:
         """Get all candidates with their metrics"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT id, name, upload_date, technical_skills, experience_level,
+                       education_fit, communication, overall_fit
+                FROM candidates
+                ORDER BY upload_date DESC
+            """)
+            
+            columns = [desc[0] for desc in cursor.description]
+            candidates = []
+            
+            for row in cursor.fetchall():
+                candidate = dict(zip(columns, row))
+                candidates.append(candidate)
+            
+            return candidates
+    
+    def get_candidates_page(
+        self,
+        limit: Optional[int] = 50,
+        cursor: Optional[str] = None,
+        sort: str = "date",
+        descending: bool = True,
+        min_score: Optional[float] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        name_prefix: Optional[str] = None,
+        skills: Optional[List[str]] = None,
+        min_years: Optional[float] = None,
+        degree: Optional[str] = None,
+        title: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict:
+        """
+        Get one page of candidates using keyset (cursor) pagination
         
-        cursor.execute("""
-            SELECT id, name, upload_date, technical_skills, experience_level,
-                   education_fit, communication, overall_fit
-            FROM candidates
-            ORDER BY upload_date DESC
-        """)
+        Each page is an index range scan on (sort column, id), so fetching a page
+        costs the same regardless of table size or page depth.
+        
+        Args:
+            limit: Page size (None returns every matching candidate)
+            cursor: next_cursor from the previous page
+            sort: One of CANDIDATE_SORT_COLUMNS ("date", "score", "overall_fit")
+            descending: Sort direction
+            min_score: Only candidates with overall_match_score >= min_score
+            date_from: Only candidates uploaded on or after this date
+            date_to: Only candidates uploaded on or before this date
+            name_prefix: Case-insensitive candidate name prefix
+            skills: Only candidates with every one of these skills (aliases such
+                as "golang" or "postgres" match their canonical skill)
+            min_years: Only candidates with at least this many years of experience
+            degree: Only candidates with at least this degree (one of DEGREE_LEVELS)
+            title: Case-insensitive substring of a job title the candidate held
+            fields: Subset of CANDIDATE_LIST_FIELDS to return (default all)
+            
+        Returns:
+            {"items": [...], "next_cursor": str | None}
+            
+        Raises:
+            ValueError: On an unknown sort key, field or degree, or a malformed cursor
+        """
+        if sort not in CANDIDATE_SORT_COLUMNS:
+            raise ValueError(f"Unknown sort key: {sort}")
+        sort_column = CANDIDATE_SORT_COLUMNS[sort]
+        selected = _select_fields(fields, CANDIDATE_LIST_FIELDS)
+        # The sort column is needed for the next cursor even when not requested
+        columns = selected + ([sort_column] if sort_column not in selected else [])
+        
+        conditions = []
+        params = []
+        
+        if cursor:
+            last_value, last_id = _decode_cursor(cursor)
+            conditions.append(f"({sort_column}, id) {'<' if descending else '>'} (?, ?)")
+            params.extend([last_value, last_id])
+        if min_score is not None:
+            conditions.append("overall_score >= ?")
+            params.append(min_score)
+        if date_from is not None:
+            conditions.append("upload_date >= ?")
+            params.append(date_from.isoformat())
+        if date_to is not None:
+            conditions.append("upload_date < ?")
+            params.append((date_to + timedelta(days=1)).isoformat())
+        if name_prefix:
+            conditions.append("name LIKE ? ESCAPE '\\'")
+            params.append(_escape_like(name_prefix) + "%")
+        if skills:
+            wanted = list(dict.fromkeys(normalize_skill(skill) for skill in skills if skill.strip()))
+            if wanted:
+                conditions.append(f"""id IN (
+                    SELECT candidate_id FROM candidate_skills WHERE skill IN ({', '.join('?' * len(wanted))})
+                    GROUP BY candidate_id HAVING COUNT(*) = ?
+                )""")
+                params.extend(wanted + [len(wanted)])
+        if min_years is not None:
+            conditions.append("id IN (SELECT candidate_id FROM candidate_profiles WHERE years_experience >= ?)")
+            params.append(min_years)
+        if degree is not None:
+            if degree not in DEGREE_RANK:
+                raise ValueError(f"Unknown degree: {degree} (expected one of {', '.join(DEGREE_LEVELS)})")
+            conditions.append("id IN (SELECT candidate_id FROM candidate_profiles WHERE degree_rank >= ?)")
+            params.append(DEGREE_RANK[degree])
+        if title:
+            conditions.append("id IN (SELECT candidate_id FROM candidate_titles WHERE title_norm LIKE ? ESCAPE '\\')")
+            params.append("%" + _escape_like(title.lower()) + "%")
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        direction = "DESC" if descending else "ASC"
+        limit_clause = ""
+        if limit is not None:
+            # Fetch one extra row to know whether another page exists
+            limit_clause = "LIMIT ?"
+            params.append(limit + 1)
+        
+        with self.connection() as conn:
+            db_cursor = conn.cursor()
+            
+            db_cursor.execute(f"""
+                SELECT {', '.join(columns)}
+                FROM candidates
+                {where}
+                ORDER BY {sort_column} {direction}, id {direction}
+                {limit_clause}
+            """, params)
+            
+            candidates = [dict(zip(columns, row)) for row in db_cursor.fetchall()]
         
-        columns = [desc[0] for desc in cursor.description]
-        candidates = []
+        next_cursor = None
+        if limit is not None and len(candidates) > limit:
+            candidates = candidates[:limit]
+            last = candidates[-1]
+            next_cursor = _encode_cursor(last[sort_column], last["id"])
         
-        for row in cursor.fetchall():
-            candidate = dict(zip(columns, row))
-            candidates.append(candidate)
+        if sort_column not in selected:
+            for candidate in candidates:
+                del candidate[sort_column]
         
-        conn.close()
-        return candidates
+        return {"items": candidates, "next_cursor": next_cursor}
     
-    def get_candidate_by_id(self, candidate_id: int) -> Optional[Dict]:
-        """Get full candidate details including analysis"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def get_candidate_by_id(self, candidate_id: int, fields: Optional[List[str]] = None) -> Optional[Dict]:
+        """
+        Get candidate details including analysis and resume text
         
-        cursor.execute("""
-            SELECT id, name, upload_date, resume_text, analysis_json,
-                   technical_skills, experience_level, education_fit, communication, overall_fit
-            FROM candidates
-            WHERE id = ?
-        """, (candidate_id,))
+        Args:
+            candidate_id: Candidate to load
+            fields: Subset of CANDIDATE_DETAIL_FIELDS to return (default all);
+                resume_text and analysis are only read when requested
+            
+        Raises:
+            ValueError: On an unknown field
+        """
+        selected = _select_fields(fields, CANDIDATE_DETAIL_FIELDS)
+        columns = [
+            _DOCUMENT_COLUMNS.get(field) or _PROFILE_COLUMNS.get(field) or f"c.{field}"
+            for field in selected
+        ]
+        join = ""
+        if any(field in _DOCUMENT_COLUMNS for field in selected):
+            join += "LEFT JOIN candidate_documents d ON d.candidate_id = c.id\n"
+        if any(field in _PROFILE_COLUMNS for field in selected):
+            join += "LEFT JOIN candidate_profiles p ON p.candidate_id = c.id\n"
         
-        row = cursor.fetchone()
-        conn.close()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(f"""
+                SELECT {', '.join(columns)}
+                FROM candidates c
+                {join}
+                WHERE c.id = ?
+            """, (candidate_id,))
+            
+            row = cursor.fetchone()
         
         if not row:
             return None
         
-        columns = ['id', 'name', 'upload_date', 'resume_text', 'analysis_json',
-                   'technical_skills', 'experience_level', 'education_fit', 'communication', 'overall_fit']
-        candidate = dict(zip(columns, row))
-        
-        # Parse JSON analysis
-        candidate['analysis'] = json.loads(candidate['analysis_json'])
-        del candidate['analysis_json']
+        candidate = dict(zip(selected, row))
+        if "analysis" in candidate:
+            candidate["analysis"] = json.loads(candidate["analysis"] or "{}")
+        if "profile" in candidate:
+            candidate["profile"] = json.loads(candidate["profile"]) if candidate["profile"] else None
         
         return candidate
     
+    def get_token_usage(self) -> Dict:
+        """Totals of the recorded analysis token usage across candidates"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT COUNT(prompt_tokens), COALESCE(SUM(prompt_tokens), 0),
+                       COALESCE(SUM(completion_tokens), 0), COALESCE(SUM(cached_tokens), 0)
+                FROM candidates
+            """)
+            calls, prompt_tokens, completion_tokens, cached_tokens = cursor.fetchone()
+        
+        return {
+            "analyses": calls,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens,
+            "cached_ratio": round(cached_tokens / prompt_tokens, 3) if prompt_tokens else 0.0
+        }
+    
+    def get_skill_counts(self, limit: int = 100) -> List[Dict]:
+        """Most common skills across candidates, with how many candidates list each"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT skill, COUNT(*) AS candidates FROM candidate_skills
+                GROUP BY skill ORDER BY candidates DESC, skill
+                LIMIT ?
+            """, (limit,))
+            return [{"skill": skill, "candidates": count} for skill, count in cursor.fetchall()]
+    
+    def candidate_exists(self, candidate_id: int) -> bool:
+        """Check whether a candidate row exists"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT 1 FROM candidates WHERE id = ?", (candidate_id,))
+            exists = cursor.fetchone() is not None
+            
+            return exists
+    
     def get_all_resumes_text(self) -> List[Dict[str, str]]:
         """Get all candidates' resume text for chat context"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT c.id, c.name, d.resume_text
+                FROM candidates c
+                JOIN candidate_documents d ON d.candidate_id = c.id
+                ORDER BY c.upload_date DESC
+            """)
+            
+            resumes = []
+            for row in cursor.fetchall():
+                resumes.append({
+                    "id": row[0],
+                    "name": row[1] or f"Candidate {row[0]}",
+                    "resume_text": row[2]
+                })
+            
+            return resumes
+    
+    def search_chunks(self, match_query: str, limit: int = 8, candidate_id: Optional[int] = None) -> List[Dict]:
+        """
+        Find the resume chunks most relevant to a query (BM25 via FTS5)
         
-        cursor.execute("""
-            SELECT id, name, resume_text
-            FROM candidates
-            ORDER BY upload_date DESC
-        """)
-        
-        resumes = []
-        for row in cursor.fetchall():
-            resumes.append({
-                "id": row[0],
-                "name": row[1] or f"Candidate {row[0]}",
-                "resume_text": row[2]
-            })
-        
-        conn.close()
-        return resumes
+        Args:
+            match_query: FTS5 MATCH expression (see retrieval.build_match_query)
+            limit: Maximum number of chunks
+            candidate_id: Restrict results to one candidate
+            
+        Returns:
+            Chunks ordered by relevance: {"candidate_id", "name", "chunk_index", "content"}
+        """
+        if not match_query:
+            return []
+        
+        candidate_filter = "AND c.candidate_id = ?" if candidate_id is not None else ""
+        params = [match_query] + ([candidate_id] if candidate_id is not None else []) + [limit]
+        
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(f"""
+                SELECT c.candidate_id, cand.name, c.chunk_index, c.content
+                FROM resume_chunks_fts
+                JOIN resume_chunks c ON c.id = resume_chunks_fts.rowid
+                JOIN candidates cand ON cand.id = c.candidate_id
+                WHERE resume_chunks_fts MATCH ? {candidate_filter}
+                ORDER BY bm25(resume_chunks_fts)
+                LIMIT ?
+            """, params)
+            
+            return [
+                {
+                    "candidate_id": row[0],
+                    "name": row[1] or f"Candidate {row[0]}",
+                    "chunk_index": row[2],
+                    "content": row[3]
+                }
+                for row in cursor.fetchall()
+            ]
+    
+    def search_candidates(self, match_query: str, limit: int = 20, cursor: Optional[str] = None) -> Dict:
+        """
+        Full-text search over candidate names and resumes, best matches first
+        
+        Ranked by BM25 with name matches weighted above resume text. Pages are
+        keyset-paginated on (rank, id) like get_candidates_page.
+        
+        Args:
+            match_query: FTS5 MATCH expression (see retrieval.build_search_query)
+            limit: Page size
+            cursor: next_cursor from the previous page
+            
+        Returns:
+            {"items": [...], "next_cursor": str | None}; each item has the
+            candidate's list fields plus "rank" (lower is better) and "snippet"
+            (matching resume excerpt, terms wrapped in <mark>)
+            
+        Raises:
+            ValueError: On a malformed cursor or MATCH expression
+        """
+        if not match_query:
+            return {"items": [], "next_cursor": None}
+        
+        conditions = ["candidates_fts MATCH ?"]
+        params = [match_query]
+        if cursor:
+            last_rank, last_id = _decode_cursor(cursor)
+            conditions.append("(f.rank, f.rowid) > (?, ?)")
+            params.extend([last_rank, last_id])
+        params.append(limit + 1)
+        
+        with self.connection() as conn:
+            db_cursor = conn.cursor()
+            
+            try:
+                db_cursor.execute(f"""
+                    SELECT c.id, c.name, c.upload_date, c.technical_skills, c.experience_level,
+                           c.education_fit, c.communication, c.overall_fit, c.overall_score,
+                           f.rank, snippet(candidates_fts, 1, '<mark>', '</mark>', '…', 16)
+                    FROM candidates_fts f
+                    JOIN candidates c ON c.id = f.rowid
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY f.rank, f.rowid
+                    LIMIT ?
+                """, params)
+            except sqlite3.OperationalError as e:
+                raise ValueError(f"Invalid search query: {e}")
+            
+            columns = [desc[0] for desc in db_cursor.description[:9]] + ["rank", "snippet"]
+            items = [dict(zip(columns, row)) for row in db_cursor.fetchall()]
+        
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = _encode_cursor(items[-1]["rank"], items[-1]["id"])
+        
+        return {"items": items, "next_cursor": next_cursor}
     
     def delete_candidate(self, candidate_id: int) -> bool:
         """Delete a candidate"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("DELETE FROM resume_chunks WHERE candidate_id = ?", (candidate_id,))
+            cursor.execute("DELETE FROM candidate_analyses WHERE candidate_id = ?", (candidate_id,))
+            cursor.execute("DELETE FROM resume_signatures WHERE candidate_id = ?", (candidate_id,))
+            cursor.execute("DELETE FROM candidate_skills WHERE candidate_id = ?", (candidate_id,))
+            cursor.execute("DELETE FROM candidate_titles WHERE candidate_id = ?", (candidate_id,))
+            cursor.execute("DELETE FROM candidate_profiles WHERE candidate_id = ?", (candidate_id,))
+            cursor.execute("UPDATE candidates SET version_of = NULL WHERE version_of = ?", (candidate_id,))
+            cursor.execute("DELETE FROM candidates WHERE id = ?", (candidate_id,))
+            deleted = cursor.rowcount > 0
+            # After the candidate row: its delete trigger reads the resume for the search index
+            cursor.execute("DELETE FROM candidate_documents WHERE candidate_id = ?", (candidate_id,))
         
-        cursor.execute("DELETE FROM candidates WHERE id = ?", (candidate_id,))
-        deleted = cursor.rowcount > 0
+        self._scores_changed()
+        return deleted
+    
+    # Job descriptions and the candidate x job description matrix
+    
+    def create_job_description(self, content: str, title: Optional[str] = None, activate: bool = False) -> int:
+        """
+        Store a job description, reusing the existing row if the same text was stored before
         
-        conn.commit()
-        conn.close()
+        Args:
+            content: Job description text
+            title: Optional display name (updates the existing row's title if given)
+            activate: Make it the active job description
+            
+        Returns:
+            ID of the job description
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                INSERT INTO job_descriptions (title, content, content_hash, created_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (content_hash) DO UPDATE SET title = COALESCE(excluded.title, title)
+                RETURNING id
+            """, (title, content, _normalized_hash(content), datetime.now().isoformat()))
+            jd_id = cursor.fetchone()[0]
+            
+            if activate:
+                cursor.execute("UPDATE job_descriptions SET is_active = (id = ?)", (jd_id,))
+            
+            return jd_id
+    
+    def import_legacy_job_description(self, content: str) -> int:
+        """
+        Import the job description from the old single-file storage as the active one
+        
+        Candidates analyzed before job descriptions had IDs are recorded as
+        analyzed against it, with the per-dimension scores init_db backfilled
+        onto their rows.
+        """
+        jd_id = self.create_job_description(content, title="Imported job description", activate=True)
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO candidate_analyses
+                (candidate_id, jd_id, analysis_json, overall_score, {", ".join(SCORE_COLUMNS)},
+                 prompt_tokens, completion_tokens, cached_tokens, created_at)
+                SELECT c.id, ?, d.analysis_json, COALESCE(c.overall_score, 0),
+                       {", ".join(f"COALESCE(c.{column}, c.overall_score)" for column in SCORE_COLUMNS)},
+                       c.prompt_tokens, c.completion_tokens, c.cached_tokens, c.upload_date
+                FROM candidates c
+                JOIN candidate_documents d ON d.candidate_id = c.id
+                WHERE c.id NOT IN (SELECT candidate_id FROM candidate_analyses)
+            """, (jd_id,))
+        self._scores_changed()
+        return jd_id
+    
+    def get_job_description(self, jd_id: int) -> Optional[Dict]:
+        """Get one job description"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT id, title, content, is_active, created_at
+                FROM job_descriptions WHERE id = ?
+            """, (jd_id,))
+            row = cursor.fetchone()
+        
+        if not row:
+            return None
+        return {"id": row[0], "title": row[1], "content": row[2], "is_active": bool(row[3]), "created_at": row[4]}
+    
+    def get_active_job_description(self) -> Optional[Dict]:
+        """Get the active job description, if one is set"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT id FROM job_descriptions WHERE is_active = 1 LIMIT 1")
+            row = cursor.fetchone()
+        
+        return self.get_job_description(row[0]) if row else None
+    
+    def list_job_descriptions(self) -> List[Dict]:
+        """List job descriptions (newest first) with how many candidates were scored against each"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT jd.id, jd.title, jd.is_active, jd.created_at,
+                       (SELECT COUNT(*) FROM candidate_analyses ca WHERE ca.jd_id = jd.id)
+                FROM job_descriptions jd
+                ORDER BY jd.id DESC
+            """)
+            
+            return [
+                {"id": row[0], "title": row[1], "is_active": bool(row[2]), "created_at": row[3], "scored_candidates": row[4]}
+                for row in cursor.fetchall()
+            ]
+    
+    def activate_job_description(self, jd_id: int) -> bool:
+        """Make a job description the active one; returns False if it does not exist"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT 1 FROM job_descriptions WHERE id = ?", (jd_id,))
+            if cursor.fetchone() is None:
+                return False
+            cursor.execute("UPDATE job_descriptions SET is_active = (id = ?)", (jd_id,))
+            return True
+    
+    def delete_job_description(self, jd_id: int) -> bool:
+        """Delete a job description and the analyses made against it"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("DELETE FROM candidate_analyses WHERE jd_id = ?", (jd_id,))
+            cursor.execute("DELETE FROM job_descriptions WHERE id = ?", (jd_id,))
+            deleted = cursor.rowcount > 0
         
+        self._scores_changed()
         return deleted
+    
+    def get_unscored_candidate_ids(self, jd_id: int, candidate_ids: Optional[List[int]] = None) -> List[int]:
+        """IDs of candidates (optionally restricted to candidate_ids) with no analysis against jd_id"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            query = """
+                SELECT id FROM candidates
+                WHERE id NOT IN (SELECT candidate_id FROM candidate_analyses WHERE jd_id = ?)
+            """
+            params = [jd_id]
+            if candidate_ids is not None:
+                query += f" AND id IN ({','.join('?' * len(candidate_ids))})"
+                params.extend(candidate_ids)
+            cursor.execute(query + " ORDER BY id", params)
+            
+            return [row[0] for row in cursor.fetchall()]
+    
+    def get_candidate_analyses(self, candidate_id: int) -> List[Dict]:
+        """All analyses of one candidate, one per job description, best score first"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT ca.jd_id, jd.title, ca.overall_score, ca.analysis_json, ca.created_at
+                FROM candidate_analyses ca
+                JOIN job_descriptions jd ON jd.id = ca.jd_id
+                WHERE ca.candidate_id = ?
+                ORDER BY ca.overall_score DESC
+            """, (candidate_id,))
+            
+            return [
+                {"jd_id": row[0], "title": row[1], "overall_score": row[2], "analysis": json.loads(row[3]), "created_at": row[4]}
+                for row in cursor.fetchall()
+            ]
+    
+    def get_candidate_analysis(self, candidate_id: int, jd_id: int) -> Optional[Dict]:
+        """A candidate's analysis against one job description, or None if not scored against it"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                "SELECT analysis_json FROM candidate_analyses WHERE candidate_id = ? AND jd_id = ?",
+                (candidate_id, jd_id)
+            )
+            row = cursor.fetchone()
+            return json.loads(row[0]) if row else None
+    
+    def get_score_matrix(self, jd_ids: Optional[List[int]] = None) -> Dict:
+        """
+        Candidate x job description score matrix
+        
+        Args:
+            jd_ids: Job descriptions to include (default: all)
+            
+        Returns:
+            {"job_descriptions": [{id, title}], "candidates": [{id, name, scores: {jd_id: score}}]}
+            with candidates ordered by their best score
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            jd_filter = ""
+            params = []
+            if jd_ids is not None:
+                jd_filter = f"WHERE id IN ({','.join('?' * len(jd_ids))})"
+                params = list(jd_ids)
+            cursor.execute(f"SELECT id, title FROM job_descriptions {jd_filter} ORDER BY id", params)
+            job_descriptions = [{"id": row[0], "title": row[1]} for row in cursor.fetchall()]
+            
+            cursor.execute(f"""
+                SELECT c.id, c.name, ca.jd_id, ca.overall_score
+                FROM candidate_analyses ca
+                JOIN candidates c ON c.id = ca.candidate_id
+                WHERE ca.jd_id IN (SELECT id FROM job_descriptions {jd_filter})
+            """, params)
+            
+            candidates = {}
+            for candidate_id, name, jd_id, score in cursor.fetchall():
+                candidate = candidates.setdefault(candidate_id, {"id": candidate_id, "name": name, "scores": {}})
+                candidate["scores"][jd_id] = score
+        
+        return {
+            "job_descriptions": job_descriptions,
+            "candidates": sorted(candidates.values(), key=lambda c: max(c["scores"].values()), reverse=True)
+        }
+    
+    def get_score_rows(self, jd_id: Optional[int] = None) -> List[tuple]:
+        """
+        (id, name, *SCORE_COLUMNS, overall_score) of every candidate, ordered by id
+        
+        Args:
+            jd_id: Use the candidates' analyses against this job description
+                (only candidates scored against it) instead of their primary analysis
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            if jd_id is None:
+                cursor.execute(f"""
+                    SELECT id, name, {", ".join(SCORE_COLUMNS)}, overall_score
+                    FROM candidates ORDER BY id
+                """)
+            else:
+                cursor.execute(f"""
+                    SELECT c.id, c.name, {", ".join(f"ca.{column}" for column in SCORE_COLUMNS)}, ca.overall_score
+                    FROM candidate_analyses ca
+                    JOIN candidates c ON c.id = ca.candidate_id
+                    WHERE ca.jd_id = ?
+                    ORDER BY c.id
+                """, (jd_id,))
+            return cursor.fetchall()
+    
+    # Re-scoring runs
+    
+    def create_rescore_run(self, jd_id: int, total: int, trigger: str = "manual") -> int:
+        """
+        Record a new re-scoring run of `total` candidates against a job description
+        
+        Args:
+            jd_id: Job description the candidates are scored against
+            total: Number of candidates queued
+            trigger: "jd_change" for runs started by changing the active job
+                description, "manual" for explicit requests
+        """
+        now = time.time()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                INSERT INTO rescore_runs (jd_id, trigger, status, total, created_at, updated_at)
+                VALUES (?, ?, 'running', ?, ?, ?)
+            """, (jd_id, trigger, total, now, now))
+            return cursor.lastrowid
+    
+    def get_rescore_run(self, run_id: int) -> Optional[Dict]:
+        """
+        Get a re-scoring run with its progress
+        
+        Returns:
+            {"run_id", "jd_id", "trigger", "status", "total", "succeeded", "failed",
+             "cancelled", "pending", "running", "created_at", "updated_at"} or None.
+            status is "running" until no job is left pending or running, then
+            "completed" (or "cancelled" if the run was cancelled).
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT id, jd_id, trigger, status, total, created_at, updated_at
+                FROM rescore_runs WHERE id = ?
+            """, (run_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            
+            cursor.execute("SELECT status, COUNT(*) FROM jobs WHERE run_id = ? GROUP BY status", (run_id,))
+            counts = dict(cursor.fetchall())
+        
+        progress = {status: counts.get(status, 0) for status in ("succeeded", "failed", "cancelled", "pending", "running")}
+        status = row[3]
+        if status == "running" and progress["pending"] + progress["running"] == 0:
+            status = "completed"
+        
+        return {
+            "run_id": row[0],
+            "jd_id": row[1],
+            "trigger": row[2],
+            "status": status,
+            "total": row[4],
+            **progress,
+            "created_at": row[5],
+            "updated_at": row[6]
+        }
+    
+    def list_rescore_runs(self, limit: int = 20) -> List[Dict]:
+        """Most recent re-scoring runs with their progress"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT id FROM rescore_runs ORDER BY id DESC LIMIT ?", (limit,))
+            run_ids = [row[0] for row in cursor.fetchall()]
+        
+        return [self.get_rescore_run(run_id) for run_id in run_ids]
+    
+    def cancel_rescore_run(self, run_id: int) -> bool:
+        """
+        Cancel a re-scoring run: its pending jobs are dropped, running ones finish
+        
+        Returns:
+            False if the run does not exist
+        """
+        now = time.time()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT 1 FROM rescore_runs WHERE id = ?", (run_id,))
+            if cursor.fetchone() is None:
+                return False
+            
+            cursor.execute(
+                "UPDATE rescore_runs SET status = 'cancelled', updated_at = ? WHERE id = ? AND status = 'running'",
+                (now, run_id)
+            )
+            cursor.execute("""
+                UPDATE jobs SET status = 'cancelled', payload_blob = NULL, updated_at = ?
+                WHERE run_id = ? AND status = 'pending'
+            """, (now, run_id))
+            return True
+    
+    # Background jobs (see jobs.JobQueue)
+    
+    def create_job(self, kind: str, payload: dict, blob: Optional[bytes] = None, max_attempts: int = 3) -> int:
+        """
+        Persist a new pending job
+        
+        Args:
+            kind: Handler name the job is dispatched to
+            payload: JSON-serializable job arguments
+            blob: Optional binary input (e.g. uploaded PDF bytes)
+            max_attempts: Attempts before the job is marked failed
+            
+        Returns:
+            ID of the new job
+        """
+        now = time.time()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                INSERT INTO jobs
+                (kind, status, payload_json, payload_blob, max_attempts, run_after, created_at, updated_at)
+                VALUES (?, 'pending', ?, ?, ?, ?, ?, ?)
+            """, (kind, json.dumps(payload), blob, max_attempts, now, now, now))
+            
+            return cursor.lastrowid
+    
+    def create_jobs(self, kind: str, payloads: List[dict], max_attempts: int = 3, run_id: Optional[int] = None) -> int:
+        """
+        Persist many pending jobs of one kind in a single transaction
+        
+        Args:
+            kind: Handler name the jobs are dispatched to
+            payloads: JSON-serializable arguments, one per job
+            max_attempts: Attempts before a job is marked failed
+            run_id: Re-scoring run the jobs belong to, if any
+            
+        Returns:
+            Number of jobs created
+        """
+        now = time.time()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.executemany("""
+                INSERT INTO jobs
+                (kind, status, payload_json, max_attempts, run_after, created_at, updated_at, run_id)
+                VALUES (?, 'pending', ?, ?, ?, ?, ?, ?)
+            """, [(kind, json.dumps(payload), max_attempts, now, now, now, run_id) for payload in payloads])
+            
+            return cursor.rowcount
+    
+    def claim_job(self, lease_seconds: float) -> Optional[Dict]:
+        """
+        Atomically claim the next runnable job
+        
+        Picks the oldest pending job that is due, or a running job whose lease
+        expired (its worker died), marks it running and leases it. Expired jobs
+        that already used up max_attempts (e.g. they crash their worker every
+        time) are failed instead of reclaimed.
+        
+        Returns:
+            {"id", "kind", "payload", "blob", "attempts", "max_attempts"} or None
+        """
+        now = time.time()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                UPDATE jobs
+                SET status = 'failed',
+                    error = 'Lease expired on the last attempt (the worker stopped or crashed)',
+                    payload_blob = NULL, lease_expires_at = NULL, updated_at = ?
+                WHERE status = 'running' AND lease_expires_at < ? AND attempts >= max_attempts
+            """, (now, now))
+            cursor.execute("""
+                UPDATE jobs
+                SET status = 'running', attempts = attempts + 1,
+                    lease_expires_at = ?, updated_at = ?
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE (status = 'pending' AND run_after <= ?)
+                       OR (status = 'running' AND lease_expires_at < ? AND attempts < max_attempts)
+                    ORDER BY id
+                    LIMIT 1
+                )
+                RETURNING id, kind, payload_json, payload_blob, attempts, max_attempts
+            """, (now + lease_seconds, now, now, now))
+            row = cursor.fetchone()
+        
+        if not row:
+            return None
+        
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "payload": json.loads(row[2]),
+            "blob": row[3],
+            "attempts": row[4],
+            "max_attempts": row[5]
+        }
+    
+    def renew_job_lease(self, job_id: int, attempt: int, lease_seconds: float) -> bool:
+        """
+        Extend the lease of a running job (worker heartbeat)
+        
+        Args:
+            job_id: Job ID
+            attempt: The attempts count the job was claimed with; a reclaimed
+                job has a higher one, so its old worker cannot renew it
+            lease_seconds: New lease length from now
+        
+        Returns:
+            False if the lease was lost (the job was reclaimed or is no longer running)
+        """
+        now = time.time()
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires_at = ?, updated_at = ? WHERE id = ? AND status = 'running' AND attempts = ?",
+                (now + lease_seconds, now, job_id, attempt)
+            )
+            return cursor.rowcount > 0
+    
+    def complete_job(self, job_id: int, result: dict):
+        """Mark a job succeeded and drop its binary input"""
+        with self.connection() as conn:
+            conn.execute("""
+                UPDATE jobs
+                SET status = 'succeeded', result_json = ?, error = NULL,
+                    payload_blob = NULL, lease_expires_at = NULL, updated_at = ?
+                WHERE id = ?
+            """, (json.dumps(result), time.time(), job_id))
+    
+    def fail_job(self, job_id: int, error: str, retry_delay: Optional[float] = None):
+        """
+        Record a failed attempt
+        
+        Args:
+            job_id: Job ID
+            error: Error message
+            retry_delay: Seconds until the next attempt, or None to fail permanently.
+                Jobs that used up max_attempts fail permanently regardless.
+        """
+        now = time.time()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,))
+            row = cursor.fetchone()
+            if not row:
+                return
+            
+            if retry_delay is not None and row[0] < row[1]:
+                # Jobs of a run cancelled meanwhile are not retried
+                cursor.execute("""
+                    UPDATE jobs
+                    SET status = CASE
+                            WHEN run_id IN (SELECT id FROM rescore_runs WHERE status = 'cancelled') THEN 'cancelled'
+                            ELSE 'pending'
+                        END,
+                        error = ?, run_after = ?, lease_expires_at = NULL, updated_at = ?
+                    WHERE id = ?
+                """, (error, now + retry_delay, now, job_id))
+            else:
+                cursor.execute("""
+                    UPDATE jobs
+                    SET status = 'failed', error = ?, payload_blob = NULL,
+                        lease_expires_at = NULL, updated_at = ?
+                    WHERE id = ?
+                """, (error, now, job_id))
+    
+    def get_job(self, job_id: int) -> Optional[Dict]:
+        """Get a job's status and result (without its binary input)"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT id, kind, status, payload_json, result_json, error,
+                       attempts, max_attempts, created_at, updated_at
+                FROM jobs
+                WHERE id = ?
+            """, (job_id,))
+            row = cursor.fetchone()
+        
+        if not row:
+            return None
+        
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "payload": json.loads(row[3]),
+            "result": json.loads(row[4]) if row[4] else None,
+            "error": row[5],
+            "attempts": row[6],
+            "max_attempts": row[7],
+            "created_at": row[8],
+            "updated_at": row[9]
+        }
+    
+    def count_active_jobs(self) -> Dict[str, int]:
+        """Number of pending and running jobs (the queue depth), by status"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT status, COUNT(*) FROM jobs
+                WHERE status IN ('pending', 'running')
+                GROUP BY status
+            """)
+            counts = dict(cursor.fetchall())
+        
+        return {status: counts.get(status, 0) for status in ("pending", "running")}
+
+    # Chat sessions
+    
+    def create_chat_session(self, messages: Optional[List[Dict]] = None) -> str:
+        """
+        Create a chat session, optionally seeded with earlier messages
+        
+        Returns:
+            The new session ID
+        """
+        session_id = uuid.uuid4().hex
+        now = time.time()
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT INTO chat_sessions (id, created_at, updated_at) VALUES (?, ?, ?)",
+                (session_id, now, now)
+            )
+            if messages:
+                conn.executemany(
+                    "INSERT INTO chat_messages (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                    [(session_id, msg["role"], msg["content"], now) for msg in messages]
+                )
+        return session_id
+    
+    def get_chat_session(self, session_id: str, ttl_seconds: float) -> Optional[Dict]:
+        """
+        Get a session's rolling summary and the messages not yet folded into it
+        
+        Returns:
+            {"id", "summary", "summarized_through", "messages": [{"id", "role", "content"}]},
+            or None if the session does not exist or expired
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT summary, summarized_through FROM chat_sessions
+                WHERE id = ? AND updated_at >= ?
+            """, (session_id, time.time() - ttl_seconds))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            
+            cursor.execute("""
+                SELECT id, role, content FROM chat_messages
+                WHERE session_id = ? AND id > ?
+                ORDER BY id
+            """, (session_id, row[1]))
+            messages = [{"id": m[0], "role": m[1], "content": m[2]} for m in cursor.fetchall()]
+        
+        return {"id": session_id, "summary": row[0], "summarized_through": row[1], "messages": messages}
+    
+    def append_chat_messages(self, session_id: str, messages: List[Dict]):
+        """Append messages ({"role", "content"}) to a session and refresh its TTL"""
+        now = time.time()
+        with self.connection() as conn:
+            conn.executemany(
+                "INSERT INTO chat_messages (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                [(session_id, msg["role"], msg["content"], now) for msg in messages]
+            )
+            conn.execute("UPDATE chat_sessions SET updated_at = ? WHERE id = ?", (now, session_id))
+    
+    def update_chat_summary(self, session_id: str, summary: str, previous_through: int, summarized_through: int) -> bool:
+        """
+        Replace a session's rolling summary and drop the messages it now covers
+        
+        Only applies if nobody else advanced the summary since previous_through
+        was read (another worker may summarize the same session).
+        
+        Returns:
+            True if the summary was updated
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                UPDATE chat_sessions SET summary = ?, summarized_through = ?
+                WHERE id = ? AND summarized_through = ?
+            """, (summary, summarized_through, session_id, previous_through))
+            if cursor.rowcount == 0:
+                return False
+            
+            cursor.execute(
+                "DELETE FROM chat_messages WHERE session_id = ? AND id <= ?",
+                (session_id, summarized_through)
+            )
+            return True
+    
+    def delete_chat_session(self, session_id: str) -> bool:
+        """Delete a chat session and its messages"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("DELETE FROM chat_messages WHERE session_id = ?", (session_id,))
+            cursor.execute("DELETE FROM chat_sessions WHERE id = ?", (session_id,))
+            return cursor.rowcount > 0
+    
+    def delete_expired_chat_sessions(self, ttl_seconds: float) -> int:
+        """Delete sessions idle for longer than ttl_seconds; returns how many were removed"""
+        cutoff = time.time() - ttl_seconds
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                DELETE FROM chat_messages WHERE session_id IN (
+                    SELECT id FROM chat_sessions WHERE updated_at < ?
+                )
+            """, (cutoff,))
+            cursor.execute("DELETE FROM chat_sessions WHERE updated_at < ?", (cutoff,))
+            return cursor.rowcount
+
+
+class AsyncDatabase:
+    """
+    Async facade over Database for FastAPI handlers
+    
+    Every call runs on a small dedicated thread pool (each thread keeps its own
+    pooled connection), so SQLite I/O never blocks the event loop.
+    """
+    
+    def __init__(self, database: Database, max_workers: int = 4):
+        self.database = database
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+    
+    async def run(self, func, *args, **kwargs):
+        """
+        Run a blocking database function on the DB threads and await its result
+        
+        The call's latency (including time queued behind other calls) is
+        recorded per function name in the metrics.
+        """
+        loop = asyncio.get_running_loop()
+        method = getattr(func, "__qualname__", type(func).__name__)
+        db_calls_pending.inc()
+        try:
+            with db_call_seconds.time(method=method):
+                return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+        finally:
+            db_calls_pending.dec()
+    
+    async def add_candidate(
+        self,
+        resume_text: str,
+        analysis: dict,
+        usage: Optional[Dict] = None,
+        jd_id: Optional[int] = None,
+        version_of: Optional[int] = None
+    ) -> int:
+        return await self.run(self.database.add_candidate, resume_text, analysis, usage, jd_id, version_of)
+    
+    async def get_all_candidates(self) -> List[Dict]:
+        return await self.run(self.database.get_all_candidates)
+    
+    async def get_candidates_page(self, **kwargs) -> Dict:
+        return await self.run(self.database.get_candidates_page, **kwargs)
+    
+    async def get_candidate_by_id(self, candidate_id: int, fields: Optional[List[str]] = None) -> Optional[Dict]:
+        return await self.run(self.database.get_candidate_by_id, candidate_id, fields)
+    
+    async def candidate_exists(self, candidate_id: int) -> bool:
+        return await self.run(self.database.candidate_exists, candidate_id)
+    
+    async def get_all_resumes_text(self) -> List[Dict[str, str]]:
+        return await self.run(self.database.get_all_resumes_text)
+    
+    async def search_chunks(self, match_query: str, limit: int = 8, candidate_id: Optional[int] = None) -> List[Dict]:
+        return await self.run(self.database.search_chunks, match_query, limit, candidate_id)
+    
+    async def search_candidates(self, match_query: str, limit: int = 20, cursor: Optional[str] = None) -> Dict:
+        return await self.run(self.database.search_candidates, match_query, limit, cursor)
+    
+    async def delete_candidate(self, candidate_id: int) -> bool:
+        return await self.run(self.database.delete_candidate, candidate_id)
+    
+    def close(self):
+        """Stop the DB threads and close their connections"""
+        self._executor.shutdown(wait=True)
+        self.database.close()
+
+
+def _normalized_hash(text: str) -> str:
+    """SHA-256 of text with whitespace collapsed"""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def analysis_cache_key(resume_text: str, job_description: str, model: str, prompt_version: str) -> str:
+    """
+    Build the content-addressed cache key for an analysis
+    
+    Args:
+        resume_text: Extracted resume text
+        job_description: Job description the resume is analyzed against
+        model: Model or Azure deployment name
+        prompt_version: Hash of the agent's system prompt
+        
+    Returns:
+        Hex digest identifying the (resume, JD, model, prompt) combination
+    """
+    parts = [_normalized_hash(resume_text), _normalized_hash(job_description), model, prompt_version]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Persistent cache of agent analyses, stored in the same SQLite database as candidates
+    
+    Entries expire after ttl_seconds; when more than max_entries are stored the
+    least recently used ones are evicted.
+    """
+    
+    def __init__(self, db: Database, max_entries: int = 10000, ttl_seconds: float = 30 * 24 * 3600):
+        self.db = db
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, cache_key: str) -> Optional[Dict]:
+        """
+        Look up a cached analysis
+        
+        Returns:
+            {"analysis": dict, "candidate_id": int | None}, or None on a miss
+        """
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            now = time.time()
+            
+            cursor.execute("""
+                SELECT analysis_json, candidate_id, created_at
+                FROM analysis_cache
+                WHERE cache_key = ?
+            """, (cache_key,))
+            row = cursor.fetchone()
+            
+            if row and now - row[2] > self.ttl_seconds:
+                cursor.execute("DELETE FROM analysis_cache WHERE cache_key = ?", (cache_key,))
+                row = None
+            
+            if not row:
+                self.misses += 1
+                return None
+            
+            cursor.execute("""
+                UPDATE analysis_cache
+                SET last_accessed = ?, hit_count = hit_count + 1
+                WHERE cache_key = ?
+            """, (now, cache_key))
+            
+            self.hits += 1
+            return {"analysis": json.loads(row[0]), "candidate_id": row[1]}
+    
+    def put(self, cache_key: str, analysis: dict, candidate_id: Optional[int] = None):
+        """Store an analysis (and the candidate it was saved as), evicting LRU entries if full"""
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            now = time.time()
+            
+            cursor.execute("""
+                INSERT OR REPLACE INTO analysis_cache
+                (cache_key, analysis_json, candidate_id, created_at, last_accessed, hit_count)
+                VALUES (?, ?, ?, ?, ?, 0)
+            """, (cache_key, json.dumps(analysis), candidate_id, now, now))
+            
+            cursor.execute("SELECT COUNT(*) FROM analysis_cache")
+            excess = cursor.fetchone()[0] - self.max_entries
+            if excess > 0:
+                cursor.execute("""
+                    DELETE FROM analysis_cache WHERE cache_key IN (
+                        SELECT cache_key FROM analysis_cache
+                        ORDER BY last_accessed ASC
+                        LIMIT ?
+                    )
+                """, (excess,))
+    
+    def set_candidate(self, cache_key: str, candidate_id: int):
+        """Point an existing cache entry at a (re-)inserted candidate"""
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                "UPDATE analysis_cache SET candidate_id = ? WHERE cache_key = ?",
+                (candidate_id, cache_key)
+            )
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process plus the persisted entry count"""
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT COUNT(*) FROM analysis_cache")
+            entries = cursor.fetchone()[0]
+        
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
 
 
 # Job Description file storage
 class JobDescriptionStorage:
-    """Manage job description persistence in a text file"""
+    """
+    Job description persistence in a text file (the pre-multi-JD storage)
+    Only read on startup, to import it into the job_descriptions table
+    """
     
     def __init__(self, file_path: str = "data/job_description.txt"):
         self.file_path = Path(file_path)
@@ -0,0 +1,64 @@
+"""
+Near-duplicate resume detection
+A 64-bit SimHash of the resume's word shingles is stored per candidate and
+split into bands; two resumes within a few bits of each other share at
+least one band exactly, so an indexed band lookup finds near-duplicates
+without comparing against every stored resume
+"""
+import hashlib
+import re
+from collections import Counter
+from typing import List
+
+SIMHASH_BITS = 64
+# Signatures within SIMHASH_BANDS - 1 bits of each other always share a band
+# (pigeonhole); bands of ~11 bits keep chance collisions to ~0.3% of resumes
+SIMHASH_BANDS = 6
+SHINGLE_SIZE = 3
+
+# (shift, width) of each band: 64 bits split as evenly as possible
+_BOUNDS = [band * SIMHASH_BITS // SIMHASH_BANDS for band in range(SIMHASH_BANDS + 1)]
+_BANDS = [(start, end - start) for start, end in zip(_BOUNDS, _BOUNDS[1:])]
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Counter:
+    """Counts of overlapping lower-case word n-grams (whole text if shorter than one shingle)"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return Counter([" ".join(words)]) if words else Counter()
+    return Counter(" ".join(words[index:index + size]) for index in range(len(words) - size + 1))
+
+
+def _feature_hash(feature: str) -> int:
+    """Stable 64-bit hash of one shingle"""
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash of text, as a signed integer so it fits an SQLite INTEGER
+    
+    Resumes that differ in a few lines (a new phone number, one more job)
+    get signatures a few bits apart; unrelated resumes differ in ~32 bits.
+    """
+    totals = [0] * SIMHASH_BITS
+    for feature, weight in shingles(text).items():
+        value = _feature_hash(feature)
+        for bit in range(SIMHASH_BITS):
+            totals[bit] += weight if value >> bit & 1 else -weight
+    
+    signature = sum(1 << bit for bit, total in enumerate(totals) if total > 0)
+    return signature - (1 << SIMHASH_BITS) if signature >= 1 << (SIMHASH_BITS - 1) else signature
+
+
+def band_keys(signature: int) -> List[int]:
+    """The signature's SIMHASH_BANDS bands (10-11 bits each), for indexed lookup"""
+    unsigned = signature & ((1 << SIMHASH_BITS) - 1)
+    return [unsigned >> shift & ((1 << width) - 1) for shift, width in _BANDS]
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two signatures"""
+    return bin((a ^ b) & ((1 << SIMHASH_BITS) - 1)).count("1")
@@ -0,0 +1,166 @@
+"""
+Background job queue for long-running work (e.g. resume analysis)
+Jobs are persisted in the SQLite jobs table, so they survive restarts and
+can be picked up by any worker process sharing the database
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from database import AsyncDatabase
+
+
+class PermanentJobError(Exception):
+    """Raised by a job handler when retrying cannot help (e.g. unreadable PDF)"""
+
+
+# Handler signature: handler(payload, blob) -> result dict stored on the job
+JobHandler = Callable[[dict, Optional[bytes]], Awaitable[dict]]
+
+
+class JobQueue:
+    """
+    Pool of asyncio workers that claim jobs from the database and run them
+    
+    Each running job holds a lease that its worker renews while the handler
+    runs. If a process dies the lease expires and another worker (or the
+    restarted process) reclaims the job. Failed attempts are retried with
+    exponential backoff until the job's max_attempts is reached.
+    """
+    
+    def __init__(
+        self,
+        db: AsyncDatabase,
+        workers: int = 2,
+        max_attempts: int = 3,
+        lease_seconds: float = 60.0,
+        poll_interval: float = 1.0,
+        retry_base_delay: float = 5.0
+    ):
+        self.db = db
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retry_base_delay = retry_base_delay
+        self.handlers: Dict[str, JobHandler] = {}
+        self._tasks = []
+        self._wakeup = asyncio.Event()
+    
+    def register(self, kind: str, handler: JobHandler):
+        """Register the coroutine that runs jobs of this kind"""
+        self.handlers[kind] = handler
+    
+    async def enqueue(self, kind: str, payload: dict, blob: Optional[bytes] = None) -> int:
+        """Persist a new job and wake an idle worker; returns the job ID"""
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind: {kind}")
+        
+        job_id = await self.db.run(
+            self.db.database.create_job, kind, payload, blob, self.max_attempts
+        )
+        self._wakeup.set()
+        return job_id
+    
+    async def enqueue_many(self, kind: str, payloads: List[dict], run_id: Optional[int] = None) -> int:
+        """Persist many jobs of one kind in one transaction and wake the workers; returns how many"""
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind: {kind}")
+        
+        count = await self.db.run(
+            self.db.database.create_jobs, kind, payloads, self.max_attempts, run_id
+        )
+        self._wakeup.set()
+        return count
+    
+    async def get(self, job_id: int) -> Optional[Dict]:
+        """Get a job's status and result"""
+        return await self.db.run(self.db.database.get_job, job_id)
+    
+    def start(self):
+        """Start the worker tasks (call from the running event loop)"""
+        for index in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(index)))
+    
+    async def stop(self):
+        """Cancel the workers; jobs they were running are reclaimed once their lease expires"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    async def _worker(self, index: int):
+        """Claim and run jobs until cancelled"""
+        while True:
+            try:
+                job = await self.db.run(self.db.database.claim_job, self.lease_seconds)
+            except Exception as e:
+                print(f"Job worker {index}: failed to claim job: {e}")
+                job = None
+            
+            if job is None:
+                # Idle: sleep until something is enqueued here or the poll interval passes
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            await self._run(job)
+    
+    async def _heartbeat(self, job: dict, handler_task: asyncio.Task, lease_lost: asyncio.Event):
+        """
+        Renew a running job's lease until cancelled
+        
+        Failed renewals are logged and retried. Once the lease is lost (the job
+        was reclaimed, or no renewal got through before it expired) the handler
+        is cancelled, so the job never runs on two workers at once.
+        """
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + self.lease_seconds
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await self.db.run(
+                    self.db.database.renew_job_lease, job["id"], job["attempts"], self.lease_seconds
+                )
+            except Exception as e:
+                print(f"Job {job['id']}: failed to renew lease: {e}")
+                renewed = None
+            
+            if renewed:
+                expires_at = loop.time() + self.lease_seconds
+            elif renewed is False or loop.time() >= expires_at:
+                print(f"Job {job['id']}: lease lost, abandoning this attempt")
+                lease_lost.set()
+                handler_task.cancel()
+                return
+    
+    async def _run(self, job: dict):
+        """Run one claimed job and record its outcome"""
+        handler = self.handlers.get(job["kind"])
+        if handler is None:
+            await self.db.run(
+                self.db.database.fail_job, job["id"], f"No handler registered for job kind: {job['kind']}"
+            )
+            return
+        
+        handler_task = asyncio.create_task(handler(job["payload"], job["blob"]))
+        lease_lost = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat(job, handler_task, lease_lost))
+        try:
+            result = await handler_task
+        except asyncio.CancelledError:
+            if lease_lost.is_set() and handler_task.cancelled():
+                # Whoever holds the job now records its outcome
+                return
+            raise
+        except PermanentJobError as e:
+            await self.db.run(self.db.database.fail_job, job["id"], str(e))
+        except Exception as e:
+            retry_delay = self.retry_base_delay * (2 ** (job["attempts"] - 1))
+            await self.db.run(self.db.database.fail_job, job["id"], str(e), retry_delay)
+        else:
+            await self.db.run(self.db.database.complete_job, job["id"], result)
+        finally:
+            heartbeat.cancel()
@@ -1,10 +1,19 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
 import os
-from typing import Optional
+import io
+import re
+import json
+import time
+import asyncio
+import zipfile
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Literal, Optional
 import uvicorn
 from pathlib import Path
 from dotenv import load_dotenv
@@ -13,10 +22,32 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from agent import ResumeScreeningAgent
-from pdf_parser import extract_text_from_pdf
-from database import Database, JobDescriptionStorage
+from pdf_parser import extract_document_from_file_async, shutdown_extraction_executor
+from retrieval import build_match_query, build_search_query
+from preprocess import count_tokens, fit_to_budget, truncate_to_tokens
+from prescreen import PreScreener, select_for_analysis
+from jobs import JobQueue, PermanentJobError
+from blobstore import BlobStore
+from database import Database, AsyncDatabase, JobDescriptionStorage, AnalysisCache, analysis_cache_key
+from ranking import RankingService
+from metrics import registry, http_request_seconds, jobs_by_status, latency_summary, PROMETHEUS_CONTENT_TYPE
 
-app = FastAPI(title="Resume Screening API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown hooks"""
+    job_queue.start()
+    session_cleanup = asyncio.create_task(evict_expired_chat_sessions())
+    blob_cleanup = asyncio.create_task(sweep_unreferenced_blobs())
+    yield
+    session_cleanup.cancel()
+    blob_cleanup.cancel()
+    await job_queue.stop()
+    shutdown_extraction_executor()
+    db.close()
+
+
+app = FastAPI(title="Resume Screening API", lifespan=lifespan)
 
 # CORS configuration for React frontend
 app.add_middleware(
@@ -25,27 +56,122 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-# Initialize database and storage
-db = Database()
+
+@app.middleware("http")
+async def time_api_requests(request: Request, call_next):
+    """Record API request latency per route template (e.g. /api/candidates/{candidate_id})"""
+    if not request.url.path.startswith("/api/"):
+        return await call_next(request)
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    http_request_seconds.observe(
+        time.perf_counter() - start,
+        route=getattr(route, "path", "unmatched"),
+        method=request.method
+    )
+    return response
+
+# Initialize database and storage (handlers await the async facade)
+db = AsyncDatabase(Database(), max_workers=int(os.getenv("DB_THREADS", "4")))
 jd_storage = JobDescriptionStorage()
 
-# Load job description from file on startup
-job_description_store = {"jd": jd_storage.load()}
+# In-memory score matrices for weighted ranking
+ranking = RankingService(db.database)
+
+# Original uploaded PDFs, content-addressed on disk
+blob_store = BlobStore(os.getenv("BLOB_STORE_DIR", "data/blobs"))
+# Unreferenced blobs older than the grace period (e.g. from jobs that failed for
+# good) are swept every BLOB_GC_INTERVAL_SECONDS
+BLOB_GC_INTERVAL_SECONDS = float(os.getenv("BLOB_GC_INTERVAL_SECONDS", "3600"))
+BLOB_GC_GRACE_SECONDS = float(os.getenv("BLOB_GC_GRACE_SECONDS", "3600"))
+
+analysis_cache = AnalysisCache(
+    db.database,
+    max_entries=int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "10000")),
+    ttl_seconds=float(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+)
+
+# Background analysis jobs, persisted in the jobs table
+job_queue = JobQueue(
+    db,
+    workers=int(os.getenv("JOB_WORKERS", "8")),
+    max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+    lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", "60"))
+)
+
+def load_active_job_description() -> dict:
+    """Load the active job description, importing the old single-file one on first run"""
+    active = db.database.get_active_job_description()
+    if active is None and jd_storage.exists():
+        db.database.import_legacy_job_description(jd_storage.load())
+        active = db.database.get_active_job_description()
+    return {"jd": active["content"], "id": active["id"]} if active else {"jd": "", "id": None}
+
+
+# Active job description (the default for uploads), cached in memory
+job_description_store = load_active_job_description()
 
 # Initialize the agent
 agent = ResumeScreeningAgent()
 
-# Chat session state: track when we last summarized to avoid re-summarizing on every request
-# Key: session_id (we'll use a hash of first few messages), Value: last_summarized_count
-chat_summary_tracker = {}
+# Cap on concurrent analysis LLM calls across all requests (tune to the Azure/OpenAI quota)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "500"))
+llm_semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+# Re-scoring stored candidates against a job description runs as background jobs;
+# this caps how many of them call the LLM at once, leaving room for uploads
+RESCORE_CONCURRENCY = int(os.getenv("RESCORE_CONCURRENCY", "4"))
+RESCORE_ON_JD_CHANGE = os.getenv("RESCORE_ON_JD_CHANGE", "true").lower() in ("1", "true", "yes")
+rescore_semaphore = asyncio.Semaphore(RESCORE_CONCURRENCY)
+
+# Uploads of a resume already on file reuse its candidate and, if scored against
+# the same job description, its analysis instead of calling the LLM. Resumes within
+# this many SimHash bits of a stored one are analyzed and stored as a new candidate
+# linked to it through version_of (-1 = don't link near-duplicates)
+NEAR_DUPLICATE_MAX_DISTANCE = int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", "5"))
+
+# Local pre-screening: only batch resumes that pass are sent to the LLM (0 / unset = no limit)
+PRESCREEN_MIN_SCORE = float(os.getenv("PRESCREEN_MIN_SCORE", "0"))
+PRESCREEN_TOP_N = int(os.getenv("PRESCREEN_TOP_N", "0")) or None
+
+# Chat retrieval: how many resume chunks each turn may pull into the prompt
+CHAT_CONTEXT_TOP_K = int(os.getenv("CHAT_CONTEXT_TOP_K", "8"))
+CHAT_PINNED_CHUNKS = int(os.getenv("CHAT_PINNED_CHUNKS", "4"))
+# Token budgets for the resume excerpts in one chat prompt, and for a pinned
+# candidate's resume when none of its chunks match the question
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "3000"))
+CHAT_PINNED_TOKEN_BUDGET = int(os.getenv("CHAT_PINNED_TOKEN_BUDGET", "800"))
+
+# Chat sessions: rolling summary + recent window stored server-side
+CHAT_RECENT_MESSAGES = int(os.getenv("CHAT_RECENT_MESSAGES", "10"))
+CHAT_SUMMARY_BATCH = int(os.getenv("CHAT_SUMMARY_BATCH", "10"))
+CHAT_SESSION_TTL_SECONDS = float(os.getenv("CHAT_SESSION_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Sessions with a summarization in flight in this process, and the tasks doing it
+summarizing_sessions = set()
+background_tasks = set()
 
 
 class JobDescriptionUpdate(BaseModel):
     job_description: str
 
 
+class JobDescriptionCreate(BaseModel):
+    job_description: str
+    title: Optional[str] = None
+    activate: bool = False
+
+
+class ScoreCandidatesRequest(BaseModel):
+    # Restrict scoring to these candidates (default: every candidate)
+    candidate_ids: Optional[list[int]] = None
+
+
 class AnalysisResponse(BaseModel):
     candidate_name: Optional[str]
     overall_match_score: float
@@ -54,7 +180,73 @@ class AnalysisResponse(BaseModel):
     gaps: list[str]
     recommendations: str
     detailed_analysis: dict
+    scores: Optional[dict] = None
     candidate_id: Optional[int] = None
+    cached: bool = False
+    usage: Optional[dict] = None
+    duplicate_of: Optional[dict] = None
+
+
+class RankingWeights(BaseModel):
+    technical_skills: float = Field(1.0, ge=0)
+    experience_level: float = Field(1.0, ge=0)
+    education_fit: float = Field(1.0, ge=0)
+    communication: float = Field(1.0, ge=0)
+    overall_match_score: float = Field(0.0, ge=0)
+
+
+class RankingRequest(BaseModel):
+    weights: RankingWeights = RankingWeights()
+    # Rank the analyses against this job description (default: each candidate's primary analysis)
+    jd_id: Optional[int] = None
+    top_k: int = Field(50, ge=1, le=1000)
+    # Also report where these candidates rank
+    candidate_ids: Optional[list[int]] = None
+
+
+class JobStatusResponse(BaseModel):
+    job_id: int
+    kind: str
+    status: str
+    attempts: int
+    max_attempts: int
+    error: Optional[str] = None
+    result: Optional[dict] = None
+    created_at: float
+    updated_at: float
+
+
+class PrescreenResult(BaseModel):
+    score: float
+    bm25: float
+    skill_coverage: float
+    matched_skills: list[str]
+
+
+class BatchItemResult(BaseModel):
+    filename: str
+    analysis: AnalysisResponse
+    prescreen: Optional[PrescreenResult] = None
+
+
+class BatchItemSkipped(BaseModel):
+    filename: str
+    prescreen: PrescreenResult
+
+
+class BatchItemFailure(BaseModel):
+    filename: str
+    error: str
+
+
+class BatchAnalysisResponse(BaseModel):
+    total: int
+    succeeded: int
+    skipped: int = 0
+    failed: int
+    results: list[BatchItemResult]
+    skipped_items: list[BatchItemSkipped] = []
+    failures: list[BatchItemFailure]
 
 
 @app.post("/api/job-description")
@@ -63,20 +255,191 @@ async def update_job_description(jd: JobDescriptionUpdate):
     if not jd.job_description.strip():
         raise HTTPException(status_code=400, detail="Job description cannot be empty")
     
-    # Save to both memory and file
-    job_description_store["jd"] = jd.job_description
-    jd_storage.save(jd.job_description)
+    # Store it (or reuse the row with the same text) and make it the active one
+    jd_id = await db.run(db.database.create_job_description, jd.job_description, None, True)
+    job_description_store.update(jd=jd.job_description, id=jd_id)
     
     return {
         "message": "Job description updated successfully",
-        "job_description": jd.job_description
+        "job_description": jd.job_description,
+        "jd_id": jd_id,
+        "rescore_run": await on_job_description_activated(jd_id)
     }
 
 
 @app.get("/api/job-description")
 async def get_job_description():
     """Retrieve the current job description"""
-    return {"job_description": job_description_store.get("jd", "")}
+    return {"job_description": job_description_store.get("jd", ""), "jd_id": job_description_store.get("id")}
+
+
+@app.post("/api/job-descriptions", status_code=201)
+async def create_job_description(jd: JobDescriptionCreate):
+    """
+    Add a job description (requisition); set `activate` to make it the default for uploads
+    Posting text that is already stored returns the existing job description.
+    """
+    if not jd.job_description.strip():
+        raise HTTPException(status_code=400, detail="Job description cannot be empty")
+    
+    jd_id = await db.run(db.database.create_job_description, jd.job_description, jd.title, jd.activate)
+    created = await db.run(db.database.get_job_description, jd_id)
+    if jd.activate:
+        job_description_store.update(jd=jd.job_description, id=jd_id)
+        created["rescore_run"] = await on_job_description_activated(jd_id)
+    return created
+
+
+@app.get("/api/job-descriptions")
+async def list_job_descriptions():
+    """List job descriptions with how many candidates have been scored against each"""
+    return await db.run(db.database.list_job_descriptions)
+
+
+@app.get("/api/job-descriptions/{jd_id}")
+async def get_job_description_detail(jd_id: int):
+    """Get one job description"""
+    jd = await db.run(db.database.get_job_description, jd_id)
+    if not jd:
+        raise HTTPException(status_code=404, detail="Job description not found")
+    return jd
+
+
+@app.post("/api/job-descriptions/{jd_id}/activate")
+async def activate_job_description(jd_id: int):
+    """Make a job description the active one (used by uploads and chat)"""
+    if not await db.run(db.database.activate_job_description, jd_id):
+        raise HTTPException(status_code=404, detail="Job description not found")
+    
+    jd = await db.run(db.database.get_job_description, jd_id)
+    job_description_store.update(jd=jd["content"], id=jd_id)
+    jd["rescore_run"] = await on_job_description_activated(jd_id)
+    return jd
+
+
+@app.delete("/api/job-descriptions/{jd_id}")
+async def delete_job_description(jd_id: int):
+    """Delete an inactive job description and the analyses made against it"""
+    if jd_id == job_description_store.get("id"):
+        raise HTTPException(status_code=400, detail="Cannot delete the active job description")
+    if not await db.run(db.database.delete_job_description, jd_id):
+        raise HTTPException(status_code=404, detail="Job description not found")
+    return {"message": "Job description deleted successfully"}
+
+
+async def start_rescore_run(jd_id: int, candidate_ids: Optional[list[int]] = None, trigger: str = "manual") -> dict:
+    """
+    Queue a re-scoring run: one score_candidate job per stored candidate not yet
+    scored against this job description (candidates already scored are skipped)
+    
+    Returns:
+        The run with its progress (see Database.get_rescore_run)
+    """
+    unscored = await db.run(db.database.get_unscored_candidate_ids, jd_id, candidate_ids)
+    run_id = await db.run(db.database.create_rescore_run, jd_id, len(unscored), trigger)
+    if unscored:
+        await job_queue.enqueue_many(
+            "score_candidate",
+            [{"candidate_id": candidate_id, "jd_id": jd_id} for candidate_id in unscored],
+            run_id
+        )
+    return await db.run(db.database.get_rescore_run, run_id)
+
+
+async def on_job_description_activated(jd_id: int) -> Optional[dict]:
+    """
+    React to a change of the active job description
+    
+    Candidates already scored against the new job description show that
+    stored analysis again. Re-scoring runs started for previously active job
+    descriptions are cancelled, then (unless RESCORE_ON_JD_CHANGE is off) the
+    other stored candidates are scored against the new one. An unfinished run
+    for the same job description is reused rather than duplicated.
+    
+    Returns:
+        The re-scoring run for jd_id, or None if re-scoring is disabled
+    """
+    await db.run(db.database.promote_stored_analyses, jd_id)
+    
+    current = None
+    for run in await db.run(db.database.list_rescore_runs):
+        if run["status"] != "running" or run["trigger"] != "jd_change":
+            continue
+        if run["jd_id"] == jd_id:
+            current = current or run
+        else:
+            await db.run(db.database.cancel_rescore_run, run["run_id"])
+    
+    if not RESCORE_ON_JD_CHANGE:
+        return None
+    return current or await start_rescore_run(jd_id, trigger="jd_change")
+
+
+@app.post("/api/job-descriptions/{jd_id}/score-candidates", status_code=202)
+async def score_candidates(jd_id: int, request: Optional[ScoreCandidatesRequest] = None):
+    """
+    Score the existing candidate pool against a job description in the background
+    Uses the stored resume text (no re-upload or re-extraction) and starts a
+    re-scoring run of "score_candidate" jobs for candidates not yet scored
+    against this job description. Track it with GET /api/rescore-runs/{run_id};
+    results land in the score matrix (GET /api/score-matrix).
+    """
+    if not await db.run(db.database.get_job_description, jd_id):
+        raise HTTPException(status_code=404, detail="Job description not found")
+    
+    candidate_ids = request.candidate_ids if request else None
+    return await start_rescore_run(jd_id, candidate_ids)
+
+
+@app.get("/api/rescore-runs")
+async def list_rescore_runs(limit: int = Query(20, ge=1, le=100)):
+    """Most recent re-scoring runs with their progress"""
+    return await db.run(db.database.list_rescore_runs, limit)
+
+
+@app.get("/api/rescore-runs/{run_id}")
+async def get_rescore_run(run_id: int):
+    """Progress of a re-scoring run (succeeded/failed/cancelled/pending/running counts)"""
+    run = await db.run(db.database.get_rescore_run, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Re-scoring run not found")
+    return run
+
+
+@app.post("/api/rescore-runs/{run_id}/cancel")
+async def cancel_rescore_run(run_id: int):
+    """Cancel a re-scoring run; queued candidates are dropped, ones in progress finish"""
+    if not await db.run(db.database.cancel_rescore_run, run_id):
+        raise HTTPException(status_code=404, detail="Re-scoring run not found")
+    return await db.run(db.database.get_rescore_run, run_id)
+
+
+@app.get("/api/score-matrix")
+async def get_score_matrix(jd_ids: Optional[list[int]] = Query(None)):
+    """Candidate x job description match scores (all job descriptions unless jd_ids is given)"""
+    return await db.run(db.database.get_score_matrix, jd_ids)
+
+
+@app.post("/api/rankings")
+async def rank_candidates(request: RankingRequest):
+    """
+    Rank the candidate pool by a weighted mean of the per-dimension scores
+    Returns the top_k candidates with their composite score, rank and
+    percentile in the pool. The pool's score matrix stays in memory between
+    requests, so trying new weights does not touch the database.
+    """
+    if request.jd_id is not None and not await db.run(db.database.get_job_description, request.jd_id):
+        raise HTTPException(status_code=404, detail="Job description not found")
+    try:
+        return await db.run(
+            ranking.rank,
+            request.weights.model_dump(),
+            request.top_k,
+            request.jd_id,
+            request.candidate_ids
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/api/analyze-resume", response_model=AnalysisResponse)
@@ -99,12 +462,14 @@ async def analyze_resume(file: UploadFile = File(...)):
             detail="Only PDF files are supported"
         )
     
+    pdf_digest = None
     try:
-        # Read PDF content
-        pdf_content = await file.read()
+        # Spool the upload into the blob store (chunked, never whole in memory),
+        # pinned until the candidate refers to it
+        pdf_digest, _ = await blob_store.save_stream_async(file.file, pin=True)
         
-        # Extract text from PDF
-        resume_text = extract_text_from_pdf(pdf_content)
+        # Extract text from the stored PDF (off the event loop)
+        resume_text, _ = await extract_document_from_file_async(blob_store.path(pdf_digest))
         
         if not resume_text.strip():
             raise HTTPException(
@@ -112,23 +477,515 @@ async def analyze_resume(file: UploadFile = File(...)):
                 detail="Could not extract text from PDF. Please ensure the PDF contains readable text."
             )
         
-        # Analyze resume using the agent
-        analysis = await agent.analyze_resume(
-            resume_text=resume_text,
-            job_description=job_description_store["jd"]
+        # Analyze resume using the agent (or the cache) and store the candidate
+        return await analyze_and_store(
+            resume_text, job_description_store["jd"], job_description_store["id"], pdf_digest
         )
-        
-        # Store candidate in database
-        candidate_id = db.add_candidate(resume_text, analysis)
-        analysis["candidate_id"] = candidate_id
-        
-        return analysis
     
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error processing resume: {str(e)}"
         )
+    finally:
+        if pdf_digest:
+            await release_pdf(pdf_digest)
+
+
+async def sweep_unreferenced_blobs():
+    """Periodically remove stored PDFs no candidate or queued job refers to"""
+    while True:
+        await asyncio.sleep(BLOB_GC_INTERVAL_SECONDS)
+        try:
+            removed = await asyncio.get_running_loop().run_in_executor(
+                None, blob_store.sweep, db.database.pdf_in_use, BLOB_GC_GRACE_SECONDS
+            )
+            if removed:
+                print(f"Removed {removed} unreferenced PDFs from the blob store")
+        except Exception as e:
+            print(f"Blob store cleanup failed: {e}")
+
+
+async def release_pdf(pdf_digest: str) -> bool:
+    """
+    Unpin an uploaded PDF, removing it from the blob store if no candidate or
+    queued job refers to it (e.g. its extraction or analysis failed)
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        None, blob_store.release, pdf_digest, db.database.pdf_in_use
+    )
+
+
+async def record_candidate(resume_text: str, analysis: dict, jd_id: Optional[int], usage: Optional[dict] = None) -> int:
+    """
+    Save an analysis for the candidate with this resume, creating the candidate if the resume is new
+    
+    A resume already on file (e.g. uploaded for another job description) keeps
+    its candidate row; the new analysis becomes its primary one. A near-duplicate
+    (an updated version, or another person's resume on the same template) is
+    stored as its own candidate, linked to the closest one through version_of,
+    so the stored text, search index and chat context match its analysis.
+    """
+    duplicate = await db.run(db.database.find_duplicate_candidate, resume_text, NEAR_DUPLICATE_MAX_DISTANCE)
+    if duplicate is None or not duplicate["exact"]:
+        version_of = duplicate["candidate_id"] if duplicate else None
+        return await db.add_candidate(resume_text, analysis, usage, jd_id, version_of)
+    
+    candidate_id = duplicate["candidate_id"]
+    
+    if jd_id is None or not await db.run(db.database.save_candidate_analysis, candidate_id, jd_id, analysis, usage, True):
+        return await db.add_candidate(resume_text, analysis, usage, None)
+    return candidate_id
+
+
+async def get_cached_analysis(cache_key: str, resume_text: str, jd_id: Optional[int] = None) -> Optional[dict]:
+    """
+    Return the cached analysis for cache_key (with candidate_id set), or None
+    
+    Reuses the candidate the analysis was saved as when it still exists, so a
+    cache hit does not insert a duplicate row.
+    """
+    cached = await db.run(analysis_cache.get, cache_key)
+    if not cached:
+        return None
+    
+    analysis = cached["analysis"]
+    candidate_id = cached["candidate_id"]
+    if candidate_id is None or not await db.candidate_exists(candidate_id):
+        candidate_id = await record_candidate(resume_text, analysis, jd_id)
+        await db.run(analysis_cache.set_candidate, cache_key, candidate_id)
+    analysis["candidate_id"] = candidate_id
+    analysis["cached"] = True
+    return analysis
+
+
+async def get_duplicate_analysis(cache_key: str, resume_text: str, jd_id: Optional[int]) -> Optional[dict]:
+    """
+    Return the analysis of an already stored copy of this resume, or None
+    
+    Catches re-uploads the analysis cache misses (a re-exported PDF with
+    different whitespace, an evicted cache entry): if the candidate with the
+    same text was already scored against this job description, that analysis
+    is reused and cached under the new resume's key. Near-duplicates are not
+    reused, since their text (and possibly their person) differs.
+    """
+    if jd_id is None:
+        return None
+    
+    duplicate = await db.run(db.database.find_duplicate_candidate, resume_text, -1)
+    if duplicate is None:
+        return None
+    
+    candidate_id = duplicate["candidate_id"]
+    analysis = await db.run(db.database.get_candidate_analysis, candidate_id, jd_id)
+    if analysis is None:
+        return None
+    
+    await db.run(analysis_cache.put, cache_key, analysis, candidate_id)
+    analysis["candidate_id"] = candidate_id
+    analysis["cached"] = True
+    analysis["duplicate_of"] = duplicate
+    return analysis
+
+
+async def store_analysis(
+    cache_key: str,
+    resume_text: str,
+    analysis: dict,
+    usage: Optional[dict] = None,
+    jd_id: Optional[int] = None
+) -> dict:
+    """Store a fresh analysis (and its token usage) for the resume's candidate and cache it"""
+    candidate_id = await record_candidate(resume_text, analysis, jd_id, usage)
+    await db.run(analysis_cache.put, cache_key, analysis, candidate_id)
+    analysis["candidate_id"] = candidate_id
+    analysis["usage"] = usage
+    return analysis
+
+
+async def analyze_and_store(
+    resume_text: str,
+    job_description: str,
+    jd_id: Optional[int] = None,
+    pdf_digest: Optional[str] = None
+) -> dict:
+    """
+    Analyze extracted resume text and store the candidate, reusing cached analyses
+    
+    A cache hit, or a duplicate of a resume already scored against this job
+    description, returns the stored analysis without calling the LLM.
+    pdf_digest (the uploaded file in the blob store) is recorded on the candidate.
+    """
+    cache_key = analysis_cache_key(resume_text, job_description, agent.model, agent.prompt_version)
+    analysis = (
+        await get_cached_analysis(cache_key, resume_text, jd_id)
+        or await get_duplicate_analysis(cache_key, resume_text, jd_id)
+    )
+    
+    if not analysis:
+        async with llm_semaphore:
+            analysis, usage = await agent.analyze_resume_with_usage(
+                resume_text=resume_text,
+                job_description=job_description
+            )
+        analysis = await store_analysis(cache_key, resume_text, analysis, usage, jd_id)
+    
+    if pdf_digest:
+        await db.run(db.database.set_candidate_pdf, analysis["candidate_id"], pdf_digest)
+    return analysis
+
+
+@app.post("/api/analyze-resume/stream")
+async def analyze_resume_stream(file: UploadFile = File(...)):
+    """
+    Streaming variant of /api/analyze-resume that reports progress as NDJSON
+    
+    One JSON object per line, each with "stage" and "elapsed_ms":
+    received -> extracted (pages, characters) -> analyzing -> partial (field, value)
+    for each analysis field as the model writes it -> stored (candidate_id) ->
+    complete (analysis). Failures end the stream with an "error" event.
+    """
+    if not job_description_store.get("jd"):
+        raise HTTPException(
+            status_code=400,
+            detail="Please set a job description first"
+        )
+    
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(
+            status_code=400,
+            detail="Only PDF files are supported"
+        )
+    
+    # Spooled before streaming starts: the upload is closed once this handler returns.
+    # Pinned until the response is over, however it ends (the background task
+    # also runs when the client disconnects before or during the stream)
+    pdf_digest, size = await blob_store.save_stream_async(file.file, pin=True)
+    job_description = job_description_store["jd"]
+    jd_id = job_description_store["id"]
+    started = time.perf_counter()
+    
+    def event(stage: str, **data) -> str:
+        elapsed_ms = round((time.perf_counter() - started) * 1000)
+        return json.dumps({"stage": stage, "elapsed_ms": elapsed_ms, **data}) + "\n"
+    
+    async def progress():
+        try:
+            yield event("received", filename=file.filename, bytes=size)
+            resume_text, page_count = await extract_document_from_file_async(blob_store.path(pdf_digest))
+            if not resume_text.strip():
+                yield event("error", detail="Could not extract text from PDF. Please ensure the PDF contains readable text.")
+                return
+            yield event("extracted", pages=page_count, characters=len(resume_text))
+            
+            cache_key = analysis_cache_key(resume_text, job_description, agent.model, agent.prompt_version)
+            analysis = (
+                await get_cached_analysis(cache_key, resume_text, jd_id)
+                or await get_duplicate_analysis(cache_key, resume_text, jd_id)
+            )
+            
+            if not analysis:
+                yield event("analyzing", model=agent.model)
+                usage = None
+                async with llm_semaphore:
+                    async for kind, payload in agent.analyze_resume_stream(resume_text, job_description):
+                        if kind == "field":
+                            yield event("partial", field=payload[0], value=payload[1])
+                        elif kind == "usage":
+                            usage = payload
+                        else:
+                            analysis = payload
+                analysis = await store_analysis(cache_key, resume_text, analysis, usage, jd_id)
+            await db.run(db.database.set_candidate_pdf, analysis["candidate_id"], pdf_digest)
+            
+            yield event(
+                "stored",
+                candidate_id=analysis["candidate_id"],
+                cached=analysis.get("cached", False),
+                duplicate_of=analysis.get("duplicate_of"),
+                usage=analysis.get("usage")
+            )
+            yield event("complete", analysis=analysis)
+        except Exception as e:
+            yield event("error", detail=f"Error processing resume: {str(e)}")
+    
+    return StreamingResponse(
+        progress(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(release_pdf, pdf_digest)
+    )
+
+
+async def run_analyze_resume_job(payload: dict, pdf_content: Optional[bytes]) -> dict:
+    """Job handler: extract, analyze and store one uploaded resume"""
+    pdf_digest = payload.get("pdf_digest")
+    if pdf_digest is None and pdf_content:
+        # Queued before uploads went to the blob store: the PDF is on the job row
+        # (the payload does not refer to the new blob, so it is pinned meanwhile)
+        pdf_digest, _ = await blob_store.save_stream_async(io.BytesIO(pdf_content), pin=True)
+        try:
+            return await analyze_stored_pdf(payload, pdf_digest)
+        finally:
+            await release_pdf(pdf_digest)
+    if pdf_digest is None or not blob_store.exists(pdf_digest):
+        raise PermanentJobError("Job has no PDF content")
+    return await analyze_stored_pdf(payload, pdf_digest)
+
+
+async def analyze_stored_pdf(payload: dict, pdf_digest: str) -> dict:
+    """Extract, analyze and store a resume PDF already in the blob store"""
+    try:
+        resume_text, _ = await extract_document_from_file_async(blob_store.path(pdf_digest))
+    except TimeoutError:
+        raise
+    except Exception as e:
+        raise PermanentJobError(str(e))
+    
+    if not resume_text.strip():
+        raise PermanentJobError("Could not extract text from PDF. Please ensure the PDF contains readable text.")
+    
+    analysis = await analyze_and_store(resume_text, payload["job_description"], payload.get("jd_id"), pdf_digest)
+    return {"candidate_id": analysis["candidate_id"], "analysis": analysis}
+
+
+async def run_score_candidate_job(payload: dict, blob: Optional[bytes]) -> dict:
+    """Job handler: score one stored candidate's resume against a job description"""
+    candidate = await db.get_candidate_by_id(payload["candidate_id"], ["resume_text"])
+    jd = await db.run(db.database.get_job_description, payload["jd_id"])
+    if not candidate or not jd:
+        raise PermanentJobError("Candidate or job description no longer exists")
+    
+    # Scored since the job was queued (e.g. re-uploaded): at most show that analysis
+    if not await db.run(db.database.get_unscored_candidate_ids, jd["id"], [candidate["id"]]):
+        if jd["id"] == job_description_store.get("id"):
+            await db.run(db.database.promote_stored_analyses, jd["id"], [candidate["id"]])
+        return {"candidate_id": candidate["id"], "jd_id": jd["id"], "skipped": True}
+    
+    resume_text = candidate["resume_text"]
+    cache_key = analysis_cache_key(resume_text, jd["content"], agent.model, agent.prompt_version)
+    cached = await db.run(analysis_cache.get, cache_key)
+    usage = None
+    if cached:
+        analysis = cached["analysis"]
+    else:
+        async with rescore_semaphore, llm_semaphore:
+            analysis, usage = await agent.analyze_resume_with_usage(
+                resume_text=resume_text,
+                job_description=jd["content"]
+            )
+    
+    # Scoring against the active job description also updates what the candidate list shows
+    primary = jd["id"] == job_description_store.get("id")
+    if not await db.run(db.database.save_candidate_analysis, candidate["id"], jd["id"], analysis, usage, primary):
+        raise PermanentJobError("Candidate or job description no longer exists")
+    if not cached:
+        await db.run(analysis_cache.put, cache_key, analysis, candidate["id"])
+    
+    return {
+        "candidate_id": candidate["id"],
+        "jd_id": jd["id"],
+        "overall_match_score": analysis["overall_match_score"],
+        "cached": bool(cached)
+    }
+
+
+job_queue.register("analyze_resume", run_analyze_resume_job)
+job_queue.register("score_candidate", run_score_candidate_job)
+
+
+def job_status(job: dict) -> dict:
+    """Shape a stored job for JobStatusResponse"""
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "max_attempts": job["max_attempts"],
+        "error": job["error"],
+        "result": job["result"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"]
+    }
+
+
+@app.post("/api/jobs/analyze-resume", response_model=JobStatusResponse, status_code=202)
+async def enqueue_resume_analysis(file: UploadFile = File(...)):
+    """
+    Queue a resume for background analysis and return immediately
+    Poll GET /api/jobs/{job_id} for status; the result holds the analysis and candidate_id.
+    The job is analyzed against the job description current at upload time.
+    """
+    if not job_description_store.get("jd"):
+        raise HTTPException(
+            status_code=400,
+            detail="Please set a job description first"
+        )
+    
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(
+            status_code=400,
+            detail="Only PDF files are supported"
+        )
+    
+    # Pinned until the queued job refers to it
+    pdf_digest, _ = await blob_store.save_stream_async(file.file, pin=True)
+    try:
+        job_id = await job_queue.enqueue(
+            "analyze_resume",
+            {
+                "filename": file.filename,
+                "job_description": job_description_store["jd"],
+                "jd_id": job_description_store["id"],
+                "pdf_digest": pdf_digest
+            }
+        )
+    finally:
+        await release_pdf(pdf_digest)
+    return job_status(await job_queue.get(job_id))
+
+
+@app.get("/api/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: int):
+    """Get the status (pending, running, succeeded, failed) and result of a background job"""
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_status(job)
+
+
+def store_batch_upload(filename: str, stream) -> list[tuple[str, str]]:
+    """
+    Spool one uploaded file into the blob store as (filename, pdf_digest) pairs
+    
+    PDFs are stored as-is; ZIP archives are expanded to the PDFs they contain,
+    each streamed out of the archive. Every stored PDF is pinned; the caller
+    releases them. Blocking: run it off the event loop.
+    """
+    lower_name = filename.lower()
+    if lower_name.endswith('.pdf'):
+        return [(filename, blob_store.save_stream(stream, pin=True)[0])]
+    
+    if lower_name.endswith('.zip'):
+        documents = []
+        try:
+            with zipfile.ZipFile(stream) as archive:
+                for info in archive.infolist():
+                    # Skip directories and macOS resource forks
+                    if info.is_dir() or info.filename.startswith('__MACOSX/'):
+                        continue
+                    if info.filename.lower().endswith('.pdf'):
+                        with archive.open(info) as member:
+                            documents.append((info.filename, blob_store.save_stream(member, pin=True)[0]))
+        except BaseException:
+            # A broken archive: drop what was already stored from it
+            for _, pdf_digest in documents:
+                blob_store.release(pdf_digest, db.database.pdf_in_use)
+            raise
+        return documents
+    
+    raise ValueError("Only PDF or ZIP files are supported")
+
+
+@app.post("/api/analyze-resumes/batch", response_model=BatchAnalysisResponse)
+async def analyze_resumes_batch(
+    files: list[UploadFile] = File(...),
+    min_prescreen_score: Optional[float] = Query(None, ge=0, le=100),
+    top_n: Optional[int] = Query(None, ge=1)
+):
+    """
+    Upload and analyze many resumes (PDFs and/or ZIP archives of PDFs) in one request
+    Text extraction runs in parallel, then every resume gets a local pre-screen
+    score; only those scoring at least `min_prescreen_score` (and, if `top_n` is
+    given, only the best `top_n` of them) go to the LLM, with at most
+    BATCH_CONCURRENCY requests in flight. Both limits default to the
+    PRESCREEN_MIN_SCORE / PRESCREEN_TOP_N settings. Returns per-file results,
+    skipped resumes with their pre-screen scores, and failures.
+    """
+    if not job_description_store.get("jd"):
+        raise HTTPException(
+            status_code=400,
+            detail="Please set a job description first"
+        )
+    
+    job_description = job_description_store["jd"]
+    jd_id = job_description_store["id"]
+    documents = []
+    failures = []
+    
+    loop = asyncio.get_running_loop()
+    try:
+        for file in files:
+            try:
+                documents.extend(await loop.run_in_executor(None, store_batch_upload, file.filename, file.file))
+            except (ValueError, zipfile.BadZipFile) as e:
+                failures.append({"filename": file.filename, "error": str(e)})
+        
+        if len(documents) > BATCH_MAX_FILES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many resumes in one batch (max {BATCH_MAX_FILES})"
+            )
+        
+        async def extract(filename: str, pdf_digest: str) -> dict:
+            try:
+                resume_text, _ = await extract_document_from_file_async(blob_store.path(pdf_digest))
+                if not resume_text.strip():
+                    raise ValueError("Could not extract text from PDF")
+                return {"filename": filename, "text": resume_text, "pdf_digest": pdf_digest}
+            except Exception as e:
+                return {"filename": filename, "error": str(e)}
+        
+        extracted = await asyncio.gather(*(extract(name, pdf_digest) for name, pdf_digest in documents))
+        failures.extend(item for item in extracted if "error" in item)
+        extracted = [item for item in extracted if "text" in item]
+        
+        # Cheap local scoring decides which resumes are worth an LLM call
+        prescreen_scores = PreScreener(job_description).score_batch([item["text"] for item in extracted])
+        selected = select_for_analysis(
+            [scores["score"] for scores in prescreen_scores],
+            min_score=PRESCREEN_MIN_SCORE if min_prescreen_score is None else min_prescreen_score,
+            top_n=top_n or PRESCREEN_TOP_N
+        )
+        escalated = set(selected)
+        skipped = [
+            {"filename": item["filename"], "prescreen": scores}
+            for index, (item, scores) in enumerate(zip(extracted, prescreen_scores))
+            if index not in escalated
+        ]
+        
+        async def process(item: dict, prescreen: dict) -> dict:
+            try:
+                analysis = await analyze_and_store(item["text"], job_description, jd_id, item["pdf_digest"])
+                return {"filename": item["filename"], "analysis": analysis, "prescreen": prescreen}
+            except Exception as e:
+                return {"filename": item["filename"], "error": str(e)}
+        
+        # Run the first analysis on its own so the shared system prompt + JD prefix
+        # is in the provider's prompt cache before the rest fan out
+        outcomes = []
+        if selected:
+            outcomes.append(await process(extracted[selected[0]], prescreen_scores[selected[0]]))
+        outcomes.extend(await asyncio.gather(*(
+            process(extracted[index], prescreen_scores[index]) for index in selected[1:]
+        )))
+        
+        results = [outcome for outcome in outcomes if "analysis" in outcome]
+        failures.extend(outcome for outcome in outcomes if "error" in outcome)
+        
+        return {
+            "total": len(results) + len(skipped) + len(failures),
+            "succeeded": len(results),
+            "skipped": len(skipped),
+            "failed": len(failures),
+            "results": results,
+            "skipped_items": skipped,
+            "failures": failures
+        }
+    finally:
+        # Skipped, failed and duplicate uploads are removed; stored candidates keep theirs
+        for _, pdf_digest in documents:
+            await release_pdf(pdf_digest)
 
 
 @app.get("/api/health")
@@ -137,163 +994,352 @@ async def health_check():
     return {
         "status": "healthy",
         "agent_ready": agent.is_ready(),
-        "job_description_set": bool(job_description_store.get("jd"))
+        "job_description_set": bool(job_description_store.get("jd")),
+        "analysis_cache": await db.run(analysis_cache.stats),
+        "token_usage": await db.run(db.database.get_token_usage),
+        "latency_seconds": latency_summary()
     }
 
 
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Latency histograms, LLM token counts and queue depths in the Prometheus
+    text exposition format
+    """
+    for status, count in (await db.run(db.database.count_active_jobs)).items():
+        jobs_by_status.set(count, status=status)
+    return PlainTextResponse(registry.render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[list[str]]:
+    """Split a comma-separated `fields` query parameter (None = all fields)"""
+    if fields is None:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+
 @app.get("/api/candidates")
-async def get_candidates():
-    """Get all candidates with their metrics"""
-    candidates = db.get_all_candidates()
-    return candidates
+async def get_candidates(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: Literal["date", "score", "overall_fit"] = "date",
+    order: Literal["asc", "desc"] = "desc",
+    min_score: Optional[float] = Query(None, ge=0, le=100),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    name_prefix: Optional[str] = None,
+    skills: Optional[str] = None,
+    min_years: Optional[float] = Query(None, ge=0, le=60),
+    degree: Optional[Literal["associate", "bachelor", "master", "phd"]] = None,
+    title: Optional[str] = Query(None, max_length=200),
+    fields: Optional[str] = None
+):
+    """
+    Get candidates with their metrics
+    Pass `limit` to paginate; the cursor for the next page is returned in the
+    X-Next-Cursor response header. Without `limit` all matching candidates are returned.
+    `skills` (comma-separated, all required), `min_years`, `degree` (minimum level)
+    and `title` filter on the parsed candidate profiles, without calling the LLM.
+    `fields` (comma-separated) limits the returned columns.
+    """
+    try:
+        page = await db.get_candidates_page(
+            limit=limit,
+            cursor=cursor,
+            sort=sort,
+            descending=(order == "desc"),
+            min_score=min_score,
+            date_from=date_from,
+            date_to=date_to,
+            name_prefix=name_prefix,
+            skills=parse_fields(skills),
+            min_years=min_years,
+            degree=degree,
+            title=title,
+            fields=parse_fields(fields)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    return page["items"]
+
+
+@app.get("/api/candidates/search")
+async def search_candidates(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None
+):
+    """
+    Full-text search over candidate names and resumes (SQLite FTS5, BM25-ranked)
+    All terms must match; "quoted phrases" and prefix* terms are supported.
+    Each result carries a highlighted resume snippet; the cursor for the next
+    page is returned in the X-Next-Cursor response header.
+    """
+    try:
+        page = await db.search_candidates(build_search_query(q), limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    return page["items"]
+
+
+@app.get("/api/skills")
+async def get_skills(limit: int = Query(100, ge=1, le=1000)):
+    """Most common skills across candidates' parsed profiles, with candidate counts"""
+    return await db.run(db.database.get_skill_counts, limit)
 
 
 @app.get("/api/candidates/{candidate_id}")
-async def get_candidate_detail(candidate_id: int):
-    """Get full details for a specific candidate"""
-    candidate = db.get_candidate_by_id(candidate_id)
+async def get_candidate_detail(candidate_id: int, fields: Optional[str] = None):
+    """
+    Get full details for a specific candidate
+    Pass `fields` (comma-separated) to fetch only what the view renders, e.g.
+    `fields=analysis` skips loading the resume text.
+    """
+    try:
+        candidate = await db.get_candidate_by_id(candidate_id, parse_fields(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not candidate:
         raise HTTPException(status_code=404, detail="Candidate not found")
     return candidate
 
 
+@app.get("/api/candidates/{candidate_id}/analyses")
+async def get_candidate_analyses(candidate_id: int):
+    """Get a candidate's analyses against every job description it was scored for"""
+    if not await db.candidate_exists(candidate_id):
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    return await db.run(db.database.get_candidate_analyses, candidate_id)
+
+
+@app.get("/api/candidates/{candidate_id}/resume.pdf")
+async def download_candidate_resume(candidate_id: int):
+    """
+    Download the candidate's original PDF
+    Streamed from the blob store by FileResponse, never loaded whole into memory.
+    """
+    candidate = await db.get_candidate_by_id(candidate_id, ["name", "pdf_digest"])
+    if not candidate:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    if not candidate["pdf_digest"] or not blob_store.exists(candidate["pdf_digest"]):
+        raise HTTPException(status_code=404, detail="No PDF stored for this candidate")
+    
+    # The name is extracted by the LLM: keep only characters safe in a header and a file name
+    name = re.sub(r"[^\w .-]", "_", candidate["name"] or "").strip(" ._")[:100]
+    filename = f"{name or f'candidate-{candidate_id}'}.pdf"
+    return FileResponse(
+        blob_store.path(candidate["pdf_digest"]),
+        media_type="application/pdf",
+        filename=filename,
+        content_disposition_type="inline"
+    )
+
+
 @app.delete("/api/candidates/{candidate_id}")
 async def delete_candidate(candidate_id: int):
-    """Delete a candidate"""
-    deleted = db.delete_candidate(candidate_id)
+    """Delete a candidate (and its stored PDF unless another candidate shares it)"""
+    candidate = await db.get_candidate_by_id(candidate_id, ["pdf_digest"])
+    deleted = await db.delete_candidate(candidate_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Candidate not found")
+    
+    pdf_digest = candidate["pdf_digest"] if candidate else None
+    if pdf_digest:
+        # Re-checked under the blob's lock: an in-flight upload of the same file keeps it
+        await asyncio.get_running_loop().run_in_executor(
+            None, blob_store.delete_if_unreferenced, pdf_digest, db.database.pdf_in_use
+        )
     return {"message": "Candidate deleted successfully"}
 
 
 class ChatMessage(BaseModel):
     message: str
+    session_id: Optional[str] = None
+    # Only used to seed a new session (e.g. a conversation started before sessions existed)
     history: Optional[list[dict]] = []
     candidate_id: Optional[int] = None
 
 
-@app.post("/api/chat")
-async def chat_about_candidates(chat: ChatMessage):
+async def build_candidate_context(chat: ChatMessage, recent_messages: list[dict]) -> str:
     """
-    Chat about candidates with AI
-    Provides context from all stored resumes
+    Retrieve the resume chunks relevant to this chat turn and format them for the prompt
+    
+    Uses BM25 over the chunk index with the current question (plus the previous
+    user question, for follow-ups). A pinned candidate_id always contributes its
+    own most relevant chunks or, if nothing matches, its resume cut down to
+    CHAT_PINNED_TOKEN_BUDGET by section priority. Excerpts are kept within
+    CHAT_CONTEXT_TOKEN_BUDGET tokens overall.
+    """
+    previous_questions = [msg["content"] for msg in recent_messages if msg["role"] == "user"]
+    match_query = build_match_query(" ".join([chat.message] + previous_questions[-1:]))
+    
+    chunks = []
+    if chat.candidate_id is not None:
+        pinned = await db.search_chunks(match_query, CHAT_PINNED_CHUNKS, chat.candidate_id)
+        if not pinned:
+            candidate = await db.get_candidate_by_id(chat.candidate_id, ["name", "resume_text"])
+            if candidate:
+                pinned = [{
+                    "candidate_id": candidate["id"],
+                    "name": candidate["name"] or f"Candidate {candidate['id']}",
+                    "chunk_index": -1,
+                    "content": fit_to_budget(candidate["resume_text"], CHAT_PINNED_TOKEN_BUDGET)
+                }]
+        chunks.extend(pinned)
+    chunks.extend(await db.search_chunks(match_query, CHAT_CONTEXT_TOP_K))
+    
+    # Group excerpts by candidate, preserving relevance order, until the token budget runs out
+    grouped = {}
+    seen = set()
+    remaining = CHAT_CONTEXT_TOKEN_BUDGET
+    for chunk in chunks:
+        key = (chunk["candidate_id"], chunk["chunk_index"])
+        if key in seen:
+            continue
+        seen.add(key)
+        
+        content = truncate_to_tokens(chunk["content"], remaining)
+        if not content:
+            break
+        remaining -= count_tokens(content)
+        grouped.setdefault((chunk["candidate_id"], chunk["name"]), []).append(content)
+    
+    if not grouped:
+        return "Candidates:\nNo resume excerpts matched this question.\n"
+    
+    context = "Candidates (most relevant resume excerpts):\n"
+    for (candidate_id, name), excerpts in grouped.items():
+        context += f"\n--- {name} (ID: {candidate_id}) ---\n"
+        context += "\n...\n".join(excerpts) + "\n"
+    return context
+
+
+async def get_or_create_chat_session(chat: ChatMessage) -> dict:
+    """
+    Load the chat's server-side session, creating one if it has no (live) session yet
+    
+    A new session is seeded with the client-sent history, if any; after that
+    the client only needs to send its session_id.
+    """
+    if chat.session_id:
+        session = await db.run(db.database.get_chat_session, chat.session_id, CHAT_SESSION_TTL_SECONDS)
+        if session:
+            return session
+    
+    seed = [
+        {"role": msg["role"], "content": msg["content"]}
+        for msg in (chat.history or [])
+        if msg.get("role") in ("user", "assistant") and msg.get("content")
+    ]
+    session_id = await db.run(db.database.create_chat_session, seed)
+    return await db.run(db.database.get_chat_session, session_id, CHAT_SESSION_TTL_SECONDS)
+
+
+async def build_chat_messages(chat: ChatMessage) -> tuple[dict, list[dict]]:
+    """
+    Build the full message list for a chat turn: system context with retrieved
+    resume excerpts, the session's rolling summary and unsummarized recent
+    messages, and the new user message
+    
+    Returns:
+        (session, messages)
     """
     if not chat.message.strip():
         raise HTTPException(status_code=400, detail="Message cannot be empty")
     
-    # Get all resumes for context
-    resumes = db.get_all_resumes_text()
-    
-    if not resumes:
+    first_page = await db.get_candidates_page(limit=1)
+    if not first_page["items"]:
         raise HTTPException(status_code=400, detail="No candidates in database")
     
-    # Build context from all resumes
+    session = await get_or_create_chat_session(chat)
+    
+    # Build context from retrieved resume chunks instead of every resume
     context = "You are an HR assistant helping to answer questions about job candidates.\n\n"
     context += f"Job Description:\n{job_description_store.get('jd', 'Not set')}\n\n"
-    context += "Candidates:\n"
-    
-    for resume in resumes:
-        context += f"\n--- {resume['name']} (ID: {resume['id']}) ---\n"
-        context += resume['resume_text'][:1000] + "...\n"  # Truncate to manage token limits
+    context += await build_candidate_context(chat, session["messages"])
     
-    # Build conversation messages with history
     conversation_messages = [
         {"role": "system", "content": context}
     ]
+    if session["summary"]:
+        conversation_messages.append({"role": "system", "content": f"Previous conversation summary: {session['summary']}"})
+    conversation_messages.extend(
+        {"role": msg["role"], "content": msg["content"]} for msg in session["messages"]
+    )
     
-    # Create a session identifier based on conversation start (first message hash)
-    # This allows us to track when we last summarized this conversation
-    session_id = None
-    current_history_length = len(chat.history) if chat.history else 0
-    
-    if chat.history and len(chat.history) >= 3:
-        # Use hash of first 3 messages as session ID
-        import hashlib
-        session_key = str(chat.history[:3])
-        session_id = hashlib.md5(session_key.encode()).hexdigest()
-    
-    # Smart history management: summarize every 10 messages after reaching 20
-    should_summarize = False
-    if chat.history and len(chat.history) > 20:
-        if session_id:
-            last_summarized = chat_summary_tracker.get(session_id, 0)
-            # Summarize if we've added 10+ messages since last summarization
-            if current_history_length - last_summarized >= 10:
-                should_summarize = True
-                chat_summary_tracker[session_id] = current_history_length
-        else:
-            # No session tracking, summarize once at 20
-            should_summarize = True
-    
-    if should_summarize:
-        # Summarization strategy:
-        # - Keep last 10 messages in full detail (recent context)
-        # - Summarize everything before that (including previous summaries)
-        # 
-        # Examples:
-        # At 21 msgs: Summarize 1-11, keep 12-21
-        # At 30 msgs: Summarize 1-20 (includes old summary of 1-11 + msgs 12-20), keep 21-30  
-        # At 40 msgs: Summarize 1-30 (includes old summary of 1-20 + msgs 21-30), keep 31-40
-        
-        older_messages = chat.history[:-10]  # Everything except last 10
-        recent_messages = chat.history[-10:]  # Last 10 messages (full detail)
-        
-        # Extract existing summary and new messages to summarize
-        existing_summary = ""
-        messages_to_summarize = []
-        
-        for msg in older_messages:
-            # Check if this is a previous summary (system role with summary marker)
-            if msg.get('role') == 'system' and 'Previous conversation summary:' in msg.get('content', ''):
-                # Found previous summary - extract it
-                existing_summary = msg['content']
-            else:
-                # Regular user/assistant message - needs to be summarized
-                messages_to_summarize.append(msg)
-        
-        # Build cumulative summary prompt
-        summary_prompt = ""
-        if existing_summary:
-            # We have a previous summary - build on it
-            # This creates the cumulative effect: old summary + new messages
-            summary_prompt += f"{existing_summary}\n\nContinuing from that summary, also summarize these additional messages:\n\n"
-        else:
-            # First summarization - no previous summary exists
-            summary_prompt += "Summarize the following conversation concisely, focusing on key points, decisions, and candidate preferences discussed:\n\n"
-        
-        for msg in messages_to_summarize:
-            summary_prompt += f"{msg['role'].upper()}: {msg['content']}\n"
+    # Add current user message
+    conversation_messages.append({"role": "user", "content": chat.message})
+    return session, conversation_messages
+
+
+async def record_chat_turn(session: dict, question: str, answer: str):
+    """Persist a completed turn and, if enough messages piled up, summarize in the background"""
+    await db.run(db.database.append_chat_messages, session["id"], [
+        {"role": "user", "content": question},
+        {"role": "assistant", "content": answer}
+    ])
+    
+    unsummarized = len(session["messages"]) + 2
+    if unsummarized >= CHAT_RECENT_MESSAGES + CHAT_SUMMARY_BATCH and session["id"] not in summarizing_sessions:
+        summarizing_sessions.add(session["id"])
+        task = asyncio.create_task(summarize_chat_session(session["id"]))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+
+async def summarize_chat_session(session_id: str):
+    """
+    Fold everything except the last CHAT_RECENT_MESSAGES messages into the
+    session's rolling summary (runs off the request path)
+    """
+    try:
+        session = await db.run(db.database.get_chat_session, session_id, CHAT_SESSION_TTL_SECONDS)
+        if not session or len(session["messages"]) <= CHAT_RECENT_MESSAGES:
+            return
         
+        to_summarize = session["messages"][:-CHAT_RECENT_MESSAGES]
+        summary = await agent.summarize_conversation(session["summary"], to_summarize)
+        await db.run(
+            db.database.update_chat_summary,
+            session_id, summary, session["summarized_through"], to_summarize[-1]["id"]
+        )
+    except Exception as e:
+        # Keep the raw messages; the next turn will try again
+        print(f"Summarization failed: {e}")
+    finally:
+        summarizing_sessions.discard(session_id)
+
+
+async def evict_expired_chat_sessions():
+    """Periodically delete chat sessions idle for longer than CHAT_SESSION_TTL_SECONDS"""
+    while True:
         try:
-            summary_response = await agent.client.chat.completions.create(
-                model=agent.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that summarizes conversations concisely. When given a previous summary, integrate it with new messages to create a comprehensive but concise summary."},
-                    {"role": "user", "content": summary_prompt}
-                ],
-                temperature=0.3,
-                max_tokens=300
-            )
-            
-            summary = summary_response.choices[0].message.content
-            
-            # Add summary as system message, then recent history
-            conversation_messages.append({"role": "system", "content": f"Previous conversation summary: {summary}"})
-            conversation_messages.extend(recent_messages)
+            await db.run(db.database.delete_expired_chat_sessions, CHAT_SESSION_TTL_SECONDS)
         except Exception as e:
-            # If summarization fails, fall back to just using recent messages
-            print(f"Summarization failed: {e}")
-            conversation_messages.extend(recent_messages)
-    
-    elif chat.history:
-        # Less than 20 messages, just use all of them
-        conversation_messages.extend(chat.history)
-    
-    # Add current user message
-    conversation_messages.append({"role": "user", "content": chat.message})
+            print(f"Chat session cleanup failed: {e}")
+        await asyncio.sleep(3600)
+
+
+@app.post("/api/chat")
+async def chat_about_candidates(chat: ChatMessage):
+    """
+    Chat about candidates with AI
+    Provides context from the resume excerpts most relevant to the question
+    """
+    session, conversation_messages = await build_chat_messages(chat)
     
     try:
-        response = await agent.client.chat.completions.create(
+        response = await agent.create_completion(
+            operation="chat",
             model=agent.model,
             messages=conversation_messages,
             temperature=0.7,
@@ -301,12 +1347,87 @@ async def chat_about_candidates(chat: ChatMessage):
         )
         
         answer = response.choices[0].message.content
-        return {"answer": answer}
+        await record_chat_turn(session, chat.message, answer)
+        return {"answer": answer, "session_id": session["id"]}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
 
 
+@app.delete("/api/chat/sessions/{session_id}")
+async def delete_chat_session(session_id: str):
+    """Delete a chat session and its stored messages"""
+    deleted = await db.run(db.database.delete_chat_session, session_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    return {"message": "Chat session deleted successfully"}
+
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Format one server-sent event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/chat/stream")
+async def chat_about_candidates_stream(chat: ChatMessage, request: Request):
+    """
+    Streaming variant of /api/chat using server-sent events
+    Emits `event: session` with the session_id, then `data: {"delta": "..."}` per
+    token chunk, then an `event: done` (or `event: error`). The upstream
+    completion is closed if the client disconnects.
+    """
+    session, conversation_messages = await build_chat_messages(chat)
+    
+    options = {"stream_options": {"include_usage": True}} if agent.stream_usage else {}
+    try:
+        stream = await agent.create_completion(
+            operation="chat",
+            model=agent.model,
+            messages=conversation_messages,
+            temperature=0.7,
+            max_tokens=500,
+            stream=True,
+            **options
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
+    
+    async def event_stream():
+        yield sse_event({"session_id": session["id"]}, event="session")
+        answer_parts = []
+        usage = None
+        try:
+            async for chunk in stream:
+                if await request.is_disconnected():
+                    break
+                # With include_usage the last chunk carries the usage and no choices
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                # Azure also sends content-filter chunks without choices
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    answer_parts.append(delta)
+                    yield sse_event({"delta": delta})
+            else:
+                agent.record_stream_usage("chat", usage)
+                await record_chat_turn(session, chat.message, "".join(answer_parts))
+                yield sse_event({}, event="done")
+        except Exception as e:
+            yield sse_event({"detail": f"Chat error: {str(e)}"}, event="error")
+        finally:
+            # Stop the upstream generation (also runs when the response task is cancelled)
+            await stream.close()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # Serve React frontend (production build)
 # Try multiple possible locations for the frontend
 frontend_locations = [
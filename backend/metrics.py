@@ -0,0 +1,292 @@
+"""
+In-process latency and usage metrics
+Counters, gauges and histograms kept in memory and rendered in the
+Prometheus text exposition format for /api/metrics; histograms also keep a
+window of recent samples so /api/health can report p50/p95 latencies
+"""
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Seconds; spans a fast SQLite query (~1ms) to a slow LLM call (~1min)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RECENT_SAMPLES = 1000
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def percentile(samples: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of samples (None if there are none)"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+class _Metric:
+    kind = ""
+    
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+    
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing total, per label set"""
+    kind = "counter"
+    
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+    
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Gauge(_Metric):
+    """Current value (e.g. a queue depth), per label set"""
+    kind = "gauge"
+    
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+    
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+    
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+    
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+    
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values (usually seconds), per label set
+    
+    Keeps cumulative bucket counts for Prometheus and the last
+    RECENT_SAMPLES observations for percentiles.
+    """
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+        self._recent: Dict[LabelValues, deque] = {}
+    
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * len(self.buckets)
+                self._sums[key] = 0.0
+                self._recent[key] = deque(maxlen=RECENT_SAMPLES)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._sums[key] += value
+            self._recent[key].append(value)
+    
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the with-block (also when it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+    
+    def recent_percentiles(self, fractions: Iterable[float] = (0.5, 0.95)) -> Dict[str, Dict]:
+        """
+        Percentiles over each label set's recent samples
+        
+        Returns:
+            {label value(s) joined by "/": {"count", "p50", "p95", ...}}
+        """
+        with self._lock:
+            recent = {key: list(samples) for key, samples in self._recent.items()}
+        summary = {}
+        for key, samples in sorted(recent.items()):
+            stats = {"count": len(samples)}
+            for fraction in fractions:
+                value = percentile(samples, fraction)
+                stats[f"p{round(fraction * 100):d}"] = round(value, 4) if value is not None else None
+            summary["/".join(key) or self.name] = stats
+        return summary
+    
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = [(key, list(counts), self._sums[key]) for key, counts in sorted(self._counts.items())]
+        lines = self._header()
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """The set of metrics exposed together"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+    
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+    
+    def gauge(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames))
+    
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+    
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+registry = Registry()
+
+# Per-stage latencies
+pdf_extraction_seconds = registry.histogram(
+    "resume_pdf_extraction_seconds", "Time to extract text from one PDF, including executor wait", ["source"]
+)
+llm_request_seconds = registry.histogram(
+    "resume_llm_request_seconds",
+    "Time for chat.completions.create to return, including retries (streaming calls: to the first chunk, as <operation>_ttfb)",
+    ["operation"]
+)
+db_call_seconds = registry.histogram(
+    "resume_db_call_seconds", "Time for one Database method, including DB thread queue wait", ["method"]
+)
+http_request_seconds = registry.histogram(
+    "resume_http_request_seconds", "Time to handle an API request (to the response start when streaming)", ["route", "method"]
+)
+
+# LLM usage
+llm_requests_total = registry.counter(
+    "resume_llm_requests_total", "LLM calls by outcome", ["operation", "outcome"]
+)
+llm_retries_total = registry.counter(
+    "resume_llm_retries_total", "LLM calls retried after a 429, connection error or 5xx", ["operation"]
+)
+llm_tokens_total = registry.counter(
+    "resume_llm_tokens_total", "Tokens reported in LLM usage blocks", ["operation", "kind"]
+)
+llm_in_flight = registry.gauge(
+    "resume_llm_in_flight", "LLM calls currently awaiting a response", ["operation"]
+)
+
+# Queue depths
+db_calls_pending = registry.gauge(
+    "resume_db_calls_pending", "Database calls submitted to the DB threads and not yet finished"
+)
+jobs_by_status = registry.gauge(
+    "resume_jobs", "Background jobs by status (refreshed when metrics are read)", ["status"]
+)
+
+
+def record_llm_usage(operation: str, usage: Dict):
+    """Add a response's token counts ({"prompt_tokens", "completion_tokens", "cached_tokens"})"""
+    for kind in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+        if usage.get(kind):
+            llm_tokens_total.inc(usage[kind], operation=operation, kind=kind.replace("_tokens", ""))
+
+
+def latency_summary() -> Dict[str, Dict]:
+    """Recent p50/p95 seconds per stage, for /api/health"""
+    return {
+        "pdf_extraction": pdf_extraction_seconds.recent_percentiles(),
+        "llm": llm_request_seconds.recent_percentiles(),
+        "database": db_call_seconds.recent_percentiles(),
+        "http": http_request_seconds.recent_percentiles()
+    }
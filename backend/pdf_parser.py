@@ -1,17 +1,353 @@
 """
 PDF parsing utilities for extracting text from resume PDFs
+Extraction goes through a pluggable backend: pypdfium2 or PyMuPDF when
+installed (native, several times faster), otherwise PyPDF2. Pages come back
+individually, optionally with layout hints, and long documents are split
+into page ranges extracted in parallel by the extraction executor.
 """
 import io
-from typing import Union
+import os
+import mmap
+import math
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
 import PyPDF2
 
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # Optional: native PDFium backend
+    pdfium = None
 
-def extract_text_from_pdf(pdf_content: Union[bytes, io.BytesIO]) -> str:
+try:
+    import pymupdf
+except ImportError:  # Optional: native MuPDF backend
+    pymupdf = None
+
+from metrics import pdf_extraction_seconds
+
+
+# Extraction runs off the event loop: "process" (default) or "thread"
+PDF_EXTRACTION_EXECUTOR = os.getenv("PDF_EXTRACTION_EXECUTOR", "process")
+PDF_EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", "0")) or os.cpu_count() or 1
+PDF_EXTRACTION_TIMEOUT = float(os.getenv("PDF_EXTRACTION_TIMEOUT", "30"))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+# Backend: "auto" (first installed of pdfium, pymupdf, pypdf2) or one of those names
+PDF_EXTRACTOR = os.getenv("PDF_EXTRACTOR", "auto")
+# Documents longer than this are extracted in page ranges of this size in parallel (0 = never split)
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+
+_executor: Optional[Executor] = None
+
+# PDFium and MuPDF must not be entered from two threads at once
+_native_lock = threading.Lock()
+
+PdfSource = Union[bytes, BinaryIO, str, Path]
+
+
+def clean_text(text: str) -> str:
+    """
+    Collapse whitespace within lines and drop blank lines; line breaks are
+    kept so section headings can be recognised later
+    """
+    return "\n".join(" ".join(line.split()) for line in text.splitlines() if line.strip())
+
+
+def _group_lines(segments: List[Tuple[float, float, str, float]], tolerance: float = 2.0) -> List[Dict]:
+    """
+    Merge positioned text segments (x, y from the top, text, height) into
+    lines, in reading order
+    """
+    lines = []
+    for x, y, text, height in sorted(segments, key=lambda segment: (round(segment[1] / tolerance), segment[0])):
+        text = " ".join(text.split())
+        if not text:
+            continue
+        if lines and abs(lines[-1]["y"] - y) <= tolerance:
+            lines[-1]["text"] += " " + text
+            lines[-1]["height"] = max(lines[-1]["height"], height)
+        else:
+            lines.append({"text": text, "x": x, "y": y, "height": height})
+    for line in lines:
+        line["x"], line["y"], line["height"] = round(line["x"], 1), round(line["y"], 1), round(line["height"], 1)
+    return lines
+
+
+class PdfExtractor(ABC):
+    """
+    A PDF text extraction backend
+    
+    extract_page returns {"number", "text", "width", "height"} (text cleaned
+    with clean_text, sizes in points) plus, when layout is requested,
+    "lines": [{"text", "x", "y", "height"}] with x/y measured from the page's
+    top-left corner and height the font size. Positions are approximate and
+    differ by a few points between backends, but are enough to spot
+    headings, columns and indentation.
+    """
+    name = ""
+    available = False
+    thread_safe = True
+    
+    @abstractmethod
+    def document(self, source: PdfSource):
+        """Context manager opening a document from bytes, a seekable stream or a file path"""
+    
+    @abstractmethod
+    def page_count(self, document) -> int:
+        """Number of pages of an open document"""
+    
+    @abstractmethod
+    def extract_page(self, document, index: int, layout: bool = False) -> Dict:
+        """Text (and optionally layout) of the page at `index`, see the class docstring"""
+
+
+class PyPDF2Extractor(PdfExtractor):
+    """Pure-Python fallback; always available"""
+    name = "pypdf2"
+    available = True
+    
+    @contextmanager
+    def document(self, source: PdfSource):
+        if isinstance(source, (str, Path)):
+            # Memory-map files so the parser pages them in from the OS cache
+            with open(source, "rb") as pdf_file:
+                with mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    yield PyPDF2.PdfReader(mapped)
+        else:
+            yield PyPDF2.PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+    
+    def page_count(self, document) -> int:
+        return len(document.pages)
+    
+    def extract_page(self, document, index: int, layout: bool = False) -> Dict:
+        page = document.pages[index]
+        width, height = float(page.mediabox.width), float(page.mediabox.height)
+        segments = []
+        
+        def visit_text(text, cm, tm, font_dict, font_size):
+            if text.strip():
+                # Text space -> user space: origin of the text matrix through the CTM
+                x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+                y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+                size = (font_size or 0) * math.hypot(tm[2], tm[3]) * math.hypot(cm[2], cm[3])
+                segments.append((x, height - y, text, size))
+        
+        text = page.extract_text(visitor_text=visit_text if layout else None)
+        result = {"number": index + 1, "text": clean_text(text), "width": width, "height": height}
+        if layout:
+            result["lines"] = _group_lines(segments)
+        return result
+
+
+class PdfiumExtractor(PdfExtractor):
+    """Google's PDFium via pypdfium2 (pip install pypdfium2)"""
+    name = "pdfium"
+    available = pdfium is not None
+    thread_safe = False
+    
+    @contextmanager
+    def document(self, source: PdfSource):
+        document = pdfium.PdfDocument(str(source) if isinstance(source, Path) else source)
+        try:
+            yield document
+        finally:
+            document.close()
+    
+    def page_count(self, document) -> int:
+        return len(document)
+    
+    def extract_page(self, document, index: int, layout: bool = False) -> Dict:
+        page = document[index]
+        try:
+            width, height = page.get_size()
+            textpage = page.get_textpage()
+            try:
+                result = {
+                    "number": index + 1,
+                    "text": clean_text(textpage.get_text_range()),
+                    "width": width,
+                    "height": height
+                }
+                if layout:
+                    segments = []
+                    for rect_index in range(textpage.count_rects()):
+                        left, bottom, right, top = textpage.get_rect(rect_index)
+                        text = textpage.get_text_bounded(left, bottom, right, top)
+                        segments.append((left, height - top, text, top - bottom))
+                    result["lines"] = _group_lines(segments)
+            finally:
+                textpage.close()
+        finally:
+            page.close()
+        return result
+
+
+class PyMuPDFExtractor(PdfExtractor):
+    """MuPDF via PyMuPDF (pip install pymupdf; AGPL-licensed)"""
+    name = "pymupdf"
+    available = pymupdf is not None
+    thread_safe = False
+    
+    @contextmanager
+    def document(self, source: PdfSource):
+        if isinstance(source, (str, Path)):
+            document = pymupdf.open(str(source), filetype="pdf")
+        else:
+            data = source if isinstance(source, bytes) else source.read()
+            document = pymupdf.open(stream=data, filetype="pdf")
+        try:
+            yield document
+        finally:
+            document.close()
+    
+    def page_count(self, document) -> int:
+        return document.page_count
+    
+    def extract_page(self, document, index: int, layout: bool = False) -> Dict:
+        page = document[index]
+        result = {
+            "number": index + 1,
+            "text": clean_text(page.get_text("text")),
+            "width": page.rect.width,
+            "height": page.rect.height
+        }
+        if layout:
+            segments = []
+            for block in page.get_text("dict")["blocks"]:
+                for line in block.get("lines", []):
+                    text = "".join(span["text"] for span in line["spans"])
+                    size = max((span["size"] for span in line["spans"]), default=0.0)
+                    segments.append((line["bbox"][0], line["bbox"][1], text, size))
+            result["lines"] = _group_lines(segments)
+        return result
+
+
+# In "auto" preference order
+EXTRACTORS = {
+    extractor.name: extractor
+    for extractor in (PdfiumExtractor, PyMuPDFExtractor, PyPDF2Extractor)
+}
+
+
+def available_extractors() -> List[str]:
+    """Names of the installed backends, fastest first"""
+    return [name for name, extractor in EXTRACTORS.items() if extractor.available]
+
+
+def get_extractor(name: Optional[str] = None) -> PdfExtractor:
+    """
+    The extraction backend to use
+    
+    Args:
+        name: Backend name, or "auto"/None for PDF_EXTRACTOR's choice
+    
+    Raises:
+        ValueError: If the backend is unknown or not installed
+    """
+    name = name or PDF_EXTRACTOR
+    if name == "auto":
+        name = available_extractors()[0]
+    extractor = EXTRACTORS.get(name)
+    if extractor is None:
+        raise ValueError(f"Unknown PDF extractor {name!r} (expected one of {', '.join(EXTRACTORS)} or auto)")
+    if not extractor.available:
+        raise ValueError(f"PDF extractor {name!r} is not installed")
+    return extractor()
+
+
+def extract_pages(
+    pdf_content: PdfSource,
+    start: int = 0,
+    stop: Optional[int] = None,
+    layout: bool = False,
+    extractor: Optional[str] = None
+) -> Tuple[List[Dict], int]:
+    """
+    Extract pages [start, stop) of a PDF
+    
+    Args:
+        pdf_content: PDF as bytes, a seekable binary stream or a file path
+        start: First page index (0-based)
+        stop: Page index to stop before (None for the end of the document)
+        layout: Also return per-line positions and heights ("lines")
+        extractor: Backend name (None for PDF_EXTRACTOR)
+        
+    Returns:
+        (pages, total number of pages in the document); see PdfExtractor for
+        the page format
+        
+    Raises:
+        Exception: If PDF parsing fails
+    """
+    backend = get_extractor(extractor)
+    try:
+        with _native_lock if not backend.thread_safe else nullcontext():
+            with backend.document(pdf_content) as document:
+                total = backend.page_count(document)
+                stop = total if stop is None else min(stop, total)
+                pages = [backend.extract_page(document, index, layout) for index in range(start, stop)]
+        return pages, total
+    except Exception as e:
+        raise Exception(f"Failed to extract text from PDF: {str(e)}")
+
+
+def join_pages(pages: List[Dict]) -> str:
+    """The text of extracted pages as one string, one line per text line"""
+    return "\n".join(page["text"] for page in pages if page["text"])
+
+
+def extract_document(pdf_content: Union[bytes, BinaryIO], max_pages: Optional[int] = None) -> tuple[str, int]:
+    """
+    Extract text content and page count from a PDF file
+    
+    Args:
+        pdf_content: PDF file as bytes or a seekable binary stream (BytesIO, mmap)
+        max_pages: Only extract the first max_pages pages (None for all)
+        
+    Returns:
+        (extracted text, number of pages extracted)
+        
+    Raises:
+        Exception: If PDF parsing fails
+    """
+    pages, _ = extract_pages(pdf_content, 0, max_pages)
+    return join_pages(pages), len(pages)
+
+
+def extract_document_from_file(path: Union[str, Path], max_pages: Optional[int] = None) -> tuple[str, int]:
+    """
+    Extract text content and page count from a PDF on disk
+    
+    The backend reads the file itself (PyPDF2 through a memory map) rather
+    than from a bytes object.
+    
+    Args:
+        path: PDF file path (e.g. from the blob store)
+        max_pages: Only extract the first max_pages pages (None for all)
+        
+    Returns:
+        (extracted text, number of pages extracted)
+        
+    Raises:
+        Exception: If the file is empty or PDF parsing fails
+    """
+    if os.path.getsize(path) == 0:
+        raise Exception("Failed to extract text from PDF: file is empty")
+    pages, _ = extract_pages(path, 0, max_pages)
+    return join_pages(pages), len(pages)
+
+
+def extract_text_from_pdf(pdf_content: Union[bytes, io.BytesIO], max_pages: Optional[int] = None) -> str:
     """
     Extract text content from a PDF file
     
     Args:
         pdf_content: PDF file as bytes or BytesIO object
+        max_pages: Only extract the first max_pages pages (None for all)
         
     Returns:
         Extracted text as a string
@@ -19,32 +355,137 @@ def extract_text_from_pdf(pdf_content: Union[bytes, io.BytesIO]) -> str:
     Raises:
         Exception: If PDF parsing fails
     """
-    try:
-        # Convert bytes to BytesIO if needed
-        if isinstance(pdf_content, bytes):
-            pdf_file = io.BytesIO(pdf_content)
+    return extract_document(pdf_content, max_pages)[0]
+
+
+def get_extraction_executor() -> Executor:
+    """Get (lazily creating) the shared executor used for PDF extraction"""
+    global _executor
+    if _executor is None:
+        if PDF_EXTRACTION_EXECUTOR == "thread":
+            _executor = ThreadPoolExecutor(
+                max_workers=PDF_EXTRACTION_WORKERS,
+                thread_name_prefix="pdf-extract"
+            )
         else:
-            pdf_file = pdf_content
-        
-        # Create PDF reader
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        
-        # Extract text from all pages
-        text_parts = []
-        for page_num in range(len(pdf_reader.pages)):
-            page = pdf_reader.pages[page_num]
-            text_parts.append(page.extract_text())
+            _executor = ProcessPoolExecutor(max_workers=PDF_EXTRACTION_WORKERS)
+    return _executor
+
+
+def shutdown_extraction_executor():
+    """Shut down the extraction executor (called on application shutdown)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def _extract_pages_parallel(pdf_content: PdfSource, layout: bool) -> List[Dict]:
+    """
+    Extract up to PDF_MAX_PAGES pages in the extraction executor
+    
+    The first PDF_PAGES_PER_TASK pages are extracted together with the page
+    count; for longer documents the remaining ranges then run in parallel
+    when there is more than one worker (each task re-opens the document,
+    which is cheap next to text extraction).
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_extraction_executor()
+    # With a single worker the ranges would only run one after another
+    split = PDF_PAGES_PER_TASK > 0 and PDF_EXTRACTION_WORKERS > 1
+    chunk = PDF_PAGES_PER_TASK if split else PDF_MAX_PAGES
+    
+    pages, total = await loop.run_in_executor(
+        executor, extract_pages, pdf_content, 0, min(chunk, PDF_MAX_PAGES), layout
+    )
+    stop = min(total, PDF_MAX_PAGES)
+    if len(pages) < stop:
+        ranges = [(start, min(start + chunk, stop)) for start in range(len(pages), stop, chunk)]
+        results = await asyncio.gather(*(
+            loop.run_in_executor(executor, extract_pages, pdf_content, start, end, layout)
+            for start, end in ranges
+        ))
+        for more_pages, _ in results:
+            pages.extend(more_pages)
+    return pages
+
+
+async def extract_pages_async(
+    pdf_content: PdfSource,
+    layout: bool = True,
+    source: str = "bytes"
+) -> List[Dict]:
+    """
+    Extract a PDF's pages (with layout hints by default) without blocking
+    the event loop
+    
+    Applies the PDF_MAX_PAGES page cap and PDF_EXTRACTION_TIMEOUT per
+    document; long documents are split across the extraction executor.
+    
+    Args:
+        pdf_content: PDF as bytes or a file path (only the path crosses to the workers)
+        layout: Include per-line positions and heights (see PdfExtractor)
+        source: Metrics label for the extraction latency
         
-        # Combine all text
-        full_text = "\n".join(text_parts)
+    Returns:
+        The extracted pages, in order
         
-        # Clean up the text (remove excessive whitespace)
-        full_text = " ".join(full_text.split())
+    Raises:
+        TimeoutError: If extraction takes longer than PDF_EXTRACTION_TIMEOUT
+        Exception: If the file is empty or PDF parsing fails
+    """
+    if isinstance(pdf_content, (str, Path)):
+        if os.path.getsize(pdf_content) == 0:
+            raise Exception("Failed to extract text from PDF: file is empty")
+        pdf_content = str(pdf_content)
+    try:
+        with pdf_extraction_seconds.time(source=source):
+            return await asyncio.wait_for(
+                _extract_pages_parallel(pdf_content, layout), timeout=PDF_EXTRACTION_TIMEOUT
+            )
+    except asyncio.TimeoutError:
+        # Started workers finish their pages in the background; the page cap bounds that work
+        raise TimeoutError(f"PDF extraction timed out after {PDF_EXTRACTION_TIMEOUT:g} seconds")
+
+
+async def extract_document_async(pdf_content: bytes) -> tuple[str, int]:
+    """
+    Extract text and page count from a PDF in the extraction executor so the
+    event loop stays free
+    
+    Applies the PDF_MAX_PAGES page cap and PDF_EXTRACTION_TIMEOUT per document.
+    
+    Args:
+        pdf_content: PDF file as bytes
         
-        return full_text
+    Returns:
+        (extracted text, number of pages extracted)
         
-    except Exception as e:
-        raise Exception(f"Failed to extract text from PDF: {str(e)}")
+    Raises:
+        TimeoutError: If extraction takes longer than PDF_EXTRACTION_TIMEOUT
+        Exception: If PDF parsing fails
+    """
+    pages = await extract_pages_async(pdf_content, layout=False, source="bytes")
+    return join_pages(pages), len(pages)
+
+
+async def extract_document_from_file_async(path: Union[str, Path]) -> tuple[str, int]:
+    """
+    Extract text and page count from a PDF on disk in the extraction executor
+    
+    Only the path crosses to the workers, not the file's bytes. Same page cap,
+    timeout and errors as extract_document_async.
+    """
+    pages = await extract_pages_async(path, layout=False, source="file")
+    return join_pages(pages), len(pages)
+
+
+async def extract_text_from_pdf_async(pdf_content: bytes) -> str:
+    """
+    Extract text from a PDF without blocking the event loop
+    (see extract_document_async)
+    """
+    return (await extract_document_async(pdf_content))[0]
 
 
 def validate_pdf(pdf_content: bytes) -> bool:
@@ -0,0 +1,201 @@
+"""
+Resume preprocessing before LLM calls
+Splits resume text into sections (experience, skills, education, ...),
+counts tokens and fits the text into a token budget by section priority,
+so prompt size (and latency) stays bounded without cutting mid-word
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # In requirements.txt; without it (dev setups) token counts are estimated
+    tiktoken = None
+
+
+# Canonical section -> heading aliases (matched case-insensitively on their own line)
+SECTION_HEADINGS: Dict[str, List[str]] = {
+    "summary": ["summary", "professional summary", "profile", "about me", "objective", "career objective"],
+    "experience": [
+        "experience", "work experience", "professional experience", "employment",
+        "employment history", "work history", "career history"
+    ],
+    "skills": [
+        "skills", "technical skills", "key skills", "core competencies", "competencies",
+        "technologies", "tools", "tech stack"
+    ],
+    "education": ["education", "academic background", "qualifications", "education and training"],
+    "projects": ["projects", "key projects", "personal projects"],
+    "certifications": ["certifications", "certificates", "licenses", "courses", "training"],
+    "other": [
+        "awards", "achievements", "publications", "languages", "volunteering",
+        "volunteer experience", "interests", "hobbies", "references", "activities"
+    ],
+}
+
+# Order in which sections get budget; "header" is the text before the first
+# heading (name and contact details)
+SECTION_PRIORITY = ["header", "skills", "experience", "education", "summary", "certifications", "projects", "other"]
+
+# Sections dropped whenever the resume does not fit the budget as-is
+BOILERPLATE_HEADINGS = {"references", "hobbies", "interests"}
+
+# Lower-priority sections at most this long still get room when a bigger
+# section ahead of them has to be truncated (e.g. a two-line education entry)
+SHORT_SECTION_TOKENS = 150
+
+_ALIASES = {alias: section for section, aliases in SECTION_HEADINGS.items() for alias in aliases}
+_ALIAS_PATTERN = "|".join(sorted((re.escape(alias) for alias in _ALIASES), key=len, reverse=True))
+# A heading line: an alias alone, optionally followed by a colon
+_HEADING_LINE_RE = re.compile(rf"^\s*({_ALIAS_PATTERN})\s*:?\s*$", re.IGNORECASE)
+# In whitespace-collapsed text (no line breaks), only upper-case headings are trusted
+_INLINE_HEADING_RE = re.compile(rf"(?<!\w)({'|'.join(alias.upper() for alias in sorted(_ALIASES, key=len, reverse=True))})(?!\w):?")
+
+_encoding = None
+_encoding_loaded = False
+CHARS_PER_TOKEN = 4
+
+
+def _get_encoding():
+    """
+    Lazily load the tiktoken encoding
+    
+    Returns None, after a one-time warning, when tiktoken is not installed or
+    its encoding file cannot be loaded (it is downloaded on first use; offline
+    hosts need it pre-fetched into TIKTOKEN_CACHE_DIR)
+    """
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        if tiktoken is None:
+            print("⚠️  WARNING: tiktoken is not installed; token budgets use a ~4 characters/token estimate (pip install -r requirements.txt)")
+        else:
+            try:
+                _encoding = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                print(f"⚠️  WARNING: Could not load the tiktoken encoding ({e}); token budgets use a ~4 characters/token estimate")
+        _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken, or estimate ~4 characters per token in setups without it"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut text to at most max_tokens, on a word boundary
+    
+    Returns:
+        The text unchanged if it fits, otherwise a prefix ending in " ..."
+        ("" if not even one word fits)
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    
+    encoding = _get_encoding()
+    if encoding is not None:
+        prefix = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens - 1])
+    else:
+        prefix = text[:(max_tokens - 1) * CHARS_PER_TOKEN]
+    
+    # Drop the partial last word
+    cut = max(prefix.rfind(" "), prefix.rfind("\n"))
+    if cut > 0:
+        prefix = prefix[:cut]
+    prefix = prefix.rstrip()
+    return prefix + " ..." if prefix else ""
+
+
+def split_sections(text: str) -> List[Tuple[str, str, str]]:
+    """
+    Split resume text into sections at recognised headings
+    
+    Works on line-structured text; for whitespace-collapsed text (e.g. older
+    stored resumes) it falls back to upper-case inline headings.
+    
+    Returns:
+        List of (section, heading, content) in document order. Text before the
+        first heading is returned as ("header", "", content).
+    """
+    sections = []
+    section, heading, lines = "header", "", []
+    
+    if "\n" in text.strip():
+        for line in text.splitlines():
+            match = _HEADING_LINE_RE.match(line)
+            if match:
+                sections.append((section, heading, "\n".join(lines).strip()))
+                heading = match.group(1)
+                section, lines = _ALIASES[heading.lower()], []
+            else:
+                lines.append(line)
+        sections.append((section, heading, "\n".join(lines).strip()))
+    else:
+        position = 0
+        for match in _INLINE_HEADING_RE.finditer(text):
+            sections.append((section, heading, text[position:match.start()].strip()))
+            heading = match.group(1)
+            section, position = _ALIASES[heading.lower()], match.end()
+        sections.append((section, heading, text[position:].strip()))
+    
+    return [(name, title, content) for name, title, content in sections if title or content]
+
+
+def fit_to_budget(text: str, max_tokens: int, priority: Optional[List[str]] = None) -> str:
+    """
+    Fit resume text into a token budget, keeping the most useful sections
+    
+    Text that already fits is returned unchanged. Otherwise boilerplate
+    sections (references, hobbies) are dropped, then sections are admitted in
+    priority order (skills and experience before projects and awards). A
+    section that does not fit whole is truncated, leaving room for the short
+    sections after it; whatever no longer fits is left out. Kept sections
+    stay in document order.
+    
+    Args:
+        text: Resume text
+        max_tokens: Token budget (0 or less disables the limit)
+        priority: Section names, most important first (default SECTION_PRIORITY)
+    
+    Returns:
+        The text to send to the model
+    """
+    if max_tokens <= 0 or count_tokens(text) <= max_tokens:
+        return text
+    
+    sections = [
+        (index, name, heading, content)
+        for index, (name, heading, content) in enumerate(split_sections(text))
+        if heading.lower() not in BOILERPLATE_HEADINGS
+    ]
+    if len(sections) <= 1:
+        return truncate_to_tokens(text, max_tokens)
+    
+    rank = {name: position for position, name in enumerate(priority or SECTION_PRIORITY)}
+    ordered = sorted(sections, key=lambda section: (rank.get(section[1], len(rank)), section[0]))
+    
+    blocks = [f"{heading.upper()}\n{content}" if heading else content for _, _, heading, content in ordered]
+    # +1 for the blank line joining sections
+    costs = [count_tokens(block) + 1 for block in blocks]
+    
+    kept = {}
+    remaining = max_tokens
+    for position, (index, _, _, _) in enumerate(ordered):
+        if costs[position] <= remaining:
+            kept[index] = blocks[position]
+            remaining -= costs[position]
+            continue
+        
+        reserve = sum(cost for cost in costs[position + 1:] if cost <= SHORT_SECTION_TOKENS)
+        allowance = remaining - reserve
+        if allowance > 20:
+            kept[index] = truncate_to_tokens(blocks[position], allowance - 1)
+            remaining -= count_tokens(kept[index]) + 1
+    
+    return "\n\n".join(kept[index] for index in sorted(kept))
@@ -0,0 +1,181 @@
+"""
+Local pre-screening of resumes against the job description
+A cheap, CPU-only score (BM25 over the job description's key terms plus
+coverage of the skills it lists as required) decides which resumes in a
+batch are worth a full LLM analysis
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+from retrieval import STOPWORDS
+
+
+# Words common to most job descriptions that say nothing about the role itself
+JD_STOPWORDS = STOPWORDS | {
+    "ability", "able", "across", "also", "apply", "based", "benefits", "company",
+    "develop", "environment", "etc", "experience", "including", "join", "looking",
+    "must", "new", "not", "other", "plus", "position", "preferred", "required",
+    "requirements", "responsibilities", "role", "skills", "strong", "team", "using",
+    "well", "will", "work", "working", "year", "years", "your"
+}
+
+# Section headings after which the job description lists must-have skills
+_REQUIRED_HEADING_RE = re.compile(
+    r"\b(requirements?|required|qualifications?|must[- ]haves?|what you.?ll need|you have)\b",
+    re.IGNORECASE
+)
+# Headings that end a requirements section
+_OTHER_HEADING_RE = re.compile(
+    r"\b(nice[- ]to[- ]haves?|preferred|bonus|benefits|responsibilities|about us|what we offer)\b",
+    re.IGNORECASE
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens, keeping skill punctuation like C++, C# and Node.js"""
+    return [token.rstrip(".") for token in _TOKEN_RE.findall(text.lower())]
+
+
+def _terms(text: str) -> List[str]:
+    """Tokens that can carry meaning for matching (no stopwords, bare numbers or single characters)"""
+    return [
+        token for token in tokenize(text)
+        if len(token) > 1 and token not in JD_STOPWORDS and not token[0].isdigit()
+    ]
+
+
+def extract_required_skills(job_description: str, max_skills: int = 25) -> List[str]:
+    """
+    Pick out the skills the job description lists as required
+    
+    Uses the lines under a requirements/qualifications heading; if there is
+    no such section, falls back to the most frequent terms in the whole text.
+    
+    Returns:
+        Distinct skill terms, most frequent first
+    """
+    required_lines = []
+    in_required = False
+    for line in job_description.splitlines():
+        stripped = line.strip()
+        # Headings are short lines; bullets under them are the requirements
+        is_heading = stripped and len(stripped) < 60 and stripped[0] not in "-*•"
+        if is_heading and _REQUIRED_HEADING_RE.search(stripped):
+            in_required = True
+            continue
+        if is_heading and _OTHER_HEADING_RE.search(stripped):
+            in_required = False
+            continue
+        if in_required:
+            required_lines.append(stripped)
+    
+    source = "\n".join(required_lines) if required_lines else job_description
+    return [term for term, _ in Counter(_terms(source)).most_common(max_skills)]
+
+
+class PreScreener:
+    """
+    Score resumes against one job description without calling the LLM
+    
+    The score (0-100) blends BM25 relevance to the job description's key
+    terms, with IDF taken from the batch being screened, and the fraction
+    of required skills the resume mentions. Build one per job description
+    and reuse it for a whole batch.
+    """
+    
+    def __init__(
+        self,
+        job_description: str,
+        max_terms: int = 40,
+        k1: float = 1.2,
+        b: float = 0.75,
+        skill_weight: float = 0.5
+    ):
+        counts = Counter(_terms(job_description))
+        # Query term weights: dampened frequency in the job description
+        self.term_weights: Dict[str, float] = {
+            term: 1.0 + math.log(count) for term, count in counts.most_common(max_terms)
+        }
+        self.required_skills = extract_required_skills(job_description)
+        self.k1 = k1
+        self.b = b
+        self.skill_weight = skill_weight
+    
+    def score_batch(self, resumes: List[str]) -> List[Dict]:
+        """
+        Score a batch of resume texts
+        
+        Args:
+            resumes: Extracted resume texts
+        
+        Returns:
+            One dict per resume: {"score", "bm25", "skill_coverage", "matched_skills"}
+        """
+        if not resumes:
+            return []
+        
+        query_terms = set(self.term_weights) | set(self.required_skills)
+        term_counts = []
+        lengths = []
+        for text in resumes:
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            term_counts.append(Counter(token for token in tokens if token in query_terms))
+        
+        n_docs = len(resumes)
+        avg_length = (sum(lengths) / n_docs) or 1.0
+        doc_freq = Counter(term for counts in term_counts for term in counts)
+        idf = {
+            term: math.log(1 + (n_docs - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            for term in self.term_weights
+        }
+        # Best possible BM25 (every term saturated), used to normalise into 0-1
+        max_bm25 = sum(weight * idf[term] * (self.k1 + 1) for term, weight in self.term_weights.items()) or 1.0
+        
+        results = []
+        for counts, length in zip(term_counts, lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+            bm25 = sum(
+                weight * idf[term] * counts[term] * (self.k1 + 1) / (counts[term] + norm)
+                for term, weight in self.term_weights.items()
+                if counts[term]
+            )
+            matched = [skill for skill in self.required_skills if counts[skill]]
+            coverage = len(matched) / len(self.required_skills) if self.required_skills else 0.0
+            
+            relevance = min(bm25 / max_bm25, 1.0)
+            score = 100 * ((1 - self.skill_weight) * relevance + self.skill_weight * coverage)
+            results.append({
+                "score": round(score, 1),
+                "bm25": round(bm25, 3),
+                "skill_coverage": round(coverage, 3),
+                "matched_skills": matched
+            })
+        
+        return results
+
+
+def select_for_analysis(scores: List[float], min_score: float = 0.0, top_n: Optional[int] = None) -> List[int]:
+    """
+    Choose which resumes to escalate to the LLM
+    
+    Args:
+        scores: Pre-screen scores, one per resume
+        min_score: Resumes scoring below this are not escalated
+        top_n: If set, escalate at most this many (the best-scoring ones)
+    
+    Returns:
+        Indices of the resumes to analyze, in their original order
+    """
+    ranked = sorted(
+        (index for index, score in enumerate(scores) if score >= min_score),
+        key=lambda index: scores[index],
+        reverse=True
+    )
+    if top_n is not None:
+        ranked = ranked[:top_n]
+    return sorted(ranked)
@@ -0,0 +1,282 @@
+"""
+Structured candidate profiles: skills, years of experience, job titles and
+education
+A deterministic parser reads them from the resume text; the LLM's "profile"
+output, when present, is merged in. The result is stored in indexed tables
+so skill/experience filters are plain SQL rather than LLM calls
+"""
+import re
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from preprocess import split_sections
+
+
+# Canonical skill -> aliases (lower-case; the canonical name itself always matches)
+SKILL_ALIASES: Dict[str, List[str]] = {
+    "python": [], "java": [], "javascript": ["js", "ecmascript"], "typescript": ["ts"],
+    "c++": ["cpp"], "c#": ["csharp", "c sharp"], "go": ["golang"], "rust": [], "ruby": [],
+    "php": [], "kotlin": [], "swift": [], "scala": [], "r": [], "c": [], "perl": [], "bash": ["shell scripting"],
+    "sql": [], "postgresql": ["postgres", "psql"], "mysql": [], "sqlite": [], "oracle": [],
+    "sql server": ["mssql", "microsoft sql server"], "mongodb": ["mongo"], "redis": [],
+    "elasticsearch": ["elastic search", "opensearch"], "cassandra": [], "dynamodb": [], "snowflake": [],
+    "kafka": ["apache kafka"], "rabbitmq": [], "spark": ["apache spark", "pyspark"], "hadoop": [],
+    "airflow": ["apache airflow"], "dbt": [], "pandas": [], "numpy": [], "scikit-learn": ["sklearn", "scikit learn"],
+    "tensorflow": [], "pytorch": ["torch"], "machine learning": ["ml"], "deep learning": [],
+    "nlp": ["natural language processing"], "computer vision": [], "llm": ["llms", "large language models"],
+    "django": [], "flask": [], "fastapi": [], "spring": ["spring boot"], "rails": ["ruby on rails"],
+    "node.js": ["nodejs"], "express": ["express.js"], ".net": ["dotnet", "asp.net"],
+    "react": ["react.js", "reactjs"], "angular": ["angularjs"], "vue": ["vue.js", "vuejs"],
+    "next.js": ["nextjs"], "html": ["html5"], "css": ["css3"], "graphql": [], "rest": ["rest api", "restful"],
+    "grpc": [], "microservices": [], "docker": [], "kubernetes": ["k8s"], "terraform": [], "ansible": [],
+    "helm": [], "aws": ["amazon web services"], "azure": ["microsoft azure"], "gcp": ["google cloud", "google cloud platform"],
+    "linux": [], "git": [], "ci/cd": ["cicd", "continuous integration"], "jenkins": [], "github actions": [],
+    "prometheus": [], "grafana": [], "datadog": [], "tableau": [], "power bi": ["powerbi"], "excel": [],
+    "agile": ["scrum"], "jira": [], "figma": [],
+}
+
+# Short or common-word skills only counted when written with this exact capitalisation
+_CASE_SENSITIVE_SKILLS = {
+    "go": "Go", "r": "R", "c": "C", "swift": "Swift", "rust": "Rust", "spring": "Spring",
+    "express": "Express", "rails": "Rails", "rest": "REST", "excel": "Excel"
+}
+
+_SKILL_BY_ALIAS = {alias: skill for skill, aliases in SKILL_ALIASES.items() for alias in [skill, *aliases]}
+_SKILL_RE = re.compile(
+    r"(?<![\w+#.])(" + "|".join(
+        re.escape(alias) for alias in sorted(_SKILL_BY_ALIAS, key=len, reverse=True)
+        if _SKILL_BY_ALIAS[alias] not in _CASE_SENSITIVE_SKILLS or alias != _SKILL_BY_ALIAS[alias]
+    ) + r")(?![\w+#]|\.\w)",
+    re.IGNORECASE
+)
+_CASE_SENSITIVE_RE = re.compile(
+    r"(?<![\w+#.])(" + "|".join(re.escape(name) for name in _CASE_SENSITIVE_SKILLS.values()) + r")(?![\w+#&]|\.\w)"
+)
+
+# Degree levels, highest last; short abbreviations are matched case-sensitively
+DEGREE_LEVELS = ["associate", "bachelor", "master", "phd"]
+DEGREE_RANK = {level: rank for rank, level in enumerate(DEGREE_LEVELS, start=1)}
+# "Bachelor of Science", "Master's degree": the words that belong to the degree's name
+_DEGREE_OF = r"(?:\s+of\s+(?:science|arts|engineering|technology|applied science|business administration|fine arts))?(?:\s+degree)?"
+_DEGREE_PATTERNS = [
+    ("phd", re.compile(r"\b(ph\.?\s?d\.?|doctorate|doctor of \w+|d\.?phil)", re.IGNORECASE)),
+    ("master", re.compile(rf"\b(master'?s?{_DEGREE_OF}|m\.?sc\.?|m\.?eng\.?|mba|m\.?phil)\b", re.IGNORECASE)),
+    ("master", re.compile(r"\b(MS|M\.S\.|MA|M\.A\.)(?=[\s,]|$)")),
+    ("bachelor", re.compile(rf"\b(bachelor'?s?{_DEGREE_OF}|b\.?sc\.?|b\.?eng\.?|b\.?tech\.?)\b", re.IGNORECASE)),
+    ("bachelor", re.compile(r"\b(BS|B\.S\.|BA|B\.A\.)(?=[\s,]|$)")),
+    ("associate", re.compile(rf"\b(associate'?s?{_DEGREE_OF}(?= in| degree)|a\.?a\.?s\.?)\b", re.IGNORECASE)),
+]
+_INSTITUTION_RE = re.compile(r"\b(university|college|institute|school|academy|polytechnic)\b", re.IGNORECASE)
+_PART_SEPARATORS = re.compile(r",|;|\||\(|\)|\s[-–—]\s")
+
+_TITLE_WORDS = re.compile(
+    r"\b(engineer|developer|programmer|architect|manager|lead|director|analyst|scientist|designer|"
+    r"consultant|administrator|specialist|intern|head|officer|vp|president|founder|researcher|sre|devops)\b",
+    re.IGNORECASE
+)
+_TITLE_SEPARATORS = re.compile(r"\s*(?:,|\||\(|\bat\b|@|\s[-–—]\s)\s*")
+
+_MONTHS = {m: i for i, m in enumerate(["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"])}
+_DATE = r"(?:(?P<{0}m>jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+|(?P<{0}n>\d{{1,2}})/)?(?P<{0}y>(?:19|20)\d{{2}})"
+_RANGE_RE = re.compile(
+    _DATE.format("s") + r"\s*(?:-|–|—|to|until)\s*(?:" + _DATE.format("e") + r"|(?P<open>present|current|now|today|date))",
+    re.IGNORECASE
+)
+_YEARS_CLAIM_RE = re.compile(
+    r"(\d{1,2}(?:\.\d)?)\s*\+?\s*(?:years?|yrs?)\b(?:\s+of)?(?:\s+(?:professional|industry|relevant|work|hands-on))*\s+experience",
+    re.IGNORECASE
+)
+
+MAX_TITLES = 10
+
+
+def normalize_skill(name: str) -> str:
+    """Canonical lower-case key for a skill name (aliases like k8s -> kubernetes)"""
+    key = " ".join(name.lower().split()).strip(" .,;:")
+    return _SKILL_BY_ALIAS.get(key, key)
+
+
+def _section_text(text: str, section: str) -> Optional[str]:
+    """The content of every section of this kind, or None if the resume has none"""
+    parts = [content for name, _, content in split_sections(text) if name == section]
+    return "\n".join(parts) if parts else None
+
+
+def extract_skills(text: str) -> List[str]:
+    """
+    Known skills mentioned in the skills section (or anywhere, if the resume
+    has no skills section), as canonical keys in order of appearance
+    """
+    source = _section_text(text, "skills") or text
+    found = {}
+    for match in _SKILL_RE.finditer(source):
+        found.setdefault(_SKILL_BY_ALIAS[match.group(1).lower()], match.start())
+    for match in _CASE_SENSITIVE_RE.finditer(source):
+        found.setdefault(match.group(1).lower(), match.start())
+    return sorted(found, key=found.get)
+
+
+def _month_index(match: re.Match, prefix: str) -> int:
+    if match.group(prefix + "m"):
+        return _MONTHS[match.group(prefix + "m")[:3].lower()]
+    if match.group(prefix + "n"):
+        return max(0, min(11, int(match.group(prefix + "n")) - 1))
+    return 0
+
+
+def _merged_years(intervals: List[Tuple[float, float]]) -> float:
+    """Total length of the union of [start, end) intervals"""
+    total, current_start, current_end = 0.0, None, None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+
+def extract_years_experience(text: str, today: Optional[date] = None) -> Optional[float]:
+    """
+    Years of professional experience
+    
+    Uses an explicit claim ("8+ years of experience") when the resume makes
+    one, otherwise the union of the date ranges in the experience section
+    (overlapping jobs are counted once).
+    
+    Returns:
+        Years rounded to one decimal, or None if nothing was found
+    """
+    claims = [float(match.group(1)) for match in _YEARS_CLAIM_RE.finditer(text)]
+    if claims:
+        return max(claims)
+    
+    today = today or date.today()
+    intervals = []
+    for match in _RANGE_RE.finditer(_section_text(text, "experience") or text):
+        start = int(match.group("sy")) + _month_index(match, "s") / 12
+        if match.group("open"):
+            end = today.year + (today.month - 1) / 12
+        else:
+            # An end year without a month covers that whole year
+            end = int(match.group("ey")) + (_month_index(match, "e") + 1) / 12 if (match.group("em") or match.group("en")) else int(match.group("ey")) + 1
+        if 0 < end - start <= 50:
+            intervals.append((start, end))
+    if not intervals:
+        return None
+    return round(_merged_years(intervals), 1)
+
+
+def extract_titles(text: str) -> List[str]:
+    """Job titles from the experience section's entry headings (not bullet points)"""
+    source = _section_text(text, "experience")
+    if source is None:
+        return []
+    titles = []
+    for line in source.splitlines():
+        line = line.strip()
+        if not line or line[0] in "-*•·" or len(line) > 120:
+            continue
+        for part in _TITLE_SEPARATORS.split(line):
+            if part and len(part.split()) <= 6 and _TITLE_WORDS.search(part) and not _RANGE_RE.search(part):
+                titles.append(part.strip())
+                break
+    return _dedupe(titles)[:MAX_TITLES]
+
+
+def degree_level(text: str) -> Optional[str]:
+    """The degree level ("phd", "master", "bachelor", "associate") named in text, if any"""
+    for level, pattern in _DEGREE_PATTERNS:
+        if pattern.search(text):
+            return level
+    return None
+
+
+def extract_education(text: str) -> List[Dict]:
+    """Degrees from the education section: [{"degree", "level", "field", "institution"}]"""
+    source = _section_text(text, "education")
+    if source is None:
+        return []
+    education = []
+    for line in source.splitlines():
+        for level, pattern in _DEGREE_PATTERNS:
+            match = pattern.search(line)
+            if not match:
+                continue
+            rest = line[match.end():]
+            field = re.split(r",|;|\||\(|\bat\b|\s[-–—]\s|\d{4}", rest, maxsplit=1)[0]
+            field = re.sub(r"^(?:of|in)\s+", "", field.strip(" .:"), flags=re.IGNORECASE).strip(" .:")
+            institution = next((part.strip() for part in _PART_SEPARATORS.split(line) if _INSTITUTION_RE.search(part)), None)
+            education.append({
+                "degree": match.group(1).strip(),
+                "level": level,
+                "field": field or None,
+                "institution": institution
+            })
+            break
+    return education
+
+
+def _dedupe(values: List[str]) -> List[str]:
+    seen = set()
+    result = []
+    for value in values:
+        key = " ".join(value.lower().split())
+        if key and key not in seen:
+            seen.add(key)
+            result.append(value)
+    return result
+
+
+def build_profile(resume_text: str, llm_profile: Optional[Dict] = None) -> Dict:
+    """
+    Merge the deterministic parse of a resume with the LLM's profile output
+    
+    Skills and titles are the union of both. The LLM's years of experience
+    and education are preferred when it gave them, since it can read
+    free-form layouts the parser cannot.
+    
+    Args:
+        resume_text: Extracted resume text
+        llm_profile: The analysis's "profile" object ({"skills", "years_experience",
+            "titles", "education"}), if any
+    
+    Returns:
+        {"skills": [canonical keys], "years_experience": float | None, "titles": [...],
+         "education": [...], "highest_degree": level | None}
+    """
+    llm_profile = llm_profile if isinstance(llm_profile, dict) else {}
+    
+    llm_skills = [normalize_skill(skill) for skill in llm_profile.get("skills") or [] if isinstance(skill, str)]
+    skills = list(dict.fromkeys(skill for skill in extract_skills(resume_text) + llm_skills if skill))
+    
+    years = llm_profile.get("years_experience")
+    if not isinstance(years, (int, float)) or isinstance(years, bool) or not 0 <= years <= 60:
+        years = extract_years_experience(resume_text)
+    
+    llm_titles = [title.strip() for title in llm_profile.get("titles") or [] if isinstance(title, str)]
+    titles = _dedupe(llm_titles + extract_titles(resume_text))[:MAX_TITLES]
+    
+    education = []
+    for entry in llm_profile.get("education") or []:
+        if isinstance(entry, dict) and entry.get("degree"):
+            education.append({
+                "degree": str(entry["degree"]),
+                "level": degree_level(str(entry["degree"])),
+                "field": entry.get("field") or None,
+                "institution": entry.get("institution") or None
+            })
+    if not education:
+        education = extract_education(resume_text)
+    
+    levels = [entry["level"] for entry in education if entry["level"]]
+    return {
+        "skills": skills,
+        "years_experience": round(float(years), 1) if years is not None else None,
+        "titles": titles,
+        "education": education,
+        "highest_degree": max(levels, key=DEGREE_RANK.get) if levels else None
+    }
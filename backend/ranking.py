@@ -0,0 +1,150 @@
+"""
+Weighted ranking of the candidate pool over the per-dimension scores
+The pool's scores are loaded once into a NumPy matrix (one row per candidate,
+one column per dimension plus the overall match score) and kept until a score
+changes; each ranking request is then a handful of vectorized operations over
+that matrix: a weighted sum and one sort.
+"""
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from database import Database, SCORE_DIMENSIONS
+
+# Matrix columns, in order; weights are given per column name
+RANKING_COLUMNS = SCORE_DIMENSIONS + ("overall_match_score",)
+
+# Snapshots are reloaded after this many seconds even without a local change,
+# so writes made by other processes (e.g. other gunicorn workers) show up
+RANKING_SNAPSHOT_TTL_SECONDS = float(os.getenv("RANKING_SNAPSHOT_TTL_SECONDS", "60"))
+
+
+class ScorePool:
+    """Score matrix of one candidate pool"""
+    
+    def __init__(self, rows: List[tuple]):
+        """
+        Args:
+            rows: (id, name, *dimension scores, overall score) per candidate,
+                as returned by Database.get_score_rows
+        """
+        self.size = len(rows)
+        self.ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=self.size)
+        self.names = [row[1] for row in rows]
+        self.scores = np.array([row[2:] for row in rows], dtype=np.float64).reshape(self.size, len(RANKING_COLUMNS))
+        # Scores missing from the database rank as 0 rather than poisoning the sums
+        np.nan_to_num(self.scores, copy=False)
+        self.loaded_at = time.monotonic()
+    
+    def rank(self, weights: Dict[str, float], top_k: int = 50, candidate_ids: Optional[List[int]] = None) -> Dict:
+        """
+        Rank the pool by the weighted mean of its score columns
+        
+        Ranks are competition ranks (tied candidates share the best rank) and
+        a candidate's percentile is the share of the pool scoring at or below it.
+        
+        Args:
+            weights: Non-negative weight per RANKING_COLUMNS name; missing columns weigh 0
+            top_k: Number of best candidates to return
+            candidate_ids: Also report these candidates' positions, wherever they rank
+        
+        Returns:
+            {"size", "weights" (normalized to sum to 1), "items": top-k best first,
+             "candidates": the requested candidate_ids that are in the pool}
+        
+        Raises:
+            ValueError: On an unknown column, a negative weight or all-zero weights
+        """
+        unknown = set(weights) - set(RANKING_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown score dimensions: {', '.join(sorted(unknown))}")
+        vector = np.array([float(weights.get(column, 0.0)) for column in RANKING_COLUMNS])
+        if (vector < 0).any() or not np.isfinite(vector).all():
+            raise ValueError("Weights must be non-negative numbers")
+        if vector.sum() <= 0:
+            raise ValueError("At least one weight must be positive")
+        vector /= vector.sum()
+        
+        composite = self.scores @ vector
+        order = np.argsort(-composite)
+        ordered = composite[order]
+        # Competition rank: 1 + the position where each run of equal scores starts
+        run_starts = np.zeros(self.size, dtype=np.int64)
+        run_starts[1:] = np.where(ordered[1:] != ordered[:-1], np.arange(1, self.size), 0)
+        ranks = np.empty(self.size, dtype=np.int64)
+        ranks[order] = np.maximum.accumulate(run_starts) + 1
+        # Share of the pool at or below: everyone but those ranked strictly above
+        percentiles = (self.size - ranks + 1) * (100.0 / max(self.size, 1))
+        
+        # Best first, ties in id order like the candidate list: only the candidates
+        # scoring at least the k-th best composite need the (slower) stable order
+        top = np.empty(0, dtype=np.int64)
+        if self.size:
+            contenders = np.flatnonzero(composite >= ordered[min(top_k, self.size) - 1])
+            top = contenders[np.lexsort((self.ids[contenders], -composite[contenders]))][:top_k]
+        
+        positions = []
+        if candidate_ids:
+            found = np.searchsorted(self.ids, candidate_ids)
+            positions = [
+                int(index) for index, candidate_id in zip(found, candidate_ids)
+                if index < self.size and self.ids[index] == candidate_id
+            ]
+        
+        def item(index: int) -> Dict:
+            return {
+                "id": int(self.ids[index]),
+                "name": self.names[index],
+                "composite_score": round(float(composite[index]), 2),
+                "rank": int(ranks[index]),
+                "percentile": round(float(percentiles[index]), 2),
+                "scores": dict(zip(RANKING_COLUMNS, self.scores[index].tolist()))
+            }
+        
+        return {
+            "size": self.size,
+            "weights": dict(zip(RANKING_COLUMNS, vector.round(4).tolist())),
+            "items": [item(index) for index in top],
+            "candidates": [item(index) for index in positions]
+        }
+
+
+class RankingService:
+    """Keeps the score matrix of each pool in memory until the scores change"""
+    
+    def __init__(self, database: Database, ttl_seconds: float = RANKING_SNAPSHOT_TTL_SECONDS):
+        self.database = database
+        self.ttl_seconds = ttl_seconds
+        self._pools: Dict[Optional[int], tuple] = {}
+        self._lock = threading.Lock()
+    
+    def pool(self, jd_id: Optional[int] = None) -> ScorePool:
+        """
+        Score matrix of the candidates' primary analyses, or of their analyses
+        against jd_id; loaded from the database only when missing or stale
+        """
+        version = self.database.scores_version
+        with self._lock:
+            cached = self._pools.get(jd_id)
+        if cached:
+            cached_version, pool = cached
+            if cached_version == version and time.monotonic() - pool.loaded_at < self.ttl_seconds:
+                return pool
+        
+        pool = ScorePool(self.database.get_score_rows(jd_id))
+        with self._lock:
+            self._pools[jd_id] = (version, pool)
+        return pool
+    
+    def rank(
+        self,
+        weights: Dict[str, float],
+        top_k: int = 50,
+        jd_id: Optional[int] = None,
+        candidate_ids: Optional[List[int]] = None
+    ) -> Dict:
+        """Rank a pool (see ScorePool.rank)"""
+        return self.pool(jd_id).rank(weights, top_k, candidate_ids)
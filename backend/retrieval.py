@@ -0,0 +1,110 @@
+"""
+Retrieval utilities for chat context and candidate search
+Resumes are split into overlapping chunks at insert time and indexed with
+SQLite FTS5, so each chat turn only sends the most relevant excerpts (BM25)
+"""
+import re
+from typing import List
+
+
+# Words that carry no retrieval signal in recruiter questions
+STOPWORDS = {
+    "a", "about", "all", "an", "and", "any", "are", "as", "at", "be", "best", "by",
+    "can", "candidate", "candidates", "compare", "could", "did", "do", "does", "for",
+    "from", "has", "have", "he", "her", "his", "how", "i", "in", "is", "it", "its",
+    "me", "most", "of", "on", "or", "our", "she", "should", "show", "tell", "than",
+    "that", "the", "their", "them", "they", "this", "to", "top", "was", "we", "what",
+    "which", "who", "whom", "why", "with", "would", "you"
+}
+
+_TOKEN_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9+#.]*")
+
+
+def chunk_text(text: str, chunk_size: int = 800, overlap: int = 150) -> List[str]:
+    """
+    Split text into overlapping chunks on word boundaries
+    
+    Args:
+        text: Resume text
+        chunk_size: Target chunk length in characters
+        overlap: Characters repeated between consecutive chunks
+        
+    Returns:
+        List of chunks (empty for blank text)
+    """
+    words = text.split()
+    chunks = []
+    start = 0
+    
+    while start < len(words):
+        length = 0
+        end = start
+        while end < len(words) and (length == 0 or length + len(words[end]) + 1 <= chunk_size):
+            length += len(words[end]) + 1
+            end += 1
+        chunks.append(" ".join(words[start:end]))
+        
+        if end >= len(words):
+            break
+        
+        # Step back far enough to repeat roughly `overlap` characters
+        back = 0
+        next_start = end
+        while next_start > start + 1 and back < overlap:
+            next_start -= 1
+            back += len(words[next_start]) + 1
+        start = next_start
+    
+    return chunks
+
+
+def build_match_query(text: str) -> str:
+    """
+    Turn a free-text question into an FTS5 MATCH expression
+    
+    Each meaningful term is quoted (so punctuation like C++ or C# is safe) and
+    terms are OR-ed together; BM25 ranking rewards chunks matching more of them.
+    
+    Returns:
+        The MATCH expression, or "" if the text has no searchable terms
+    """
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        token = token.rstrip(".")
+        if len(token) < 2 or token in STOPWORDS or token in terms:
+            continue
+        terms.append(token)
+    
+    return " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+_PHRASE_RE = re.compile(r'"([^"]*)"')
+
+
+def build_search_query(text: str) -> str:
+    """
+    Turn a recruiter's search box input into an FTS5 MATCH expression
+    
+    Unlike build_match_query, every term must match (e.g. "python kubernetes"
+    finds resumes mentioning both). Double-quoted text is kept as a phrase;
+    a trailing * on a term matches it as a prefix ("devop*").
+    
+    Returns:
+        The MATCH expression, or "" if the text has no searchable terms
+    """
+    parts = []
+    for phrase in _PHRASE_RE.findall(text):
+        words = _TOKEN_RE.findall(phrase.lower())
+        if words:
+            parts.append('"' + " ".join(words).replace('"', '""') + '"')
+    
+    for match in re.finditer(r"([A-Za-z0-9][A-Za-z0-9+#.]*)(\*?)", _PHRASE_RE.sub(" ", text)):
+        token = match.group(1).lower().rstrip(".")
+        if token in STOPWORDS and not match.group(2):
+            continue
+        term = '"' + token.replace('"', '""') + '"' + match.group(2)
+        if term not in parts:
+            parts.append(term)
+    
+    return " ".join(parts)
+
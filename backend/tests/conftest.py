@@ -0,0 +1,21 @@
+"""
+Shared test setup: the backend modules are imported flat, as when the app
+runs from the backend directory
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from database import Database  # noqa: E402
+
+
+@pytest.fixture
+def database(tmp_path):
+    """A fresh database in a scratch directory"""
+    database = Database(str(tmp_path / "resume_screening.db"))
+    yield database
+    database.close()
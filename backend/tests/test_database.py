@@ -0,0 +1,58 @@
+"""
+Database tests
+"""
+import shutil
+
+from conftest import BACKEND_DIR
+from database import Database
+
+
+def test_legacy_import_keeps_dimension_scores(tmp_path):
+    """Analyses imported for the legacy job description carry the backfilled sub-scores"""
+    path = tmp_path / "resume_screening.db"
+    # A database from before job descriptions had IDs
+    shutil.copy(BACKEND_DIR / "data" / "resume_screening.db", path)
+    database = Database(str(path))
+    try:
+        jd_id = database.import_legacy_job_description("Python engineer")
+        
+        rows = database.get_score_rows(jd_id)
+        assert rows
+        assert all(None not in row for row in rows)
+        assert rows == database.get_score_rows()
+    finally:
+        database.close()
+
+
+def analysis(name: str, score: float, years_experience: int) -> dict:
+    """A minimal analysis as returned by the agent"""
+    return {
+        "candidate_name": name,
+        "overall_match_score": score,
+        "scores": {"technical_skills": score, "experience_level": score, "education_fit": score, "communication": score},
+        "profile": {"years_experience": years_experience}
+    }
+
+
+def test_reactivated_job_description_shows_its_stored_analysis(database):
+    """A -> B -> A: the candidate shows A's analysis again, without re-scoring"""
+    jd_a = database.create_job_description("Python engineer", activate=True)
+    candidate_id = database.add_candidate("Ada Lovelace\nSKILLS\nPython, Go", analysis("Ada", 90, 9), jd_id=jd_a)
+    
+    jd_b = database.create_job_description("Go engineer", activate=True)
+    database.save_candidate_analysis(candidate_id, jd_b, analysis("Ada L.", 20, 2), primary=True)
+    assert database.get_candidate_by_id(candidate_id)["profile"]["years_experience"] == 2
+    
+    database.activate_job_description(jd_a)
+    version = database.scores_version
+    assert database.promote_stored_analyses(jd_a) == 1
+    
+    candidate = database.get_candidate_by_id(candidate_id)
+    assert candidate["name"] == "Ada"
+    assert candidate["overall_score"] == 90
+    assert candidate["analysis"] == analysis("Ada", 90, 9)
+    assert candidate["profile"]["years_experience"] == 9
+    assert database.get_score_rows() == [(candidate_id, "Ada", 90.0, 90.0, 90.0, 90.0, 90.0)]
+    assert database.scores_version > version
+    # Already primary: nothing left to do
+    assert database.promote_stored_analyses(jd_a) == 0
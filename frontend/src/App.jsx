@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Upload, FileText, Briefcase, CheckCircle, XCircle, TrendingUp } from 'lucide-react';
 import JobDescriptionForm from './components/JobDescriptionForm';
-import ResumeUpload from './components/ResumeUpload';
+import ResumeUpload, { AnalysisProgress } from './components/ResumeUpload';
 import AnalysisDashboard from './components/AnalysisDashboard';
 import CandidatesList from './components/CandidatesList';
 import ChatWindow from './components/ChatWindow';
@@ -13,10 +13,13 @@ function App() {
   const [isLoading, setIsLoading] = useState(false);
   const [candidates, setCandidates] = useState([]);
   const [selectedCandidateId, setSelectedCandidateId] = useState(null);
+  const [selectedCandidateHasPdf, setSelectedCandidateHasPdf] = useState(false);
   const [isChatVisible, setIsChatVisible] = useState(false);
   const [uploadedResumeFile, setUploadedResumeFile] = useState(null);
   const [resumePreviewUrl, setResumePreviewUrl] = useState(null);
   const [toast, setToast] = useState(null);
+  const [analysisProgress, setAnalysisProgress] = useState({});
+  const [rescoreRun, setRescoreRun] = useState(null);
 
   // Show toast notification
   const showToast = (message, type = 'success') => {
@@ -30,6 +33,36 @@ function App() {
     loadCandidates();
   }, []);
 
+  // Poll the re-scoring run started by a job description change until it finishes
+  useEffect(() => {
+    if (!rescoreRun || rescoreRun.status !== 'running') return;
+
+    const timer = setTimeout(async () => {
+      try {
+        const response = await fetch(`/api/rescore-runs/${rescoreRun.run_id}`);
+        if (!response.ok) return;
+        const run = await response.json();
+        setRescoreRun(run);
+        // Scores for the active job description changed: refresh the list
+        if (run.succeeded !== rescoreRun.succeeded) loadCandidates();
+      } catch (error) {
+        console.error('Error loading re-scoring progress:', error);
+      }
+    }, 2000);
+
+    return () => clearTimeout(timer);
+  }, [rescoreRun]);
+
+  const handleCancelRescore = async () => {
+    if (!rescoreRun) return;
+    try {
+      const response = await fetch(`/api/rescore-runs/${rescoreRun.run_id}/cancel`, { method: 'POST' });
+      if (response.ok) setRescoreRun(await response.json());
+    } catch (error) {
+      showToast('Error cancelling re-scoring: ' + error.message, 'error');
+    }
+  };
+
   const loadJobDescription = async () => {
     try {
       const response = await fetch('/api/job-description');
@@ -61,10 +94,11 @@ function App() {
 
   const loadCandidateDetail = async (candidateId) => {
     try {
-      const response = await fetch(`/api/candidates/${candidateId}`);
+      const response = await fetch(`/api/candidates/${candidateId}?fields=analysis,pdf_digest`);
       if (response.ok) {
         const data = await response.json();
         setAnalysisResult(data.analysis);
+        setSelectedCandidateHasPdf(Boolean(data.pdf_digest));
         setSelectedCandidateId(candidateId);
       }
     } catch (error) {
@@ -89,7 +123,9 @@ function App() {
 
       if (!response.ok) throw new Error('Failed to update job description');
       
+      const data = await response.json();
       setJobDescription(jd);
+      setRescoreRun(data.rescore_run);
       showToast('Job description updated successfully!');
     } catch (error) {
       showToast('Error updating job description: ' + error.message, 'error');
@@ -104,6 +140,7 @@ function App() {
 
     setIsLoading(true);
     setAnalysisResult(null);
+    setAnalysisProgress({});
     
     // Store file and create preview URL
     setUploadedResumeFile(file);
@@ -114,7 +151,8 @@ function App() {
       const formData = new FormData();
       formData.append('file', file);
 
-      const response = await fetch('/api/analyze-resume', {
+      // Streaming endpoint: one JSON progress event per line (NDJSON)
+      const response = await fetch('/api/analyze-resume/stream', {
         method: 'POST',
         body: formData,
       });
@@ -124,7 +162,35 @@ function App() {
         throw new Error(error.detail || 'Failed to analyze resume');
       }
 
-      const result = await response.json();
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let result = null;
+
+      while (!result) {
+        const { value, done } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+
+        for (const line of lines) {
+          if (!line.trim()) continue;
+          const event = JSON.parse(line);
+
+          if (event.stage === 'error') throw new Error(event.detail);
+          if (event.stage === 'complete') {
+            result = event.analysis;
+          } else if (event.stage === 'partial') {
+            setAnalysisProgress(prev => ({ ...prev, fields: [...(prev.fields || []), event.field] }));
+          } else {
+            setAnalysisProgress(prev => ({ ...prev, [event.stage]: event }));
+          }
+        }
+      }
+
+      if (!result) throw new Error('Analysis ended unexpectedly');
       setAnalysisResult(result);
       
       // Reload candidates list to show the new candidate
@@ -183,6 +249,17 @@ function App() {
                 >
                   ← Back to Upload
                 </button>
+                {selectedCandidateHasPdf && (
+                  <a
+                    className="back-btn pdf-link"
+                    href={`/api/candidates/${selectedCandidateId}/resume.pdf`}
+                    target="_blank"
+                    rel="noreferrer"
+                  >
+                    <FileText size={16} />
+                    Original PDF
+                  </a>
+                )}
                 <AnalysisDashboard analysis={analysisResult} />
               </div>
             ) : (
@@ -198,6 +275,8 @@ function App() {
                     <JobDescriptionForm 
                       onSubmit={handleJobDescriptionUpdate}
                       currentJD={jobDescription}
+                      rescoreRun={rescoreRun}
+                      onCancelRescore={handleCancelRescore}
                     />
                   </div>
 
@@ -260,6 +339,7 @@ function App() {
                   <div className="loading-container">
                     <div className="spinner"></div>
                     <p>Analyzing resume...</p>
+                    <AnalysisProgress progress={analysisProgress} />
                   </div>
                 )}
 
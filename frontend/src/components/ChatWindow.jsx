@@ -81,15 +81,30 @@ function formatMarkdown(text) {
   return formatted;
 }
 
+// Parse one server-sent event block into { event, data }
+function parseSseEvent(rawEvent) {
+  let event = 'message';
+  let data = '';
+  rawEvent.split('\n').forEach(line => {
+    if (line.startsWith('event:')) event = line.slice(6).trim();
+    else if (line.startsWith('data:')) data += line.slice(5).trim();
+  });
+  return { event, data: data ? JSON.parse(data) : {} };
+}
+
 function ChatWindow({ candidates }) {
   const [messages, setMessages] = useState(() => {
     // Load chat history from localStorage on mount
     const saved = localStorage.getItem('chatHistory');
     return saved ? JSON.parse(saved) : [];
   });
+  // Server-side chat session (holds the summary and recent messages)
+  const sessionIdRef = useRef(localStorage.getItem('chatSessionId'));
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  const [isStreaming, setIsStreaming] = useState(false);
   const messagesEndRef = useRef(null);
+  const abortControllerRef = useRef(null);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
@@ -104,6 +119,18 @@ function ChatWindow({ candidates }) {
     scrollToBottom();
   }, [messages]);
 
+  // Cancel any in-flight stream when the component unmounts
+  useEffect(() => () => abortControllerRef.current?.abort(), []);
+
+  const appendToLastMessage = (delta) => {
+    setMessages(prev => {
+      const next = [...prev];
+      const last = next[next.length - 1];
+      next[next.length - 1] = { ...last, content: last.content + delta };
+      return next;
+    });
+  };
+
   const handleSend = async () => {
     if (!input.trim() || isLoading) return;
 
@@ -114,30 +141,71 @@ function ChatWindow({ candidates }) {
     setMessages(prev => [...prev, { role: 'user', content: userMessage }]);
     setIsLoading(true);
 
+    const controller = new AbortController();
+    abortControllerRef.current = controller;
+    let started = false;
+
     try {
-      const response = await fetch('/api/chat', {
+      // Stream the answer token by token over server-sent events
+      const response = await fetch('/api/chat/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        // Send message with conversation history for context
+        // The server keeps the conversation; history only seeds a new session
         body: JSON.stringify({ 
           message: userMessage,
-          history: messages  // Include previous messages for continuity
-        })
+          session_id: sessionIdRef.current,
+          history: sessionIdRef.current ? [] : messages
+        }),
+        signal: controller.signal
       });
 
-      if (!response.ok) throw new Error('Chat request failed');
+      if (!response.ok || !response.body) throw new Error('Chat request failed');
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+
+        for (const rawEvent of events) {
+          const { event, data } = parseSseEvent(rawEvent);
+          if (event === 'error') throw new Error(data.detail || 'Chat request failed');
+          if (event === 'session') {
+            sessionIdRef.current = data.session_id;
+            localStorage.setItem('chatSessionId', data.session_id);
+            continue;
+          }
+          if (!data.delta) continue;
 
-      const data = await response.json();
-      
-      // Add AI response
-      setMessages(prev => [...prev, { role: 'assistant', content: data.answer }]);
+          if (!started) {
+            // First token: replace the "Thinking..." indicator with the answer
+            started = true;
+            setIsStreaming(true);
+            setMessages(prev => [...prev, { role: 'assistant', content: data.delta }]);
+          } else {
+            appendToLastMessage(data.delta);
+          }
+        }
+      }
     } catch (error) {
-      setMessages(prev => [...prev, { 
-        role: 'assistant', 
-        content: 'Sorry, I encountered an error. Please try again.' 
-      }]);
+      if (error.name !== 'AbortError') {
+        const errorText = 'Sorry, I encountered an error. Please try again.';
+        if (started) {
+          appendToLastMessage(`\n\n${errorText}`);
+        } else {
+          setMessages(prev => [...prev, { role: 'assistant', content: errorText }]);
+        }
+      }
     } finally {
+      abortControllerRef.current = null;
       setIsLoading(false);
+      setIsStreaming(false);
     }
   };
 
@@ -152,8 +220,14 @@ function ChatWindow({ candidates }) {
 
   const clearHistory = () => {
     if (window.confirm('Clear all chat history?')) {
+      abortControllerRef.current?.abort();
       setMessages([]);
       localStorage.removeItem('chatHistory');
+      if (sessionIdRef.current) {
+        fetch(`/api/chat/sessions/${sessionIdRef.current}`, { method: 'DELETE' }).catch(() => {});
+        sessionIdRef.current = null;
+        localStorage.removeItem('chatSessionId');
+      }
     }
   };
 
@@ -201,7 +275,7 @@ function ChatWindow({ candidates }) {
               </div>
             ))}
 
-            {isLoading && (
+            {isLoading && !isStreaming && (
               <div className="chat-message assistant">
                 <div className="message-content">
                   <Loader className="spinner-small" size={16} />
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
-import { Save } from 'lucide-react';
+import { Save, X } from 'lucide-react';
 
-function JobDescriptionForm({ onSubmit, currentJD }) {
+function JobDescriptionForm({ onSubmit, currentJD, rescoreRun, onCancelRescore }) {
   const [jd, setJd] = useState(currentJD || '');
 
   // Update local state when currentJD prop changes
@@ -31,8 +31,39 @@ function JobDescriptionForm({ onSubmit, currentJD }) {
         <Save size={18} />
         Update Job Description
       </button>
+      {rescoreRun && rescoreRun.total > 0 && (
+        <RescoreProgress run={rescoreRun} onCancel={onCancelRescore} />
+      )}
     </form>
   );
 }
 
+// Progress of re-scoring stored candidates against the updated job description
+function RescoreProgress({ run, onCancel }) {
+  const finished = run.succeeded + run.failed + run.cancelled;
+  const percent = Math.round((finished / run.total) * 100);
+  const label = {
+    running: `Re-scoring candidates: ${finished}/${run.total}`,
+    completed: `Re-scored ${run.succeeded} candidates${run.failed ? ` (${run.failed} failed)` : ''}`,
+    cancelled: `Re-scoring cancelled after ${run.succeeded}/${run.total}`,
+  }[run.status];
+
+  return (
+    <div className={`rescore-progress ${run.status}`}>
+      <div className="rescore-progress-header">
+        <span>{label}</span>
+        {run.status === 'running' && (
+          <button type="button" className="rescore-cancel-btn" onClick={onCancel} title="Cancel re-scoring">
+            <X size={14} />
+            Cancel
+          </button>
+        )}
+      </div>
+      <div className="rescore-progress-bar">
+        <div className="rescore-progress-fill" style={{ width: `${percent}%` }} />
+      </div>
+    </div>
+  );
+}
+
 export default JobDescriptionForm;
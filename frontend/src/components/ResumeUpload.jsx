@@ -1,5 +1,54 @@
 import React, { useState, useRef } from 'react';
-import { Upload, FileCheck } from 'lucide-react';
+import { Upload, FileCheck, CheckCircle, Loader } from 'lucide-react';
+
+// Analysis stages reported by /api/analyze-resume/stream, in order
+const ANALYSIS_STAGES = [
+  { key: 'received', label: 'Upload received' },
+  { key: 'extracted', label: 'Text extracted' },
+  { key: 'analyzing', label: 'AI analysis' },
+  { key: 'stored', label: 'Candidate saved' },
+];
+
+// Progress list for a streaming resume analysis
+// `progress` maps stage keys to the latest event received for that stage
+export function AnalysisProgress({ progress }) {
+  const currentIndex = ANALYSIS_STAGES.reduce(
+    (latest, stage, index) => (progress[stage.key] ? index : latest), -1
+  );
+
+  const detail = (key) => {
+    const event = progress[key];
+    if (!event) return null;
+    if (key === 'extracted') return `${event.pages} page${event.pages === 1 ? '' : 's'}`;
+    if (key === 'analyzing' && progress.fields) return `${progress.fields.length} fields received`;
+    if (key === 'stored' && event.duplicate_of) {
+      return event.duplicate_of.exact ? 'already on file' : 'matches a resume on file';
+    }
+    if (key === 'stored' && event.cached) return 'cached result';
+    return null;
+  };
+
+  return (
+    <ul className="analysis-progress">
+      {ANALYSIS_STAGES.map((stage, index) => {
+        const event = progress[stage.key];
+        const done = index < currentIndex || (event && stage.key === 'stored');
+        const active = index === currentIndex && !done;
+        return (
+          <li
+            key={stage.key}
+            className={`analysis-progress-step ${done ? 'done' : ''} ${active ? 'active' : ''}`}
+          >
+            {done ? <CheckCircle size={16} /> : active ? <Loader className="spinner-small" size={16} /> : <span className="analysis-progress-dot" />}
+            <span>{stage.label}</span>
+            {detail(stage.key) && <span className="analysis-progress-detail">{detail(stage.key)}</span>}
+            {event && <span className="analysis-progress-time">{(event.elapsed_ms / 1000).toFixed(1)}s</span>}
+          </li>
+        );
+      })}
+    </ul>
+  );
+}
 
 function ResumeUpload({ onUpload, isLoading, disabled }) {
   const [selectedFile, setSelectedFile] = useState(null);